@@ -0,0 +1,125 @@
+"""Micro-benchmarks dos handlers e das funções por trás deles
+
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks/bench_handlers.py --municipalities 100 \\
+        --benchmark-storage=benchmarks/baselines/micro_100 --benchmark-save=baseline
+
+As baselines ficam uma pasta por tamanho (micro_1, micro_100, micro_853),
+já que --benchmark-compare pega a última gravação da pasta. Para comparar
+com ela (falha se a média piorar 20%):
+
+    pytest benchmarks/bench_handlers.py --municipalities 100 \\
+        --benchmark-storage=benchmarks/baselines/micro_100 \\
+        --benchmark-compare --benchmark-compare-fail=mean:20%
+
+Os números dependem da máquina: regrave as baselines ao trocar de host.
+
+Os handlers cacheados (historical-data, statistics...) são medidos com o
+cache de respostas esvaziado a cada rodada; a variante `cached` mede o
+caminho de cache.
+"""
+import numpy as np
+import pytest
+
+ROUNDS = 30
+
+HANDLERS = [
+    '/api/arboviroses/dashboard-data?municipality={m}',
+    '/api/arboviroses/dashboard-bundle?municipality={m}',
+    '/api/arboviroses/historical-data?municipality={m}',
+    '/api/arboviroses/historical-data?municipality={m}&format=columnar',
+    '/api/arboviroses/predictions/12?municipality={m}',
+    '/api/arboviroses/statistics?municipality={m}',
+    '/api/arboviroses/alerts?municipality={m}',
+    '/api/arboviroses/risk-map?municipality={m}',
+    '/api/arboviroses/climate-correlation?municipality={m}',
+    '/api/arboviroses/health'
+]
+
+
+def _get(client, url):
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200, response.get_data(as_text=True)[:200]
+    return response
+
+
+@pytest.mark.parametrize('url', HANDLERS)
+def test_handler(benchmark, client, municipality, uncached, url):
+    url = url.format(m=municipality)
+    benchmark.pedantic(_get, args=(client, url), setup=uncached, rounds=ROUNDS, warmup_rounds=1)
+
+
+@pytest.mark.parametrize('url', [HANDLERS[2], HANDLERS[5]])
+def test_handler_cached(benchmark, client, municipality, url):
+    url = url.format(m=municipality)
+    _get(client, url)
+    benchmark(_get, client, url)
+
+
+def test_historical_generation(benchmark, simple_app, municipality):
+    """Leitura das séries e montagem das linhas do /historical-data"""
+    from src.services.weekly_store import historical_records, parse_history_args
+    query = parse_history_args({'municipality': municipality})
+    benchmark(historical_records, municipality, query['start'], query['end'], query['diseases'])
+
+
+def test_predictions_inference(benchmark, simple_app, municipality):
+    """Inferência sem memorização (cache de previsões esvaziado a cada rodada)"""
+    from src.services.model_cache import ModelCache
+    from src.services.series_engine import get_series_engine
+    cache = ModelCache()
+    engine = get_series_engine()
+    benchmark.pedantic(cache.predict, args=(engine, municipality, 12), setup=cache.invalidate,
+                       rounds=ROUNDS, warmup_rounds=1)
+
+
+def test_batch_forecast(benchmark, simple_app, municipalities):
+    """Previsão sazonal de todos os municípios em uma passada"""
+    from src.services.series_engine import get_series_engine
+    engine = get_series_engine()
+    benchmark(engine.forecast, municipalities)
+
+
+def test_risk_scoring(benchmark, simple_app):
+    """Classificação de risco de todos os municípios × doenças"""
+    from src.services.risk_scoring import score_store
+    benchmark(score_store)
+
+
+def test_epidemic_channel_build(benchmark, simple_app):
+    """Reconstrução completa do canal endêmico (sem o caminho incremental)"""
+    from src.services import epiweeks
+    from src.services.epidemic_channel import EpidemicChannel
+    from src.services.weekly_store import get_case_store
+    store = get_case_store()
+    end = min(store.end_index, epiweeks.current_index() + 1)
+    data = store.data[:, :, :end - store.start_index]
+    benchmark(EpidemicChannel().build, data, end)
+
+
+@pytest.mark.parametrize('fmt', ['json', 'columnar'])
+def test_serialization(benchmark, simple_app, municipality, fmt):
+    from src.services.serialization import encode_table
+    from src.services.weekly_store import historical_table, parse_history_args
+    query = parse_history_args({'municipality': municipality})
+    dates, columns = historical_table(municipality, query['start'], query['end'], query['diseases'])
+    benchmark(encode_table, dates, columns, fmt)
+
+
+def test_dashboard_payload_dumps(benchmark, simple_app, municipality):
+    from src.services.panels import PanelContext, dashboard_panel
+    from src.services.serialization import dumps
+    with simple_app.app_context():
+        payload = dashboard_panel(PanelContext(municipality))
+    benchmark(dumps, payload)
+
+
+def test_feature_matrix(benchmark, simple_app, municipality):
+    """Atributos de todas as origens de um município (sem o cache em disco)"""
+    from src.services.feature_store import CLIMATE_FEATURES, origin_features
+    from src.services.weekly_store import DISEASES, get_case_store, get_climate_store
+    _, cases = get_case_store().read(municipality)
+    _, climate = get_climate_store().read(municipality, variables=CLIMATE_FEATURES)
+    cases = np.stack([cases[d] for d in DISEASES])
+    climate = np.stack([climate[v] for v in CLIMATE_FEATURES])
+    benchmark(origin_features, cases, climate)
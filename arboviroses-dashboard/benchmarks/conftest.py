@@ -0,0 +1,74 @@
+"""Fixtures dos micro-benchmarks (pytest-benchmark)
+
+O tamanho do conjunto sintético vem de --municipalities (1, 100 ou 853).
+Cada tamanho roda em uma sessão própria: o cadastro de municípios é
+carregado na importação de `src`.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datasets  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption('--municipalities', type=int, default=100, choices=datasets.SIZES,
+                     help='tamanho do conjunto sintético')
+
+
+def pytest_configure(config):
+    size = config.getoption('--municipalities')
+    config.bench_municipalities = datasets.activate(size)
+    config.bench_size = size
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # Baselines só são comparáveis com o mesmo tamanho de conjunto
+    machine_info['municipalities'] = config.bench_size
+
+
+@pytest.fixture(scope='session')
+def municipalities(pytestconfig):
+    return pytestconfig.bench_municipalities
+
+
+@pytest.fixture(scope='session')
+def municipality(municipalities):
+    return municipalities[-1]
+
+
+@pytest.fixture(scope='session')
+def simple_app(pytestconfig):
+    from src.main import create_app, preload
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': datasets.database_uri(pytestconfig.bench_size),
+        'ARBOVIROSES_ENGINE': 'simple'
+    })
+    return preload(app)
+
+
+@pytest.fixture(scope='session')
+def full_app(pytestconfig):
+    """Aplicação com o motor completo (src.services.engines) no lugar do simplificado"""
+    from src.main import create_app, preload
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': datasets.database_uri(pytestconfig.bench_size),
+        'ARBOVIROSES_ENGINE': 'full'
+    })
+    return preload(app)
+
+
+@pytest.fixture(params=['simple', 'full'])
+def client(request):
+    app = request.getfixturevalue(f'{request.param}_app')
+    return app.test_client()
+
+
+@pytest.fixture
+def uncached():
+    """Setup que esvazia o cache de respostas: mede o handler, não o cache"""
+    from src.services.response_cache import backend
+    return backend.clear
@@ -0,0 +1,89 @@
+"""Conjuntos de dados sintéticos para os benchmarks (1, 100 e 853 municípios)
+
+Cada tamanho usa um diretório próprio de séries e um cadastro gerado com
+semente fixa; as séries vêm da simulação determinística
+(src/services/simulation.py), então duas execuções medem exatamente os
+mesmos dados.
+
+activate() precisa rodar antes de qualquer import de `src`: o cadastro de
+municípios e as séries são lidos na importação.
+"""
+import os
+import sys
+import csv
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = (1, 100, 853)
+DATA_ROOT = os.environ.get('ARBOVIROSES_BENCH_DIR', os.path.join(ROOT, 'benchmarks', 'data'))
+SEED = 853
+
+# Regiões de saúde de Minas Gerais (micro e macrorregiões)
+MICRO_REGIONS = 89
+MACRO_REGIONS = 14
+
+# Limites aproximados de Minas Gerais
+LAT_RANGE = (-22.9, -14.2)
+LNG_RANGE = (-51.0, -39.9)
+
+
+def dataset_dir(size):
+    return os.path.join(DATA_ROOT, f'{size}_municipios')
+
+
+def synthetic_registry(count, seed=SEED):
+    """Linhas do cadastro (slug, name, ibge, population, lat, lng, micro, macro)"""
+    rng = np.random.default_rng(seed)
+    populations = np.clip(rng.lognormal(9.3, 1.1, count), 800, 2_500_000).astype(int)
+    lats = rng.uniform(*LAT_RANGE, count)
+    lngs = rng.uniform(*LNG_RANGE, count)
+    return [
+        {
+            'slug': f'municipio_{i:03d}',
+            'name': f'Município {i:03d}',
+            'ibge': str(3100000 + i),
+            'population': int(populations[i]),
+            'lat': round(float(lats[i]), 4),
+            'lng': round(float(lngs[i]), 4),
+            'micro': f'micro_{i % MICRO_REGIONS:02d}',
+            'macro': f'macro_{i % MICRO_REGIONS % MACRO_REGIONS:02d}'
+        }
+        for i in range(count)
+    ]
+
+
+def environment(size):
+    """Variáveis de ambiente do conjunto `size` (também usadas por subprocessos)"""
+    path = dataset_dir(size)
+    os.makedirs(path, exist_ok=True)
+    registry = os.path.join(path, 'municipios.csv')
+    if not os.path.exists(registry):
+        with open(registry, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, ['slug', 'name', 'ibge', 'population', 'lat', 'lng', 'micro', 'macro'])
+            writer.writeheader()
+            writer.writerows(synthetic_registry(max(0, size - 2)))
+    return {
+        'ARBOVIROSES_DATA_DIR': os.path.join(path, 'series'),
+        'ARBOVIROSES_MUNICIPALITIES': registry,
+        'ARBOVIROSES_INGEST_SOURCES': ''
+    }
+
+
+def activate(size):
+    """Aponta o processo atual para o conjunto `size`; retorna os municípios"""
+    if 'src.services.municipalities' in sys.modules:
+        raise RuntimeError('activate() deve rodar antes de importar src')
+    os.environ.update(environment(size))
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    from src.services.municipalities import MUNICIPALITIES
+    # O cadastro fixo tem dois municípios; o conjunto de 1 fica só com o primeiro
+    for slug in list(MUNICIPALITIES)[size:]:
+        del MUNICIPALITIES[slug]
+    return list(MUNICIPALITIES)
+
+
+def database_uri(size):
+    return f"sqlite:///{os.path.join(dataset_dir(size), 'app.db')}"
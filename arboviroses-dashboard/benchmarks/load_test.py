@@ -0,0 +1,179 @@
+"""Gerador de carga local: latência p50/p95/p99 e vazão por endpoint
+
+Sobe a aplicação em um servidor WSGI local (threads) sobre um conjunto
+sintético de 1, 100 ou 853 municípios e dispara requisições em laço
+fechado, sorteando o município de cada requisição com semente fixa.
+
+    python benchmarks/load_test.py --municipalities 1 100 853 --duration 10
+    python benchmarks/load_test.py --municipalities 100 --save-baseline
+    python benchmarks/load_test.py --municipalities 100 --compare
+
+As baselines ficam em benchmarks/baselines/load_<N>.json; com --compare,
+endpoints cujo p95 ou vazão pioraram mais que --tolerance são listados e
+o processo sai com código 1.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import datasets
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+ENDPOINTS = {
+    'dashboard-data': '/api/arboviroses/dashboard-data?municipality={m}',
+    'dashboard-bundle': '/api/arboviroses/dashboard-bundle?municipality={m}',
+    'historical-data': '/api/arboviroses/historical-data?municipality={m}',
+    'predictions': '/api/arboviroses/predictions/12?municipality={m}',
+    'statistics': '/api/arboviroses/statistics?municipality={m}',
+    'alerts': '/api/arboviroses/alerts?municipality={m}',
+    'data': '/api/data/{m}'
+}
+PERCENTILES = (50, 95, 99)
+
+
+def start_server(size):
+    """Servidor WSGI em thread sobre o conjunto `size`: (base_url, server)"""
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    municipalities = datasets.activate(size)
+    from src.main import create_app, preload
+    app = preload(create_app({'SQLALCHEMY_DATABASE_URI': datasets.database_uri(size)}))
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', server, municipalities
+
+
+def run_load(base_url, municipalities, duration, concurrency, seed=0):
+    """Laço fechado por cliente; retorna {endpoint: [latências em ms]}, erros"""
+    names = list(ENDPOINTS)
+    deadline = time.monotonic() + duration
+
+    def client(n):
+        rng = np.random.default_rng(seed + n)
+        latencies = {name: [] for name in names}
+        errors = done = 0
+        while time.monotonic() < deadline:
+            name = names[(n + done) % len(names)]
+            url = base_url + ENDPOINTS[name].format(m=municipalities[rng.integers(len(municipalities))])
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as r:
+                    r.read()
+                latencies[name].append((time.perf_counter() - started) * 1000)
+            except OSError:
+                errors += 1
+            done += 1
+        return latencies, errors
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    merged = {name: [v for latencies, _ in results for v in latencies[name]] for name in names}
+    return merged, sum(errors for _, errors in results)
+
+
+def summarize(latencies, duration):
+    report = {}
+    for name, values in latencies.items():
+        if not values:
+            continue
+        p = np.percentile(values, PERCENTILES)
+        report[name] = {
+            'requests': len(values),
+            'rps': round(len(values) / duration, 1),
+            **{f'p{q}': round(float(v), 2) for q, v in zip(PERCENTILES, p)}
+        }
+    return report
+
+
+def profile(size, duration, concurrency):
+    """Mede um conjunto no processo atual (cada tamanho exige um processo novo)"""
+    base_url, server, municipalities = start_server(size)
+    try:
+        run_load(base_url, municipalities, min(2, duration), concurrency, seed=1)  # aquecimento
+        latencies, errors = run_load(base_url, municipalities, duration, concurrency)
+    finally:
+        server.shutdown()
+    total = sum(len(v) for v in latencies.values())
+    return {
+        'municipalities': size,
+        'duration': duration,
+        'concurrency': concurrency,
+        'cpus': os.cpu_count(),
+        'requests': total,
+        'errors': errors,
+        'rps': round(total / duration, 1),
+        'endpoints': summarize(latencies, duration)
+    }
+
+
+def baseline_path(size):
+    return os.path.join(BASELINE_DIR, f'load_{size}.json')
+
+
+def compare(result, baseline, tolerance):
+    """Endpoints com p95 ou vazão piores que a baseline além da tolerância"""
+    regressions = []
+    for name, current in result['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            continue
+        if current['p95'] > before['p95'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95']} -> {current['p95']} ms")
+        if current['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {before['rps']} -> {current['rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--municipalities', type=int, nargs='+', default=list(datasets.SIZES),
+                        choices=datasets.SIZES)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(profile(args.municipalities[0], args.duration, args.concurrency)))
+        return
+
+    results, failed = [], False
+    for size in args.municipalities:
+        # Um processo por tamanho: o cadastro de municípios é lido na importação
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', '--municipalities', str(size),
+             '--duration', str(args.duration), '--concurrency', str(args.concurrency)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+
+        if args.compare and os.path.exists(baseline_path(size)):
+            with open(baseline_path(size)) as f:
+                result['regressions'] = compare(result, json.load(f), args.tolerance)
+            failed = failed or bool(result['regressions'])
+        if args.save_baseline:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(baseline_path(size), 'w') as f:
+                json.dump(result, f, indent=2)
+
+    print(json.dumps(results, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
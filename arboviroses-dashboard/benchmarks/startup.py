@@ -0,0 +1,147 @@
+"""Tempo de partida de um worker: importação e create_app() por motor
+
+Cada execução é um processo novo com `python -X importtime`, que importa
+src.main e cria a aplicação com o motor escolhido (ARBOVIROSES_ENGINE). O
+relatório traz a mediana dos tempos e os módulos de maior tempo
+cumulativo, no formato do -X importtime.
+
+    python benchmarks/startup.py --engine simple full --runs 5
+    python benchmarks/startup.py --save-baseline
+    python benchmarks/startup.py --compare --budget 1.0
+
+As baselines ficam em benchmarks/baselines/startup_<motor>.json; com
+--compare, o processo sai com código 1 se a partida piorou mais que
+--tolerance ou passou do orçamento --budget (segundos).
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+import datasets
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+ENGINES = ('simple', 'full')
+# Conjunto usado na medição (a partida não depende do número de municípios)
+SIZE = 1
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+from src.main import create_app
+imported = time.perf_counter()
+create_app({{'SQLALCHEMY_DATABASE_URI': {uri!r}}})
+created = time.perf_counter()
+print(json.dumps({{'import': imported - started, 'create_app': created - imported}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Linhas do -X importtime: [(módulo, self_us, cumulativo_us, profundidade)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative), depth))
+    return modules
+
+
+def measure(engine):
+    """Uma partida em processo novo: tempos (s) e módulos importados"""
+    env = dict(os.environ, **datasets.environment(SIZE), ARBOVIROSES_ENGINE=engine)
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD.format(uri=datasets.database_uri(SIZE))],
+        cwd=datasets.ROOT, env=env, check=True, capture_output=True, text=True
+    )
+    timings = json.loads(output.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(output.stderr)
+
+
+def profile(engine, runs, top):
+    measure(engine)  # aquecimento: .pyc e cache de disco
+    samples, slowest = [], {}
+    for _ in range(runs):
+        timings, modules = measure(engine)
+        samples.append(timings)
+        for name, _, cumulative, _ in modules:
+            slowest.setdefault(name, []).append(cumulative)
+
+    median = {key: statistics.median(s[key] for s in samples) for key in ('import', 'create_app')}
+    ranked = sorted(slowest.items(), key=lambda item: -statistics.median(item[1]))[:top]
+    return {
+        'engine': engine,
+        'runs': runs,
+        'import_s': round(median['import'], 4),
+        'create_app_s': round(median['create_app'], 4),
+        'boot_s': round(median['import'] + median['create_app'], 4),
+        'modules': [{'module': name, 'cumulative_ms': round(statistics.median(v) / 1000, 1)}
+                    for name, v in ranked]
+    }
+
+
+def format_report(result):
+    lines = [f"{result['engine']}: boot {result['boot_s'] * 1000:.0f} ms "
+             f"(import {result['import_s'] * 1000:.0f} ms, create_app {result['create_app_s'] * 1000:.0f} ms)",
+             '    cumulativo [ms] | módulo']
+    lines += [f"{m['cumulative_ms']:>19.1f} | {m['module']}" for m in result['modules']]
+    return '\n'.join(lines)
+
+
+def baseline_path(engine):
+    return os.path.join(BASELINE_DIR, f'startup_{engine}.json')
+
+
+def compare(result, baseline, tolerance, budget):
+    regressions = []
+    if baseline is not None and result['boot_s'] > baseline['boot_s'] * (1 + tolerance):
+        regressions.append(f"{result['engine']}: boot {baseline['boot_s']} -> {result['boot_s']} s")
+    if budget is not None and result['boot_s'] > budget:
+        regressions.append(f"{result['engine']}: boot {result['boot_s']} s acima do orçamento de {budget} s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engine', nargs='+', default=list(ENGINES), choices=ENGINES)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--budget', type=float, default=None)
+    parser.add_argument('--json', action='store_true', help='saída em JSON')
+    args = parser.parse_args()
+
+    results, failed = [], False
+    for engine in args.engine:
+        result = profile(engine, args.runs, args.top)
+        results.append(result)
+        baseline = None
+        if args.compare and os.path.exists(baseline_path(engine)):
+            with open(baseline_path(engine)) as f:
+                baseline = json.load(f)
+        if baseline is not None or args.budget is not None:
+            result['regressions'] = compare(result, baseline, args.tolerance, args.budget)
+            failed = failed or bool(result['regressions'])
+        if args.save_baseline:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(baseline_path(engine), 'w') as f:
+                json.dump(result, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(format_report(result))
+            for regression in result.get('regressions', []):
+                print(f'  REGRESSÃO {regression}')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
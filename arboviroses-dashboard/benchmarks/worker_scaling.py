@@ -0,0 +1,103 @@
+"""Perfil de carga: requisições/s em função do número de workers
+
+Sobe o gunicorn (gunicorn.conf.py) com 1, 2, 4... workers e dispara
+requisições concorrentes contra os endpoints do dashboard.
+
+    python benchmarks/worker_scaling.py --workers 1 2 4 --duration 10
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = [
+    '/api/arboviroses/dashboard-data',
+    '/api/arboviroses/historical-data',
+    '/api/arboviroses/predictions/12',
+    '/api/arboviroses/statistics',
+    '/api/data/teofilo_otoni'
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/api/arboviroses/health', timeout=2) as r:
+                if r.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_load(base_url, duration, concurrency):
+    """Dispara requisições em laço fechado e retorna (total, erros)"""
+    deadline = time.monotonic() + duration
+
+    def client(n):
+        done = errors = 0
+        while time.monotonic() < deadline:
+            url = base_url + ENDPOINTS[(n + done) % len(ENDPOINTS)]
+            try:
+                with urllib.request.urlopen(url, timeout=10) as r:
+                    r.read()
+            except OSError:
+                errors += 1
+            done += 1
+        return done, errors
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def profile(workers, duration, concurrency, threads):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG='/dev/null')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'src.wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        if not wait_ready(base_url):
+            raise RuntimeError('gunicorn não ficou pronto a tempo')
+        run_load(base_url, 1, concurrency)  # aquecimento
+        total, errors = run_load(base_url, duration, concurrency)
+        return {'workers': workers, 'requests': total, 'errors': errors,
+                'rps': round(total / duration, 1)}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    results = [profile(w, args.duration, args.concurrency, args.threads) for w in args.workers]
+    print(json.dumps({'cpus': os.cpu_count(), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
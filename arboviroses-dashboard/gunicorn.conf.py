@@ -0,0 +1,68 @@
+"""Configuração do gunicorn para produção
+
+    gunicorn -c gunicorn.conf.py src.wsgi:app
+
+Com preload_app, a aplicação é criada no processo mestre e os modelos e
+séries são carregados antes do fork; os workers herdam essa memória em
+copy-on-write. Recarga sem queda: `kill -HUP <pid do mestre>` substitui os
+workers gradualmente (para recarregar o código, use USR2 + WINCH/QUIT).
+
+O /stream (SSE) mantém conexões abertas, por isso o worker padrão é o
+gevent: cada conexão vira uma greenlet e um worker atende até
+worker_connections. O monkey-patch do gevent precisa acontecer antes de a
+aplicação ser importada, o que é feito aqui. Com
+GUNICORN_WORKER_CLASS=gthread cada stream ocupa uma thread, e cada worker
+aceita no máximo GUNICORN_THREADS - 1 deles (ARBOVIROSES_MAX_STREAMS),
+respondendo 503 acima disso.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5001')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+# O limite de streams da aplicação depende do worker escolhido
+os.environ['GUNICORN_WORKER_CLASS'] = worker_class
+if worker_class == 'gevent':
+    # Antes do preload: threads, filas e sockets da aplicação já nascem cooperativos
+    from gevent import monkey
+    monkey.patch_all()
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 5000))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+if preload_app:
+    # A inicialização roda no mestre; a ingestão só parte nos workers (post_worker_init)
+    os.environ['ARBOVIROSES_INGEST_IN_WORKERS'] = '1'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recicla workers periodicamente, com jitter para não reiniciarem juntos
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    """Com preload, aguarda modelos e séries antes de criar os workers"""
+    if preload_app:
+        from src.main import preload
+        from src.wsgi import app
+        preload(app)
+        server.log.info('Sistemas pré-carregados no processo mestre')
+
+
+def pre_fork(server, worker):
+    # Congela os objetos já alocados para o GC não tocá-los nos workers,
+    # preservando as páginas compartilhadas em copy-on-write
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Agendador de ingestão no worker, após o fork; o lock de ingestão elege um"""
+    from src.services import ingestion
+    ingestion.start_in_worker()
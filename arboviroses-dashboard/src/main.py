@@ -1,46 +1,85 @@
 import os
 import sys
+import threading
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
-from src.models.user import db
+from src.models.user import db, engine_options
+from src.routes.arboviroses import arboviroses_bp
 from src.routes.user import user_bp
-from src.routes.arboviroses_simple import arboviroses_bp
+from src.routes.series import series_bp
+from src.services import metrics, profiler, static_assets
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+def init_database(app):
+    """Registra o banco; as tabelas são criadas no preload ou na primeira requisição"""
+    db.init_app(app)
+    lock = threading.Lock()
+    created = threading.Event()
 
-# Habilitar CORS para permitir requisições do frontend
-CORS(app)
+    def ensure_tables():
+        if created.is_set():
+            return
+        with lock:
+            if not created.is_set():
+                with app.app_context():
+                    db.create_all()
+                created.set()
 
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(arboviroses_bp, url_prefix='/api/arboviroses')
+    app.before_request(ensure_tables)
+    app.extensions['ensure_tables'] = ensure_tables
 
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
+def create_app(config=None):
+    """Cria e configura a aplicação Flask"""
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    # uncomment if you need to use database
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['ARBOVIROSES_ENGINE'] = os.environ.get('ARBOVIROSES_ENGINE', 'simple')
+    app.config.update(config or {})
+    # WAL e pool de conexões para o SQLite em arquivo
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    # Habilitar CORS para permitir requisições do frontend
+    CORS(app)
+
+    # /metrics e ?profile=1 (administradores)
+    metrics.init_app(app)
+    profiler.init_app(app)
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    # ARBOVIROSES_ENGINE escolhe o motor (src.services.engines)
+    app.register_blueprint(arboviroses_bp, url_prefix='/api/arboviroses')
+    app.register_blueprint(series_bp, url_prefix='/api')
+
+    init_database(app)
+
+    # Estáticos com hash e pré-comprimidos; fallback da SPA em memória
+    static_assets.init_app(app)
+
+    return app
+
+
+def preload(app, timeout=120):
+    """Aguarda a inicialização dos sistemas registrados na aplicação
+
+    Usado antes do fork dos workers: modelos e séries carregados no processo
+    mestre passam a ser compartilhados (copy-on-write) por todos os workers.
+    """
+    if 'ensure_tables' in app.extensions:
+        app.extensions['ensure_tables']()
+    for lifecycle in app.extensions.get('lifecycles', []):
+        lifecycle.start()
+        if not lifecycle.wait(timeout):
+            print(f"Inicialização de {lifecycle.name} excedeu {timeout}s")
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Servidor de desenvolvimento; em produção use: gunicorn -c gunicorn.conf.py src.wsgi:app
+    create_app().run(host='0.0.0.0', port=int(os.environ.get('PORT', 5001)),
+                     debug=os.environ.get('FLASK_DEBUG', '0') == '1')
@@ -0,0 +1,55 @@
+from src.models.user import db
+
+# Nível numérico de cada classe de risco (usado para ordenar e agregar)
+RISK_RANK = {'baixo': 0, 'medio': 1, 'alto': 2}
+RISK_NAMES = {rank: name for name, rank in RISK_RANK.items()}
+
+class Alert(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.String(120), unique=True, nullable=False)
+    municipality = db.Column(db.String(80), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    risk_level = db.Column(db.String(20), nullable=False)
+    alert_level = db.Column(db.Integer, nullable=False, default=0)
+    diseases = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='ativo')
+
+    __table_args__ = (
+        db.Index('ix_alert_municipality_timestamp_risk', 'municipality', 'timestamp', 'risk_level'),
+        db.Index('ix_alert_timestamp', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f'<Alert {self.alert_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.alert_id,
+            'municipality': self.municipality,
+            'timestamp': self.timestamp.isoformat(),
+            'risk_level': self.risk_level,
+            'alert_level': self.alert_level,
+            'diseases': self.diseases,
+            'status': self.status
+        }
+
+class AlertStatus(db.Model):
+    """Resumo materializado dos alertas recentes de um município"""
+    municipality = db.Column(db.String(80), primary_key=True)
+    recent_alerts_count = db.Column(db.Integer, nullable=False, default=0)
+    highest_recent_level = db.Column(db.Integer, nullable=False, default=0)
+    last_alert_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<AlertStatus {self.municipality}>'
+
+    def to_dict(self):
+        return {
+            'system_active': True,
+            'municipality': self.municipality,
+            'recent_alerts_count': self.recent_alerts_count,
+            'highest_recent_risk': RISK_NAMES.get(self.highest_recent_level, 'baixo'),
+            'last_alert_at': self.last_alert_at.isoformat() if self.last_alert_at else None,
+            'updated_at': self.updated_at.isoformat()
+        }
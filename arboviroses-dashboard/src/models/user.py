@@ -1,7 +1,45 @@
+import os
+import sqlite3
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
 
 db = SQLAlchemy()
 
+# Pool de conexões do SQLite em arquivo (por processo)
+POOL_SIZE = int(os.environ.get('ARBOVIROSES_DB_POOL_SIZE', 10))
+POOL_OVERFLOW = int(os.environ.get('ARBOVIROSES_DB_POOL_OVERFLOW', 10))
+POOL_TIMEOUT = 10
+# Espera por um lock de escrita antes de falhar (ms)
+BUSY_TIMEOUT_MS = 5000
+
+
+def engine_options(uri):
+    """Opções do engine: pool dimensionado para os threads dos workers no SQLite em arquivo"""
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return {}
+    return {
+        'pool_size': POOL_SIZE,
+        'max_overflow': POOL_OVERFLOW,
+        'pool_timeout': POOL_TIMEOUT,
+        'connect_args': {'timeout': BUSY_TIMEOUT_MS / 1000, 'check_same_thread': False}
+    }
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL: leitores não bloqueiam o escritor; synchronous=NORMAL basta com WAL"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    cursor.close()
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -1,367 +1,320 @@
-import os
-import sys
-import json
-from datetime import datetime, timedelta
-from flask import Blueprint, jsonify, request
-import pandas as pd
-import numpy as np
-
-# Adicionar o diretório pai para importar módulos do projeto principal
-project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-sys.path.insert(0, project_root)
-
-try:
-    from src.models import ArbovirusMLModels
-    from src.collectors import RealDataCollector
-    from src.preprocessor import RealDataPreprocessor
-    from src.alerts import AlertSystem
-except ImportError as e:
-    print(f"Erro ao importar módulos: {e}")
-    # Fallback para desenvolvimento
-    ArbovirusMLModels = None
-    RealDataCollector = None
-    RealDataPreprocessor = None
-    AlertSystem = None
+import time
+from datetime import datetime
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from src.services.admission import coalesced
+from src.services.alert_store import current_status, list_alerts, parse_alert_args
+from src.services.climate_correlation import correlation_payload, MAX_LAG
+from src.services.event_stream import StreamLimit, broker, format_event
+from src.services.engines import load_engine
+from src.services.lifecycle import requires_ready, READY, DEGRADED, STARTING, WARMING, FAILED
+from src.services.municipalities import MUNICIPALITIES
+from src.services.panels import (
+    PanelContext, build_bundle, bundle_response, dashboard_panel, parse_panels, predictions_table,
+    statistics_panel, statistics_version
+)
+from src.services.risk_map import get_region_table, parse_bbox, risk_map_version
+from src.services.rollup import UnknownRegion, parse_statistics_args, region_summary
+from src.services.risk_scoring import sync_alerts
+from src.services.response_cache import cached_response
+from src.services.serialization import NotAcceptable, negotiate_format, table_response
+from src.services.series_engine import MAX_HORIZON
+from src.services.weekly_store import data_version, historical_table, parse_history_args
 
 arboviroses_bp = Blueprint('arboviroses', __name__)
 
-# Instâncias globais dos sistemas
-ml_system = None
-collector = None
-preprocessor = None
-alert_system = None
+# Status do /health por estado do lifecycle
+HEALTH_STATUS = {
+    READY: 'healthy',
+    DEGRADED: 'degraded',
+    STARTING: 'warming',
+    WARMING: 'warming',
+    FAILED: 'unhealthy'
+}
 
-def initialize_systems():
-    """Inicializa os sistemas se ainda não foram inicializados"""
-    global ml_system, collector, preprocessor, alert_system
-    
-    try:
-        if ArbovirusMLModels and ml_system is None:
-            ml_system = ArbovirusMLModels()
-            # Tentar carregar modelos existentes
-            ml_system.load_models()
-        
-        if RealDataCollector and collector is None:
-            collector = RealDataCollector()
-        
-        if RealDataPreprocessor and preprocessor is None:
-            preprocessor = RealDataPreprocessor()
-        
-        if AlertSystem and alert_system is None:
-            alert_system = AlertSystem()
-            
-    except Exception as e:
-        print(f"Erro ao inicializar sistemas: {e}")
+def current_engine():
+    """Motor escolhido por ARBOVIROSES_ENGINE para a aplicação atual"""
+    return current_app.extensions['arboviroses_engine']
+
+def current_lifecycle():
+    return current_engine().lifecycle
+
+@arboviroses_bp.record
+def start_lifecycle(state):
+    """Dispara a inicialização em segundo plano do motor ao registrar o blueprint"""
+    engine = load_engine(state.app.config['ARBOVIROSES_ENGINE'])
+    state.app.extensions['arboviroses_engine'] = engine
+    engine.lifecycle.attach(state.app)
+    broker.init_app(state.app)
+
+def panel_context(municipality):
+    """Contexto dos painéis com os modelos residentes"""
+    return PanelContext(municipality, model_cache=current_engine().model_cache)
 
 @arboviroses_bp.route('/dashboard-data')
+@requires_ready(current_lifecycle)
+@coalesced
 def get_dashboard_data():
-    """Retorna dados principais para o dashboard"""
+    """Retorna dados principais para o dashboard (?municipality= opcional)"""
+    municipality = request.args.get('municipality', 'teofilo_otoni')
+    if municipality not in MUNICIPALITIES:
+        return jsonify({'error': f'Município desconhecido: {municipality}'}), 404
+
     try:
-        initialize_systems()
-        
-        # Dados simulados para demonstração
-        current_date = datetime.now()
-        
-        # Casos atuais (última semana)
-        current_cases = {
-            'dengue': 28,
-            'zika': 12,
-            'chikungunya': 8,
-            'febre_amarela': 2
-        }
-        
-        # Predições para próximas 4 semanas
-        predictions = {
-            'dengue': [30, 35, 42, 38],
-            'zika': [14, 16, 18, 15],
-            'chikungunya': [10, 12, 15, 13],
-            'febre_amarela': [3, 4, 5, 4]
-        }
-        
-        # Dados climáticos atuais
-        climate_data = {
-            'temperatura': 26.5,
-            'umidade': 78,
-            'precipitacao': 15.2,
-            'vento': 12.3
-        }
+        return jsonify(dashboard_panel(panel_context(municipality)))
         
-        # Nível de alerta
-        if alert_system:
-            risk_assessment = alert_system.assess_risk_level(current_cases)
-            alert_level = risk_assessment.get('overall_risk', 'baixo')
-            recommendations = risk_assessment.get('recommendations', [])
-        else:
-            alert_level = 'medio'
-            recommendations = [
-                "⚡ ALERTA MÉDIO: Manter vigilância ativa",
-                "🔍 Intensificar monitoramento epidemiológico"
-            ]
-        
-        dashboard_data = {
-            'timestamp': current_date.isoformat(),
-            'current_cases': current_cases,
-            'predictions': predictions,
-            'climate': climate_data,
-            'alert_level': alert_level,
-            'recommendations': recommendations,
-            'total_cases_week': sum(current_cases.values()),
-            'trend': 'increasing'  # ou 'decreasing', 'stable'
-        }
-        
-        return jsonify(dashboard_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@arboviroses_bp.route('/dashboard-bundle')
+@requires_ready(current_lifecycle)
+def get_dashboard_bundle():
+    """Retorna todos os painéis do dashboard em uma única resposta
+
+    Os painéis são calculados em paralelo a partir dos mesmos resultados
+    intermediários. ?panels=dashboard,alerts,... limita o conjunto; a duração
+    de cada painel vai no cabeçalho Server-Timing.
+    """
+    municipality = request.args.get('municipality', 'teofilo_otoni')
+    if municipality not in MUNICIPALITIES:
+        return jsonify({'error': f'Município desconhecido: {municipality}'}), 404
+    try:
+        names = parse_panels(request.args.get('panels'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        started = time.perf_counter()
+        payload, timings = build_bundle(panel_context(municipality), current_app._get_current_object(), names)
+        return bundle_response(payload, timings, (time.perf_counter() - started) * 1000)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @arboviroses_bp.route('/historical-data')
+@requires_ready(current_lifecycle)
+@cached_response(data_version)
+@coalesced
 def get_historical_data():
-    """Retorna dados históricos para gráficos"""
+    """Retorna dados históricos para gráficos
+
+    Filtros opcionais: ?from=YYYY-MM-DD&to=YYYY-MM-DD&disease=dengue,zika&municipality=
+    Formato: ?format=json|columnar|arrow|parquet ou cabeçalho Accept.
+    """
     try:
-        # Gerar dados históricos simulados para os últimos 12 meses
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        
-        dates = pd.date_range(start=start_date, end=end_date, freq='W')
-        
-        historical_data = []
-        
-        for i, date in enumerate(dates):
-            week_of_year = date.isocalendar()[1]
-            
-            # Padrão sazonal para dengue (pico no verão)
-            dengue_seasonal = 20 + 15 * np.sin(2 * np.pi * (week_of_year - 10) / 52)
-            dengue_cases = max(0, dengue_seasonal + np.random.normal(0, 5))
-            
-            # Zika com padrão diferente
-            zika_cases = max(0, 8 + 5 * np.sin(2 * np.pi * (week_of_year - 5) / 52) + np.random.normal(0, 2))
-            
-            # Chikungunya
-            chik_cases = max(0, 6 + 4 * np.sin(2 * np.pi * (week_of_year - 15) / 52) + np.random.normal(0, 2))
-            
-            # Febre amarela (mais rara)
-            fa_cases = max(0, 1 + 2 * np.sin(2 * np.pi * (week_of_year - 8) / 52) + np.random.normal(0, 1))
-            
-            historical_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'dengue': int(dengue_cases),
-                'zika': int(zika_cases),
-                'chikungunya': int(chik_cases),
-                'febre_amarela': int(fa_cases)
-            })
-        
-        return jsonify(historical_data)
+        query = parse_history_args(request.args)
+        fmt = negotiate_format()
+    except NotAcceptable as e:
+        return jsonify({'error': str(e)}), 406
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        dates, columns = historical_table(
+            query['municipality'], query['start'], query['end'], query['diseases']
+        )
+        return table_response(dates, columns, fmt)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @arboviroses_bp.route('/climate-correlation')
+@requires_ready(current_lifecycle)
+@cached_response(data_version)
 def get_climate_correlation():
-    """Retorna dados de correlação climática"""
+    """Retorna correlações defasadas entre clima e casos
+
+    ?municipality= e ?lag=0..8 opcionais; sem `lag`, usa a defasagem de maior |r|.
+    """
+    municipality = request.args.get('municipality', 'teofilo_otoni')
+    lag = request.args.get('lag')
+    if municipality not in MUNICIPALITIES:
+        return jsonify({'error': f'Município desconhecido: {municipality}'}), 404
+    if lag is not None and not (lag.isdigit() and int(lag) <= MAX_LAG):
+        return jsonify({'error': f"'lag' deve estar entre 0 e {MAX_LAG}"}), 400
+
     try:
-        # Dados simulados de correlação
-        correlation_data = {
-            'temperature_correlation': {
-                'dengue': 0.72,
-                'zika': 0.68,
-                'chikungunya': 0.65,
-                'febre_amarela': 0.45
-            },
-            'humidity_correlation': {
-                'dengue': 0.58,
-                'zika': 0.62,
-                'chikungunya': 0.55,
-                'febre_amarela': 0.38
-            },
-            'precipitation_correlation': {
-                'dengue': 0.45,
-                'zika': 0.42,
-                'chikungunya': 0.48,
-                'febre_amarela': 0.25
-            }
-        }
-        
+        correlation_data = correlation_payload(municipality, None if lag is None else int(lag))
         return jsonify(correlation_data)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @arboviroses_bp.route('/risk-map')
+@requires_ready(current_lifecycle)
+@cached_response(risk_map_version)
 def get_risk_map():
-    """Retorna dados para o mapa de risco"""
+    """Retorna dados para o mapa de risco
+
+    Filtros opcionais: ?municipality=, ?bbox=minLng,minLat,maxLng,maxLat e
+    ?format=geojson. Sem filtros, retorna os bairros de Teófilo Otoni.
+    """
     try:
-        # Dados simulados para diferentes bairros/regiões de Teófilo Otoni
-        risk_map_data = [
-            {
-                'region': 'Centro',
-                'lat': -17.8644,
-                'lng': -41.5056,
-                'risk_level': 'alto',
-                'cases': 45,
-                'population': 15000
-            },
-            {
-                'region': 'Altino Barbosa',
-                'lat': -17.8700,
-                'lng': -41.5100,
-                'risk_level': 'medio',
-                'cases': 28,
-                'population': 12000
-            },
-            {
-                'region': 'São Jacinto',
-                'lat': -17.8600,
-                'lng': -41.5000,
-                'risk_level': 'baixo',
-                'cases': 12,
-                'population': 8000
-            },
-            {
-                'region': 'Grão Pará',
-                'lat': -17.8750,
-                'lng': -41.5150,
-                'risk_level': 'medio',
-                'cases': 32,
-                'population': 10000
-            },
-            {
-                'region': 'Vila Solidária',
-                'lat': -17.8580,
-                'lng': -41.4980,
-                'risk_level': 'alto',
-                'cases': 38,
-                'population': 9000
-            }
-        ]
+        bbox = parse_bbox(request.args['bbox']) if request.args.get('bbox') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    municipality = request.args.get('municipality', None if bbox else 'teofilo_otoni')
+
+    try:
+        regions = get_region_table()
+        idx = regions.select(municipality, bbox)
+        
+        if request.args.get('format') == 'geojson':
+            response = jsonify(regions.features(idx))
+            response.mimetype = 'application/geo+json'
+            return response
         
-        return jsonify(risk_map_data)
+        return jsonify(regions.records(idx))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@arboviroses_bp.route('/risk-map/tiles/<int:z>/<int:x>/<int:y>.geojson')
+@requires_ready(current_lifecycle)
+@cached_response(risk_map_version, ttl=3600)
+def get_risk_map_tile(z, x, y):
+    """Retorna um tile GeoJSON (XYZ) com as regiões visíveis"""
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'error': 'Tile inválido'}), 400
+
+    try:
+        response = jsonify(get_region_table().tile(z, x, y))
+        response.mimetype = 'application/geo+json'
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @arboviroses_bp.route('/predictions/<int:weeks>')
+@requires_ready(current_lifecycle)
+@coalesced
 def get_predictions(weeks):
-    """Retorna predições para N semanas"""
+    """Retorna predições para N semanas (?municipality= opcional)
+
+    Formato: ?format=json|columnar|arrow|parquet ou cabeçalho Accept.
+    """
+    municipality = request.args.get('municipality', 'teofilo_otoni')
+    if municipality not in MUNICIPALITIES:
+        return jsonify({'error': f'Município desconhecido: {municipality}'}), 404
+    if not 1 <= weeks <= MAX_HORIZON:
+        return jsonify({'error': f'Horizonte deve estar entre 1 e {MAX_HORIZON} semanas'}), 400
     try:
-        initialize_systems()
-        
-        if weeks > 12:
-            weeks = 12  # Limitar a 12 semanas
-        
-        # Se o sistema ML estiver disponível, usar predições reais
-        if ml_system and hasattr(ml_system, 'trained_models') and ml_system.trained_models:
-            # Aqui seria implementada a predição real
-            # Por simplicidade, usar dados simulados
-            pass
-        
-        # Gerar predições simuladas
-        predictions = []
-        base_cases = {'dengue': 25, 'zika': 12, 'chikungunya': 8, 'febre_amarela': 2}
-        
-        for week in range(1, weeks + 1):
-            week_pred = {}
-            for disease, base in base_cases.items():
-                # Adicionar variação sazonal e aleatória
-                seasonal_factor = 1 + 0.3 * np.sin(2 * np.pi * week / 52)
-                random_factor = 1 + np.random.normal(0, 0.2)
-                week_pred[disease] = max(0, int(base * seasonal_factor * random_factor))
-            
-            predictions.append({
-                'week': week,
-                'date': (datetime.now() + timedelta(weeks=week)).strftime('%Y-%m-%d'),
-                **week_pred
-            })
-        
-        return jsonify(predictions)
+        fmt = negotiate_format()
+    except NotAcceptable as e:
+        return jsonify({'error': str(e)}), 406
+
+    try:
+        # Modelos treinados quando disponíveis; senão, previsão sazonal
+        dates, columns = predictions_table(panel_context(municipality), weeks)
+        return table_response(dates, columns, fmt)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @arboviroses_bp.route('/alerts')
+@requires_ready(current_lifecycle)
 def get_alerts():
-    """Retorna alertas ativos e histórico"""
+    """Retorna alertas do histórico persistido, paginados por cursor"""
     try:
-        initialize_systems()
+        try:
+            params = parse_alert_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if alert_system:
-            # Obter alertas reais do sistema
-            recent_alerts = alert_system.get_alert_history(30)
-            status = alert_system.get_current_status()
-        else:
-            # Dados simulados
-            recent_alerts = [
-                {
-                    'id': 'alert_20250807_090000',
-                    'timestamp': datetime.now().isoformat(),
-                    'risk_level': 'medio',
-                    'alert_level': 1,
-                    'diseases': {
-                        'dengue': {'predicted_cases': 35, 'risk_level': 'medio'}
-                    },
-                    'status': 'ativo'
-                }
-            ]
-            status = {
-                'system_active': True,
-                'recent_alerts_count': 1,
-                'highest_recent_risk': 'medio'
-            }
+        # Grava os alertas da avaliação em lote, se a série mudou; o resto é consulta
+        sync_alerts()
+        recent_alerts, next_cursor = list_alerts(**params)
         
         return jsonify({
             'recent_alerts': recent_alerts,
-            'system_status': status
+            'system_status': current_status(params['municipality']),
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@arboviroses_bp.route('/stream')
+@requires_ready(current_lifecycle)
+def stream_events():
+    """Canal SSE do município: snapshot inicial e, depois, só as mudanças
+
+    Eventos: `snapshot` e `cases` (semanas recentes de casos e clima),
+    `status` (resumo dos alertas) e `alert` (novo alerta gravado).
+    """
+    municipality = request.args.get('municipality', 'teofilo_otoni')
+    if municipality not in MUNICIPALITIES:
+        return jsonify({'error': f'Município desconhecido: {municipality}'}), 404
+    
+    try:
+        subscription = broker.subscribe(municipality)
+    except StreamLimit as e:
+        return broker.limit_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    try:
+        initial = [
+            broker.snapshot(municipality),
+            format_event('status', current_status(municipality))
+        ]
+    except Exception as e:
+        broker.unsubscribe(subscription)
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            yield from initial
+            yield from subscription.messages()
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @arboviroses_bp.route('/statistics')
+@requires_ready(current_lifecycle)
+@cached_response(statistics_version)
 def get_statistics():
-    """Retorna estatísticas gerais do sistema"""
+    """Retorna estatísticas gerais do sistema (?municipality= opcional)
+
+    Drill-down no cubo de agregados: ?level=municipality|micro|macro|state&region=
+    """
     try:
-        # Estatísticas simuladas
-        stats = {
-            'total_cases_year': 1247,
-            'total_cases_month': 156,
-            'most_affected_disease': 'dengue',
-            'prediction_accuracy': 0.78,
-            'data_sources': 3,
-            'last_update': datetime.now().isoformat(),
-            'coverage_area': 'Teófilo Otoni - MG',
-            'population_monitored': 140000,
-            'active_alerts': 2,
-            'model_performance': {
-                'dengue': 0.82,
-                'zika': 0.75,
-                'chikungunya': 0.73,
-                'febre_amarela': 0.68
-            }
-        }
-        
-        return jsonify(stats)
+        drill_down = parse_statistics_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    municipality = request.args.get('municipality', 'teofilo_otoni')
+    if drill_down is None and municipality not in MUNICIPALITIES:
+        return jsonify({'error': f'Município desconhecido: {municipality}'}), 404
+
+    try:
+        if drill_down is not None:
+            return jsonify(region_summary(**drill_down))
+        return jsonify(statistics_panel(panel_context(municipality)))
         
+    except UnknownRegion as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @arboviroses_bp.route('/health')
 def health_check():
-    """Endpoint de verificação de saúde da API"""
+    """Endpoint de verificação de saúde da API (liveness e readiness)"""
     try:
-        initialize_systems()
-        
+        lifecycle = current_lifecycle()
+        status = lifecycle.status()
         health_status = {
-            'status': 'healthy',
+            'status': HEALTH_STATUS.get(lifecycle.state, 'unhealthy'),
             'timestamp': datetime.now().isoformat(),
-            'services': {
-                'ml_system': ml_system is not None,
-                'data_collector': collector is not None,
-                'preprocessor': preprocessor is not None,
-                'alert_system': alert_system is not None
-            },
+            **status,
             'version': '1.0.0'
         }
         
-        return jsonify(health_status)
+        return jsonify(health_status), 200 if lifecycle.is_ready else 503
         
     except Exception as e:
         return jsonify({
@@ -370,3 +323,7 @@ def health_check():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@arboviroses_bp.route('/health/live')
+def liveness_check():
+    """Liveness: o processo responde, mesmo durante a inicialização"""
+    return jsonify({'liveness': 'alive', 'readiness': current_lifecycle().state})
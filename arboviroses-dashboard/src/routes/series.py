@@ -0,0 +1,81 @@
+from flask import Blueprint, jsonify, request
+import numpy as np
+
+from src.services.municipalities import MUNICIPALITIES
+from src.services.series_engine import get_series_engine, MAX_HORIZON
+from src.services.weekly_store import week_dates
+
+series_bp = Blueprint('series', __name__)
+
+# Limite de municípios por requisição em lote
+MAX_BATCH = 1000
+
+
+@series_bp.route('/data/<city>')
+def get_city_data(city):
+    """Retorna a série semanal (casos e temperatura) de um município"""
+    if city not in MUNICIPALITIES:
+        return jsonify({'error': f'Município desconhecido: {city}'}), 404
+
+    try:
+        weeks = min(int(request.args.get('weeks', 104)), 520)
+    except ValueError:
+        return jsonify({'error': "'weeks' deve ser um inteiro"}), 400
+    if weeks < 1:
+        return jsonify({'error': "'weeks' deve ser positivo"}), 400
+
+    try:
+        engine = get_series_engine()
+        return jsonify({
+            'city': city,
+            'name': MUNICIPALITIES[city]['name'],
+            'data': engine.series(city, weeks)
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@series_bp.route('/predict', methods=['POST'])
+def predict():
+    """Previsão de casos para um município ({city}) ou vários ({cities: [...]})"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'O corpo deve ser um objeto JSON'}), 400
+    batch = 'cities' in data
+    cities = data.get('cities') if batch else [data['city']] if data.get('city') else None
+
+    if not isinstance(cities, list) or not cities or not all(isinstance(c, str) for c in cities):
+        return jsonify({'error': "Informe 'city' ou uma lista em 'cities'"}), 400
+    if len(cities) > MAX_BATCH:
+        return jsonify({'error': f'Máximo de {MAX_BATCH} municípios por requisição'}), 400
+    unknown = [c for c in cities if c not in MUNICIPALITIES]
+    if unknown:
+        return jsonify({'error': f"Município desconhecido: {', '.join(map(str, unknown))}"}), 404
+
+    try:
+        horizon = int(data.get('weeks', MAX_HORIZON))
+        last_weeks = int(data.get('last_weeks', 12))
+    except (TypeError, ValueError):
+        return jsonify({'error': "'weeks' e 'last_weeks' devem ser inteiros"}), 400
+    if not 1 <= horizon <= MAX_HORIZON:
+        return jsonify({'error': f"'weeks' deve estar entre 1 e {MAX_HORIZON}"}), 400
+    if last_weeks < 1:
+        return jsonify({'error': "'last_weeks' deve ser positivo"}), 400
+
+    try:
+        engine = get_series_engine()
+        first, forecast = engine.forecast(cities, horizon, last_weeks)
+        dates = week_dates(first, forecast.shape[1])
+        values = np.rint(forecast).astype(int).tolist()
+
+        results = {
+            city: {'city': city, 'dates': dates, 'prediction_weeks': values[i]}
+            for i, city in enumerate(cities)
+        }
+        if batch:
+            return jsonify({'predictions': results, 'last_weeks': last_weeks})
+        return jsonify({**results[cities[0]], 'last_weeks': last_weeks})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,12 +1,45 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, abort, jsonify, request, url_for
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+MAX_PAGE = 1000
+MAX_BULK = 10000
+
+# Só as colunas do to_dict: as listagens não instanciam objetos do ORM
+USER_COLUMNS = (User.id, User.username, User.email)
+
+
+def _user_row(user_id):
+    row = db.session.execute(select(*USER_COLUMNS).where(User.id == user_id)).mappings().first()
+    if row is None:
+        abort(404)
+    return dict(row)
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """Lista usuários por id, uma página por vez (lista JSON, como antes)
+
+    Sem ?limit=, a página tem MAX_PAGE usuários; ?cursor=<último id>
+    continua de onde a anterior parou. Quando há mais usuários, o cursor da
+    próxima página vai nos cabeçalhos X-Next-Cursor e Link (rel="next").
+    """
+    try:
+        limit = max(1, min(int(request.args.get('limit', MAX_PAGE)), MAX_PAGE))
+        cursor = int(request.args.get('cursor', 0))
+    except ValueError:
+        return jsonify({'error': "'cursor' e 'limit' devem ser inteiros"}), 400
+
+    query = select(*USER_COLUMNS).where(User.id > cursor).order_by(User.id).limit(limit + 1)
+    rows = db.session.execute(query).mappings().all()
+    response = jsonify([dict(row) for row in rows[:limit]])
+    if len(rows) > limit:
+        next_cursor = str(rows[limit - 1]['id'])
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for(".get_users", cursor=next_cursor, limit=limit)}>; rel="next"'
+    return response
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -17,10 +50,36 @@ def create_user():
     db.session.commit()
     return jsonify(user.to_dict()), 201
 
+@user_bp.route('/users/bulk', methods=['POST'])
+def import_users():
+    """Importa uma lista de usuários em uma transação (INSERT executemany)
+
+    Usuários com username ou email já cadastrados são ignorados.
+    """
+    data = request.get_json(silent=True)
+    users = data.get('users') if isinstance(data, dict) else data
+    if not isinstance(users, list):
+        return jsonify({'error': "Envie uma lista de usuários ou {'users': [...]}"}), 400
+    if len(users) > MAX_BULK:
+        return jsonify({'error': f'No máximo {MAX_BULK} usuários por importação'}), 413
+    try:
+        rows = [{'username': str(u['username']), 'email': str(u['email'])} for u in users]
+    except (KeyError, TypeError):
+        return jsonify({'error': "Cada usuário precisa de 'username' e 'email'"}), 400
+    if not rows:
+        return jsonify({'inserted': 0, 'skipped': 0}), 201
+
+    try:
+        result = db.session.connection().execute(insert(User).on_conflict_do_nothing(), rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'inserted': result.rowcount, 'skipped': len(rows) - result.rowcount}), 201
+
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    return jsonify(_user_row(user_id))
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
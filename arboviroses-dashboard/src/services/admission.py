@@ -0,0 +1,182 @@
+"""Coalescência de requisições idênticas e controle de admissão
+
+Quando muitos usuários abrem o painel ao mesmo tempo (após um boletim ou
+um alerta), requisições idênticas, pela mesma chave de endpoint,
+parâmetros normalizados e formato negociado, compartilham uma única
+execução (single-flight). Quem chega depois espera o resultado do
+primeiro e recebe uma cópia da mesma resposta.
+
+As execuções que de fato calculam passam por uma fila limitada por
+processo: até ARBOVIROSES_MAX_INFLIGHT simultâneas e
+ARBOVIROSES_MAX_QUEUE esperando. Com a fila cheia a resposta é 429; se a
+espera passa de ARBOVIROSES_QUEUE_TIMEOUT segundos, 503. As duas vêm com
+Retry-After, e os threads do worker não ficam todos presos no pico.
+"""
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from src.services.metrics import ADMISSION, COALESCED, INFLIGHT
+from src.services.serialization import cache_variant
+
+MAX_INFLIGHT = int(os.environ.get('ARBOVIROSES_MAX_INFLIGHT', 4))
+MAX_QUEUE = int(os.environ.get('ARBOVIROSES_MAX_QUEUE', 32))
+QUEUE_TIMEOUT = float(os.environ.get('ARBOVIROSES_QUEUE_TIMEOUT', 5))
+# Espera máxima de quem aguarda uma execução em andamento (segundos)
+FOLLOWER_TIMEOUT = 30
+# Suavização da média do tempo de execução (para o Retry-After)
+DURATION_SMOOTHING = 0.2
+
+
+class Overloaded(Exception):
+    """Requisição recusada pelo controle de admissão"""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Limita as execuções simultâneas, com fila de espera limitada"""
+
+    def __init__(self, max_inflight=MAX_INFLIGHT, max_queue=MAX_QUEUE, timeout=QUEUE_TIMEOUT):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.inflight = 0
+        self.queued = 0
+        self.mean_duration = 0.1
+        self._condition = threading.Condition()
+
+    def retry_after(self):
+        """Segundos estimados até a fila atual escoar"""
+        waves = (self.queued + self.inflight) / max(self.max_inflight, 1)
+        return max(1, math.ceil(waves * self.mean_duration))
+
+    def acquire(self):
+        with self._condition:
+            if self.inflight < self.max_inflight:
+                self.inflight += 1
+                return 'admitted'
+            if self.queued >= self.max_queue:
+                raise Overloaded(429, self.retry_after(), 'Fila de requisições cheia')
+            self.queued += 1
+            try:
+                deadline = time.monotonic() + self.timeout
+                while self.inflight >= self.max_inflight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Overloaded(503, self.retry_after(), 'Tempo de espera na fila esgotado')
+                    self._condition.wait(remaining)
+            finally:
+                self.queued -= 1
+            self.inflight += 1
+            return 'queued'
+
+    def release(self, duration):
+        with self._condition:
+            self.inflight -= 1
+            self.mean_duration += DURATION_SMOOTHING * (duration - self.mean_duration)
+            self._condition.notify()
+
+    def stats(self):
+        return {'inflight': self.inflight, 'queued': self.queued,
+                'max_inflight': self.max_inflight, 'max_queue': self.max_queue}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Uma execução por chave; chamadas concorrentes recebem o mesmo resultado"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, timeout=FOLLOWER_TIMEOUT):
+        """Retorna (resultado, compartilhado)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise Overloaded(503, max(1, math.ceil(timeout / 10)), 'Tempo de espera esgotado')
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+admission = AdmissionController()
+flights = SingleFlight()
+
+
+def overload_response(error):
+    body = {'status': 'overloaded', 'error': str(error), 'retry_after': error.retry_after}
+    return body, error.status, {'Retry-After': str(error.retry_after)}
+
+
+def _request_key():
+    # Mesma normalização do cache de respostas: parâmetros ordenados e formato negociado
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'{request.endpoint}|{sorted((request.view_args or {}).items())}|{args}|{cache_variant()}'
+
+
+def _snapshot(response):
+    """Resposta materializada, para ser copiada por quem aguardava"""
+    return response.get_data(), response.status_code, list(response.headers.items())
+
+
+def coalesced(view):
+    """Decorator: single-flight por chave de requisição e admissão limitada
+
+    Vai abaixo de @cached_response: acertos do cache não passam pela fila.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Requisições com ?profile=1 medem o próprio handler
+        if request.args.get('profile') == '1':
+            return view(*args, **kwargs)
+
+        def compute():
+            result = admission.acquire()
+            ADMISSION.inc(endpoint=request.endpoint, result=result)
+            INFLIGHT.set(admission.inflight)
+            started = time.perf_counter()
+            try:
+                return _snapshot(make_response(view(*args, **kwargs)))
+            finally:
+                admission.release(time.perf_counter() - started)
+                INFLIGHT.set(admission.inflight)
+
+        try:
+            (body, status, headers), shared = flights.do(_request_key(), compute)
+        except Overloaded as e:
+            ADMISSION.inc(endpoint=request.endpoint, result=f'rejected_{e.status}')
+            return overload_response(e)
+        COALESCED.inc(endpoint=request.endpoint, result='follower' if shared else 'leader')
+        return Response(body, status, headers)
+    return wrapper
@@ -0,0 +1,209 @@
+"""Histórico de alertas persistido no SQLite
+
+Gravações chegam em lote (um INSERT executemany e um único commit) e
+atualizam o resumo materializado de cada município afetado. Consultas usam
+o índice (municipality, timestamp, risk_level) com paginação por cursor.
+"""
+import base64
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, or_, and_
+from sqlalchemy.dialects.sqlite import insert
+
+from src.models.alert import Alert, AlertStatus, RISK_NAMES, RISK_RANK
+from src.models.user import db
+from src.services.municipalities import MUNICIPALITIES
+
+# Janela dos alertas "recentes" no resumo
+RECENT_DAYS = 30
+# Resumos mais antigos que isso são recalculados na leitura
+STATUS_MAX_AGE = timedelta(hours=1)
+
+DEFAULT_PAGE = 30
+MAX_PAGE = 200
+
+
+def _row(alert):
+    timestamp = alert.get('timestamp') or datetime.now()
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    municipality = alert['municipality']
+    risk_level = alert.get('risk_level', 'baixo')
+    return {
+        'alert_id': alert.get('id') or f"alert_{municipality}_{timestamp.strftime('%Y%m%d_%H%M%S')}",
+        'municipality': municipality,
+        'timestamp': timestamp,
+        'risk_level': risk_level,
+        'alert_level': alert.get('alert_level', RISK_RANK.get(risk_level, 0)),
+        'diseases': alert.get('diseases', {}),
+        'status': alert.get('status', 'ativo')
+    }
+
+
+def record_alerts(alerts):
+    """Grava vários alertas em uma transação; ids repetidos são ignorados
+
+    O canal de eventos de cada worker encontra os novos por alerts_after().
+    """
+    rows = [_row(a) for a in alerts]
+    if not rows:
+        return 0
+    statement = (
+        insert(Alert)
+        .on_conflict_do_nothing(index_elements=['alert_id'])
+        .returning(Alert.alert_id)
+    )
+    inserted = set(db.session.connection().execute(statement, rows).scalars())
+    refresh_status({r['municipality'] for r in rows}, commit=False)
+    db.session.commit()
+    return len(inserted)
+
+
+def refresh_status(municipalities, commit=True):
+    """Recalcula o resumo materializado dos municípios (consulta agrupada no índice)"""
+    now = datetime.now()
+    cutoff = now - timedelta(days=RECENT_DAYS)
+    municipalities = list(municipalities)
+    summary = db.session.execute(
+        select(Alert.municipality, func.count(), func.max(Alert.alert_level), func.max(Alert.timestamp))
+        .where(Alert.municipality.in_(municipalities), Alert.timestamp >= cutoff)
+        .group_by(Alert.municipality)
+    ).all()
+    found = {m: (count, level, last) for m, count, level, last in summary}
+
+    rows = []
+    for municipality in municipalities:
+        count, level, last = found.get(municipality, (0, 0, None))
+        rows.append({'municipality': municipality, 'recent_alerts_count': count,
+                     'highest_recent_level': level or 0, 'last_alert_at': last, 'updated_at': now})
+    statement = insert(AlertStatus)
+    statement = statement.on_conflict_do_update(
+        index_elements=['municipality'],
+        set_={c: statement.excluded[c] for c in
+              ('recent_alerts_count', 'highest_recent_level', 'last_alert_at', 'updated_at')}
+    )
+    db.session.execute(statement, rows)
+    if commit:
+        db.session.commit()
+
+
+def current_status(municipality=None):
+    """Resumo dos alertas recentes lido das linhas materializadas
+
+    Sem município, agrega os resumos de todos os municípios do cadastro.
+    """
+    municipalities = [municipality] if municipality else list(MUNICIPALITIES)
+    query = select(AlertStatus).where(AlertStatus.municipality.in_(municipalities))
+    statuses = db.session.execute(query).scalars().all()
+    now = datetime.now()
+    fresh = {s.municipality for s in statuses if now - s.updated_at <= STATUS_MAX_AGE}
+    stale = [m for m in municipalities if m not in fresh]
+    if stale:
+        refresh_status(stale)
+        statuses = db.session.execute(query).scalars().all()
+
+    if municipality:
+        return statuses[0].to_dict()
+    last_alerts = [s.last_alert_at for s in statuses if s.last_alert_at]
+    return {
+        'system_active': True,
+        'municipality': None,
+        'recent_alerts_count': sum(s.recent_alerts_count for s in statuses),
+        'highest_recent_risk': RISK_NAMES.get(max((s.highest_recent_level for s in statuses), default=0),
+                                              'baixo'),
+        'last_alert_at': max(last_alerts).isoformat() if last_alerts else None,
+        'updated_at': min(s.updated_at for s in statuses).isoformat()
+    }
+
+
+def alerts_version():
+    """Versão dos resumos de alertas: (token, último recálculo), vista por todos os processos"""
+    last = db.session.execute(select(func.max(AlertStatus.updated_at))).scalar()
+    if last is None:
+        return '0', None
+    return last.isoformat(), last.astimezone(timezone.utc)
+
+
+def last_alert_id():
+    """Maior id (autoincremento) gravado; ponto de partida de alerts_after()"""
+    return db.session.execute(select(func.max(Alert.id))).scalar() or 0
+
+
+def alerts_after(last_id, until, municipalities):
+    """Alertas gravados (por qualquer processo) com id em (last_id, until], em ordem"""
+    return db.session.execute(
+        select(Alert)
+        .where(Alert.id > last_id, Alert.id <= until, Alert.municipality.in_(list(municipalities)))
+        .order_by(Alert.id)
+    ).scalars().all()
+
+
+def encode_cursor(alert):
+    raw = f'{alert.timestamp.isoformat()}|{alert.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, alert_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(alert_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+
+
+def list_alerts(municipality=None, since=None, risk_level=None, cursor=None, limit=DEFAULT_PAGE):
+    """Alertas do mais recente para o mais antigo, paginados por cursor
+
+    Retorna (alertas, próximo_cursor ou None).
+    """
+    limit = max(1, min(int(limit), MAX_PAGE))
+    query = select(Alert)
+    if municipality:
+        query = query.where(Alert.municipality == municipality)
+    if since:
+        query = query.where(Alert.timestamp >= since)
+    if risk_level:
+        query = query.where(Alert.risk_level == risk_level)
+    if cursor:
+        timestamp, alert_id = decode_cursor(cursor)
+        query = query.where(or_(Alert.timestamp < timestamp,
+                                and_(Alert.timestamp == timestamp, Alert.id < alert_id)))
+
+    alerts = db.session.execute(
+        query.order_by(Alert.timestamp.desc(), Alert.id.desc()).limit(limit + 1)
+    ).scalars().all()
+
+    next_cursor = encode_cursor(alerts[limit - 1]) if len(alerts) > limit else None
+    return [a.to_dict() for a in alerts[:limit]], next_cursor
+
+
+def parse_alert_args(args):
+    """Valida ?municipality=&since=&risk_level=&cursor=&limit= do /alerts
+
+    Sem `municipality`, a consulta cobre todos os municípios.
+    """
+    municipality = args.get('municipality') or None
+    if municipality is not None and municipality not in MUNICIPALITIES:
+        raise ValueError(f'Município desconhecido: {municipality}')
+    since = args.get('since')
+    try:
+        since = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        raise ValueError("'since' deve estar no formato ISO 8601")
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE))
+    except ValueError:
+        raise ValueError("'limit' deve ser um inteiro")
+    risk_level = args.get('risk_level')
+    if risk_level and risk_level not in RISK_RANK:
+        raise ValueError(f"'risk_level' deve ser um de: {', '.join(RISK_RANK)}")
+    cursor = args.get('cursor')
+    if cursor:
+        decode_cursor(cursor)
+    return {
+        'municipality': municipality,
+        'since': since,
+        'risk_level': risk_level,
+        'cursor': cursor,
+        'limit': limit
+    }
@@ -0,0 +1,245 @@
+"""Correlações defasadas entre clima e casos, mantidas incrementalmente
+
+Para cada (município, doença, variável climática, defasagem) guardamos as
+somas Σx, Σy, Σx², Σy² e Σxy dos pares (clima[t - lag], casos[t]) dentro de
+uma janela móvel. Acrescentar uma semana soma o par novo e subtrai o par que
+sai da janela, atualizando todos os coeficientes em O(defasagens).
+
+Gravações da ingestão chegam pelos listeners das séries como deltas das
+células alteradas; só os pares da janela que contêm essas células são
+corrigidos (semanas anteriores à janela não entram nas somas). Mudanças
+feitas por outro processo ainda levam ao recálculo completo.
+"""
+import threading
+
+import numpy as np
+
+from src.services.weekly_store import get_case_store, get_climate_store
+
+MAX_LAG = 8
+WINDOW = 104
+CORRELATED_VARIABLES = ('temperatura', 'umidade', 'precipitacao')
+
+# Recalcula as somas do zero periodicamente para conter erro de arredondamento
+REBUILD_EVERY = 52
+
+
+class LaggedCorrelation:
+    """Matriz de correlações (municípios × doenças × variáveis × defasagens)"""
+
+    def __init__(self, max_lag=MAX_LAG, window=WINDOW):
+        self.max_lag = max_lag
+        self.window = window
+        self.end_index = None
+        self.history = None
+        self._appended = 0
+        self._lock = threading.Lock()
+
+    def build(self, cases, climate, end_index):
+        """Calcula as somas a partir das séries completas
+
+        `cases` (M, D, T) e `climate` (M, V, T) devem terminar em `end_index`.
+        """
+        cases = np.asarray(cases, dtype=np.float64)
+        climate = np.asarray(climate, dtype=np.float64)
+        T = cases.shape[2]
+        W = min(self.window, T - self.max_lag)
+        if W < 2:
+            raise ValueError('Histórico insuficiente para calcular correlações')
+
+        M, D, _ = cases.shape
+        V = climate.shape[1]
+        L = self.max_lag + 1
+        shape = (M, D, V, L)
+        self.n = np.full(shape, float(W))
+        self.sx, self.sy, self.sxx, self.syy, self.sxy = (np.zeros(shape) for _ in range(5))
+
+        y = cases[:, :, T - W:]
+        for lag in range(L):
+            x = climate[:, :, T - W - lag:T - lag]
+            self.sx[..., lag] = x.sum(axis=2)[:, None, :]
+            self.sxx[..., lag] = (x * x).sum(axis=2)[:, None, :]
+            self.sy[..., lag] = y.sum(axis=2)[:, :, None]
+            self.syy[..., lag] = (y * y).sum(axis=2)[:, :, None]
+            self.sxy[..., lag] = np.einsum('mdw,mvw->mdv', y, x)
+
+        # Buffers com o necessário para as próximas atualizações
+        self.weeks = W
+        self._cases = y.copy()
+        self._climate = climate[:, :, T - W - self.max_lag:].copy()
+        self.end_index = end_index
+        self._appended = 0
+
+    def append(self, cases_week, climate_week):
+        """Acrescenta uma semana: casos (M, D) e clima (M, V)"""
+        lags = np.arange(self.max_lag + 1)
+        climate = np.concatenate([self._climate, np.asarray(climate_week, dtype=np.float64)[:, :, None]], axis=2)
+        y_new = np.asarray(cases_week, dtype=np.float64)
+        y_old = self._cases[:, :, 0]
+
+        # Pares que entram: (x[t - lag], y[t]); pares que saem: (x[t - W - lag], y[t - W])
+        x_new = climate[:, :, -1 - lags]                  # (M, V, L)
+        x_old = climate[:, :, -1 - self.weeks - lags]    # (M, V, L)
+
+        self.sx += (x_new - x_old)[:, None, :, :]
+        self.sxx += (x_new ** 2 - x_old ** 2)[:, None, :, :]
+        self.sy += (y_new - y_old)[:, :, None, None]
+        self.syy += (y_new ** 2 - y_old ** 2)[:, :, None, None]
+        self.sxy += (y_new[:, :, None, None] * x_new[:, None, :, :]
+                     - y_old[:, :, None, None] * x_old[:, None, :, :])
+
+        self._climate = climate[:, :, 1:]
+        self._cases = np.concatenate([self._cases[:, :, 1:], y_new[:, :, None]], axis=2)
+        self.end_index += 1
+        self._appended += 1
+
+    def _follows(self, series, store):
+        """Confere se a gravação é a seguinte à última acompanhada nessa série"""
+        if self.history is None or store.history_version != self.history[series] + 1:
+            # Perdeu alguma gravação: a próxima sincronização reconstrói
+            self.history = None
+            return False
+        history = list(self.history)
+        history[series] = store.history_version
+        self.history = tuple(history)
+        return True
+
+    def on_cases(self, store, m, d, weeks, delta):
+        """Gravação na série de casos: corrige os pares das semanas da janela"""
+        with self._lock:
+            if not self._follows(0, store):
+                return
+            i = weeks - (self.end_index - self.weeks)
+            inside = (i >= 0) & (i < self.weeks)
+            if not inside.any():
+                return
+            m, d, i = m[inside], d[inside], i[inside]
+            delta = np.asarray(delta[inside], dtype=np.float64)
+            lags = np.arange(self.max_lag + 1)
+            # Clima x[t - lag] pareado com cada célula: (células, V, L)
+            x = self._climate[m[:, None, None], np.arange(self._climate.shape[1])[None, :, None],
+                              (i[:, None] + self.max_lag - lags)[:, None, :]]
+            y = self._cases[m, d, i]
+            np.add.at(self.sy, (m, d), delta[:, None, None])
+            np.add.at(self.syy, (m, d), ((y + delta) ** 2 - y ** 2)[:, None, None])
+            np.add.at(self.sxy, (m, d), delta[:, None, None] * x)
+            self._cases[m, d, i] = y + delta
+            self._appended += 1
+
+    def on_climate(self, store, m, v, weeks, delta):
+        """Gravação na série climática: corrige os pares das semanas da janela"""
+        with self._lock:
+            if not self._follows(1, store):
+                return
+            columns = {store.variable_index(variable): k for k, variable in enumerate(CORRELATED_VARIABLES)}
+            k = np.array([columns.get(int(x), -1) for x in v], dtype=np.intp)
+            j = weeks - (self.end_index - self.weeks - self.max_lag)
+            inside = (k >= 0) & (j >= 0) & (j < self._climate.shape[2])
+            if not inside.any():
+                return
+            m, k, j = m[inside], k[inside], j[inside]
+            delta = np.asarray(delta[inside], dtype=np.float64)
+            # A semana j do clima forma par com a semana j - max_lag + lag dos casos
+            i = j[:, None] - self.max_lag + np.arange(self.max_lag + 1)
+            paired = ((i >= 0) & (i < self.weeks)).astype(np.float64)[:, None, :]
+            y = self._cases[m[:, None, None], np.arange(self._cases.shape[1])[None, :, None],
+                            np.clip(i, 0, self.weeks - 1)[:, None, :]]
+            x = self._climate[m, k, j]
+            np.add.at(self.sx, (m, slice(None), k), delta[:, None, None] * paired)
+            np.add.at(self.sxx, (m, slice(None), k), ((x + delta) ** 2 - x ** 2)[:, None, None] * paired)
+            np.add.at(self.sxy, (m, slice(None), k), delta[:, None, None] * y * paired)
+            self._climate[m, k, j] = x + delta
+            self._appended += 1
+
+    def coefficients(self, municipality=slice(None)):
+        """Coeficientes de Pearson (D, V, L) de um município, ou (M, D, V, L)
+
+        Retorna NaN quando a variância é nula.
+        """
+        m = municipality
+        n, sx, sy = self.n[m], self.sx[m], self.sy[m]
+        cov = n * self.sxy[m] - sx * sy
+        var = (n * self.sxx[m] - sx ** 2) * (n * self.syy[m] - sy ** 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return cov / np.sqrt(np.where(var > 0, var, np.nan))
+
+    def sync(self, case_store, climate_store):
+        """Acompanha as séries: atualiza incrementalmente as semanas novas"""
+        with self._lock:
+            end = min(case_store.end_index, climate_store.end_index)
+            history = (case_store.history_version, climate_store.history_version)
+            # Semanas antigas regravadas (ingestão) exigem recálculo completo
+            behind = self.end_index is None or end < self.end_index or history != self.history
+            stale = behind or self._appended >= REBUILD_EVERY or end - self.end_index > self.window
+            if stale:
+                self.build(*_aligned(case_store, climate_store, end), end)
+                self.history = history
+                return
+            if end == self.end_index:
+                return
+            climate = _climate_columns(climate_store)
+            for index in range(self.end_index, end):
+                self.append(case_store.data[:, :, index - case_store.start_index],
+                            climate[:, :, index - climate_store.start_index])
+
+
+def _climate_columns(climate_store):
+    variables = [climate_store.variable_index(v) for v in CORRELATED_VARIABLES]
+    return climate_store.data[:, variables, :]
+
+
+def _aligned(case_store, climate_store, end):
+    """Séries de casos e clima recortadas no mesmo intervalo de semanas"""
+    start = max(case_store.start_index, climate_store.start_index)
+    cases = case_store.data[:, :, start - case_store.start_index:end - case_store.start_index]
+    climate = _climate_columns(climate_store)[:, :, start - climate_store.start_index:end - climate_store.start_index]
+    return cases, climate
+
+
+# Chaves da resposta do /climate-correlation por variável climática
+RESPONSE_KEYS = {
+    'temperatura': 'temperature_correlation',
+    'umidade': 'humidity_correlation',
+    'precipitacao': 'precipitation_correlation'
+}
+
+_correlation = LaggedCorrelation()
+_listening_lock = threading.Lock()
+_listening = set()
+
+
+def get_correlations():
+    """Retorna a matriz de correlações atualizada até a semana corrente"""
+    case_store, climate_store = get_case_store(), get_climate_store()
+    with _listening_lock:
+        for store, listener in ((case_store, _correlation.on_cases), (climate_store, _correlation.on_climate)):
+            if id(store) not in _listening:
+                store.add_listener(listener)
+                _listening.add(id(store))
+    _correlation.sync(case_store, climate_store)
+    return _correlation
+
+
+def correlation_payload(municipality, lag=None):
+    """Correlações de um município na defasagem `lag` ou na de maior |r|"""
+    engine = get_correlations()
+    store = get_case_store()
+    r = engine.coefficients(store.municipality_index(municipality))  # (D, V, L)
+
+    if lag is None:
+        lags = np.nanargmax(np.nan_to_num(np.abs(r), nan=-1), axis=2)
+    else:
+        lags = np.full(r.shape[:2], lag)
+    values = np.take_along_axis(r, lags[:, :, None], axis=2)[:, :, 0]
+
+    payload = {'municipality': municipality, 'window_weeks': engine.weeks, 'max_lag': engine.max_lag}
+    best_lag = {}
+    for v, variable in enumerate(CORRELATED_VARIABLES):
+        key = RESPONSE_KEYS[variable]
+        payload[key] = {
+            disease: None if np.isnan(values[d, v]) else round(float(values[d, v]), 2)
+            for d, disease in enumerate(store.variables)
+        }
+        best_lag[key] = {disease: int(lags[d, v]) for d, disease in enumerate(store.variables)}
+    payload['lag_weeks'] = best_lag
+    return payload
@@ -0,0 +1,74 @@
+"""Motores do /api/arboviroses, escolhidos por ARBOVIROSES_ENGINE
+
+As rotas são as mesmas para os dois (src.routes.arboviroses); o motor só
+define o que a inicialização em segundo plano carrega e o cache de modelos
+usado pelos painéis:
+
+- simple: séries e índices; os painéis usam o cache de modelos
+  compartilhado, que carrega os coeficientes treinados no primeiro uso.
+- full: também o motor de séries e um cache de modelos próprio, com os
+  coeficientes treinados já carregados na inicialização.
+"""
+from src.services.climate_correlation import get_correlations
+from src.services.epidemic_channel import get_channel
+from src.services.ingestion import start_from_env as start_ingestion
+from src.services.lifecycle import SystemLifecycle
+from src.services.model_cache import ModelCache
+from src.services.panels import default_model_cache
+from src.services.risk_scoring import get_risk_scores
+from src.services.rollup import get_rollup
+from src.services.series_engine import get_series_engine
+from src.services.weekly_store import get_case_store, get_climate_store
+
+
+class Engine:
+    """Inicialização (única, em segundo plano) e modelos residentes de um motor"""
+
+    def __init__(self, name, initializer, model_cache):
+        self.name = name
+        self.model_cache = model_cache
+        self.lifecycle = SystemLifecycle(f'arboviroses-{name}', initializer)
+
+
+def _data_systems():
+    """Séries e índices incrementais usados pelas rotas de dados"""
+    # Ingestão contínua das fontes configuradas (SINAN/InfoDengue)
+    start_ingestion()
+    return {
+        'case_store': get_case_store(),
+        'climate_store': get_climate_store(),
+        'climate_correlation': get_correlations(),
+        'epidemic_channel': get_channel(),
+        'risk_scores': get_risk_scores(),
+        'rollup': get_rollup()
+    }
+
+
+def initialize_simple():
+    """Carrega as séries e os índices uma única vez"""
+    return _data_systems()
+
+
+full_model_cache = ModelCache()
+
+
+def initialize_full():
+    """Séries, índices, motor de séries e coeficientes treinados publicados"""
+    full_model_cache.refresh_artifacts()
+    return {
+        **_data_systems(),
+        'series_engine': get_series_engine(),
+        'model_cache': full_model_cache
+    }
+
+
+ENGINES = {
+    'simple': Engine('simple', initialize_simple, default_model_cache),
+    'full': Engine('full', initialize_full, full_model_cache)
+}
+
+
+def load_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"ARBOVIROSES_ENGINE deve ser um de: {', '.join(ENGINES)}")
+    return ENGINES[name]
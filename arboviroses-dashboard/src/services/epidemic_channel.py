@@ -0,0 +1,253 @@
+"""Canal endêmico e estatísticas móveis, mantidos incrementalmente
+
+O canal endêmico de uma semana são os quartis (Q1, mediana, Q3) dos casos
+nas mesmas semanas (±2) das temporadas anteriores. O índice guarda os
+quartis de cada (município, doença) para o último ano e as próximas semanas
+de previsão; como eles só dependem de semanas passadas, acrescentar uma
+semana calcula apenas o quartil da nova semana do horizonte.
+
+As estatísticas móveis (média de 4 semanas, variação semanal e Rt) são
+atualizadas em O(municípios × doenças) a cada semana acrescentada. A última
+"doença" do índice é o total de casos.
+
+Semanas regravadas pela ingestão chegam pelo listener da série de casos:
+só os quartis cujas janelas contêm essas semanas, nos municípios
+alterados, são recalculados. Mudanças de outro processo levam ao
+recálculo completo.
+"""
+import threading
+
+import numpy as np
+
+from src.services import epiweeks
+from src.services.weekly_store import DISEASES, get_case_store, week_dates
+
+SEASON = 52
+# Temporadas anteriores usadas no canal endêmico
+CORRIDOR_YEARS = 5
+# Semanas vizinhas (±) incluídas em cada quartil móvel
+CORRIDOR_HALF_WIDTH = 2
+# Semanas do canal mantidas antes da semana corrente e depois dela (previsão)
+CORRIDOR_RECENT = SEASON
+CORRIDOR_AHEAD = 12
+
+# Intervalo serial aproximado das arboviroses (semanas), usado no Rt
+SERIAL_INTERVAL = 2
+# Variação semanal (%) abaixo da qual a tendência é estável
+TREND_TOLERANCE = 5
+
+SERIES = DISEASES + ('total',)
+
+
+def corridor_offsets(years, half_width=CORRIDOR_HALF_WIDTH):
+    """Deslocamentos (em semanas) das janelas das temporadas anteriores"""
+    return np.array([
+        -SEASON * year + offset
+        for year in range(1, years + 1)
+        for offset in range(-half_width, half_width + 1)
+    ])
+
+
+def corridor_years(weeks, years=CORRIDOR_YEARS):
+    """Temporadas anteriores disponíveis em uma série de `weeks` semanas"""
+    return max(1, min(years, (weeks - CORRIDOR_HALF_WIDTH - 1) // SEASON))
+
+
+def corridor_quartiles(cases, columns, years):
+    """Quartis do canal para as colunas `columns` de `cases` (..., T)
+
+    Retorna um array (3, ..., len(columns)).
+    """
+    window = np.clip(np.asarray(columns)[:, None] + corridor_offsets(years)[None, :], 0, cases.shape[-1] - 1)
+    return np.percentile(cases[..., window], (25, 50, 75), axis=-1)
+
+
+def _with_total(cases):
+    cases = np.asarray(cases, dtype=np.int64)
+    return np.concatenate([cases, cases.sum(axis=1, keepdims=True)], axis=1)
+
+
+def trend_label(change):
+    if change > TREND_TOLERANCE:
+        return 'increasing'
+    if change < -TREND_TOLERANCE:
+        return 'decreasing'
+    return 'stable'
+
+
+class EpidemicChannel:
+    """Índice do canal endêmico e estatísticas móveis (municípios × séries)"""
+
+    def __init__(self, years=CORRIDOR_YEARS, recent=CORRIDOR_RECENT, ahead=CORRIDOR_AHEAD):
+        self.max_years = years
+        self.years = years
+        self.recent = recent
+        self.ahead = ahead
+        self.end_index = None
+        self.history = None
+        self._lock = threading.Lock()
+
+    def build(self, cases, end_index):
+        """Calcula o índice a partir da série completa (M, D, T) terminada em `end_index`"""
+        y = _with_total(cases)
+        T = y.shape[2]
+        if T < SERIAL_INTERVAL * 2:
+            raise ValueError('Histórico insuficiente para o canal endêmico')
+        self.years = corridor_years(T, self.max_years)
+
+        # Semanas do canal: [end - recent, end + ahead), em colunas de `y`
+        columns = np.arange(T - self.recent, T + self.ahead)
+        self.quartiles = corridor_quartiles(y, columns, self.years)
+        self.first_week = end_index - self.recent
+
+        # Buffer com o necessário para calcular o canal das próximas semanas
+        span = SEASON * self.years + CORRIDOR_HALF_WIDTH
+        self._cases = y[:, :, -span:].copy()
+        self._sum4 = self._cases[:, :, -4:].sum(axis=2)
+        self.end_index = end_index
+        self._update_stats()
+
+    def append(self, cases_week):
+        """Acrescenta uma semana de casos (M, D)"""
+        y_new = _with_total(np.asarray(cases_week)[:, :, None])[:, :, 0]
+        self._sum4 += y_new - self._cases[:, :, -4]
+        self._cases = np.concatenate([self._cases[:, :, 1:], y_new[:, :, None]], axis=2)
+        self.end_index += 1
+
+        # Só a nova semana do horizonte precisa de quartis
+        span = self._cases.shape[2]
+        column = span - 1 + self.ahead
+        new = corridor_quartiles(self._cases, [column], self.years)
+        self.quartiles = np.concatenate([self.quartiles[..., 1:], new], axis=-1)
+        self.first_week += 1
+        self._update_stats()
+
+    def on_write(self, store, m, d, weeks, delta):
+        """Gravação da ingestão: recalcula o que depende das semanas alteradas"""
+        with self._lock:
+            if self.history is None or store.history_version != self.history + 1:
+                # Perdeu alguma gravação: a próxima sincronização reconstrói
+                self.history = None
+                return
+            self.history = store.history_version
+            past = weeks < self.end_index
+            if past.any():
+                self._rewrite(store, np.unique(m[past]), np.unique(weeks[past]))
+
+    def _rewrite(self, store, municipalities, weeks):
+        start = store.start_index
+        y = _with_total(store.data[municipalities, :, :self.end_index - start])
+        # Colunas do canal cujas janelas contêm alguma semana alterada
+        columns = np.unique((weeks[:, None] - corridor_offsets(self.years)[None, :]).ravel())
+        if (weeks <= start).any():
+            # Janelas que passam do início da série são cortadas na primeira semana
+            columns = np.arange(self.first_week, self.first_week + self.quartiles.shape[-1])
+        offsets = columns - self.first_week
+        keep = (offsets >= 0) & (offsets < self.quartiles.shape[-1])
+        if keep.any():
+            quartiles = self.quartiles[:, municipalities]
+            quartiles[..., offsets[keep]] = corridor_quartiles(y, columns[keep] - start, self.years)
+            self.quartiles[:, municipalities] = quartiles
+
+        self._cases[municipalities] = y[:, :, y.shape[2] - self._cases.shape[2]:]
+        self._sum4 = self._cases[:, :, -4:].sum(axis=2)
+        self._update_stats()
+
+    def _update_stats(self):
+        c = self._cases
+        last, previous = c[:, :, -1], c[:, :, -2]
+        self.last = last
+        self.previous = previous
+        self.ma4 = self._sum4 / 4
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.change = np.where(previous > 0, (last - previous) * 100 / previous,
+                                   np.where(last > 0, 100.0, 0.0))
+            # Rt pela razão entre casos de intervalos seriais consecutivos
+            recent = c[:, :, -SERIAL_INTERVAL:].sum(axis=2)
+            before = c[:, :, -2 * SERIAL_INTERVAL:-SERIAL_INTERVAL].sum(axis=2)
+            self.rt = np.where(before > 0, recent / before, np.nan)
+
+    def thresholds(self, first, count):
+        """Quartis (3, M, D, count) das semanas [first, first + count) do índice"""
+        i0 = first - self.first_week
+        if i0 < 0 or i0 + count > self.quartiles.shape[-1]:
+            raise ValueError('Semanas fora do canal endêmico pré-calculado')
+        return self.quartiles[:, :, :len(DISEASES), i0:i0 + count]
+
+    def kpis(self, m, series='total'):
+        """Indicadores de uma série de um município (índice m)"""
+        s = SERIES.index(series)
+        rt = self.rt[m, s]
+        change = float(self.change[m, s])
+        return {
+            'last': int(self.last[m, s]),
+            'previous': int(self.previous[m, s]),
+            'change_pct': round(change, 1),
+            'ma4': round(float(self.ma4[m, s]), 1),
+            'rt': None if np.isnan(rt) else round(float(rt), 2),
+            'trend': trend_label(change),
+            'zone': self.zone(m, s)
+        }
+
+    def zone(self, m, s):
+        """Zona do canal endêmico na semana corrente"""
+        q1, median, q3 = self.quartiles[:, m, s, self.recent - 1]
+        value = self.last[m, s]
+        if value > q3:
+            return 'epidemia'
+        if value > median:
+            return 'alerta'
+        if value > q1:
+            return 'seguranca'
+        return 'sucesso'
+
+    def corridor(self, m, series='total'):
+        """Canal endêmico de uma série: {dates, q1, median, q3} do último ano e do horizonte"""
+        s = SERIES.index(series)
+        q = np.round(self.quartiles[:, m, s, :], 1)
+        return {
+            'dates': week_dates(self.first_week, q.shape[-1]),
+            'q1': q[0].tolist(),
+            'median': q[1].tolist(),
+            'q3': q[2].tolist()
+        }
+
+    def sync(self, case_store, end=None):
+        """Acompanha a série de casos até `end`: semanas novas entram incrementalmente"""
+        with self._lock:
+            end = case_store.end_index if end is None else min(end, case_store.end_index)
+            behind = self.end_index is None or end < self.end_index or case_store.history_version != self.history
+            if behind or end - self.end_index > self.recent:
+                start = case_store.start_index
+                self.build(case_store.data[:, :, :end - start], end)
+                self.history = case_store.history_version
+                return
+            for index in range(self.end_index, end):
+                self.append(case_store.data[:, :, index - case_store.start_index])
+
+
+_channel = EpidemicChannel()
+_listening_lock = threading.Lock()
+_listening = set()
+
+
+def get_channel():
+    """Índice do canal endêmico atualizado até a semana corrente"""
+    store = get_case_store()
+    with _listening_lock:
+        if id(store) not in _listening:
+            store.add_listener(_channel.on_write)
+            _listening.add(id(store))
+    _channel.sync(store, epiweeks.current_index() + 1)
+    return _channel
+
+
+def kpi_payload(municipality):
+    """Indicadores do total e de cada doença de um município"""
+    channel = get_channel()
+    m = get_case_store().municipality_index(municipality)
+    return {
+        'municipality': municipality,
+        **channel.kpis(m),
+        'diseases': {disease: channel.kpis(m, disease) for disease in DISEASES}
+    }
@@ -0,0 +1,45 @@
+from datetime import date, datetime, timedelta
+
+# Início da SE 1/2020 (semanas epidemiológicas começam no domingo)
+EPOCH = date(2019, 12, 29)
+
+
+def as_date(value):
+    """Converte str (YYYY-MM-DD), datetime ou date em date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def week_start(value):
+    """Retorna o domingo que inicia a semana epidemiológica da data"""
+    d = as_date(value)
+    return d - timedelta(days=(d.weekday() + 1) % 7)
+
+
+def week_index(value):
+    """Índice da semana epidemiológica contado a partir de EPOCH"""
+    return (week_start(value) - EPOCH).days // 7
+
+
+def index_date(index):
+    """Data de início (domingo) da semana de índice `index`"""
+    return EPOCH + timedelta(weeks=int(index))
+
+
+def epi_week(value):
+    """Retorna (ano, semana) epidemiológicos no padrão SINAN/MMWR
+
+    A semana pertence ao ano que contém a sua quarta-feira.
+    """
+    start = week_start(value)
+    year = (start + timedelta(days=3)).year
+    first = week_start(date(year, 1, 4))
+    return year, (start - first).days // 7 + 1
+
+
+def current_index():
+    """Índice da semana epidemiológica corrente"""
+    return week_index(datetime.now())
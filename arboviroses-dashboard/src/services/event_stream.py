@@ -0,0 +1,300 @@
+"""Canal de eventos (Server-Sent Events) por município
+
+Cada assinante tem uma fila própria; um evento é serializado uma única vez
+e entregue a todas as filas do município. Uma thread por worker observa as
+séries e, quando a versão muda (ingestão neste ou em outro processo),
+publica só as células alteradas das semanas recentes (`cases`), grava os
+alertas da nova classificação de risco e publica, lidos do banco, os
+alertas novos (`alert`) e os resumos que mudaram (`status`). Como a leitura
+vem do banco, cada worker entrega aos seus assinantes também os alertas
+gravados por outro processo.
+
+O worker padrão do gunicorn é o gevent: cada conexão é uma greenlet e um
+worker mantém milhares de streams ociosos. Com GUNICORN_WORKER_CLASS=gthread
+cada conexão ocupa uma thread, e o limite por processo cai para
+GUNICORN_THREADS - 1 (uma thread fica para as demais rotas). Acima do
+limite (ARBOVIROSES_MAX_STREAMS), o /stream responde 503.
+"""
+import json
+import os
+import queue
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from src.services import epiweeks
+from src.services.alert_store import alerts_after, alerts_version, current_status, last_alert_id
+from src.services.risk_scoring import sync_alerts
+from src.services.weekly_store import data_version, get_case_store, get_climate_store, week_dates
+
+# Semanas recentes comparadas a cada mudança (a ingestão revisa semanas anteriores)
+RECENT_WEEKS = 4
+# Intervalo da verificação de novas versões das séries (segundos)
+POLL_INTERVAL = 5
+# Comentário enviado a conexões ociosas para mantê-las abertas (segundos)
+HEARTBEAT = 15
+# Eventos pendentes por assinante; quem não acompanha é desconectado
+QUEUE_SIZE = 64
+# Segundos sugeridos no Retry-After quando o limite de streams é atingido
+STREAM_RETRY_AFTER = 30
+
+
+def default_stream_limit():
+    """Streams simultâneos por processo conforme o worker do gunicorn"""
+    if os.environ.get('GUNICORN_WORKER_CLASS', 'gevent') in ('gevent', 'eventlet'):
+        return 5000
+    return max(1, int(os.environ.get('GUNICORN_THREADS', 4)) - 1)
+
+
+MAX_STREAMS = int(os.environ.get('ARBOVIROSES_MAX_STREAMS', 0)) or default_stream_limit()
+
+_CLOSE = None
+
+
+class StreamLimit(Exception):
+    """Limite de conexões SSE do processo atingido"""
+
+
+def format_event(event, data, event_id=None):
+    """Serializa um evento no formato text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def recent_values(municipality):
+    """Casos e clima das últimas semanas: (primeira_semana, {variavel: array})"""
+    end = epiweeks.current_index() + 1
+    first, columns = get_case_store().read(municipality, end - RECENT_WEEKS, end)
+    _, climate = get_climate_store().read(municipality, first, end)
+    columns.update(climate)
+    return first, {variable: np.array(values) for variable, values in columns.items()}
+
+
+def _week_rows(first, columns, mask=None):
+    """Linhas {date, variavel: valor} das semanas (e células) selecionadas"""
+    count = len(next(iter(columns.values())))
+    rows = []
+    for offset, date in enumerate(week_dates(first, count)):
+        row = {
+            variable: round(values[offset].item(), 1) if values.dtype.kind == 'f' else values[offset].item()
+            for variable, values in columns.items()
+            if mask is None or mask[variable][offset]
+        }
+        if row:
+            rows.append(dict(row, date=date))
+    return rows
+
+
+class Subscription:
+    def __init__(self, municipality):
+        self.municipality = municipality
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def messages(self, heartbeat=HEARTBEAT):
+        """Gerador de mensagens com heartbeat; termina quando a assinatura é encerrada"""
+        while True:
+            try:
+                message = self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            if message is _CLOSE:
+                return
+            yield message
+
+
+class EventBroker:
+    """Assinaturas por município e observação das séries"""
+
+    def __init__(self, poll_interval=POLL_INTERVAL, max_streams=MAX_STREAMS):
+        self.poll_interval = poll_interval
+        self.max_streams = max_streams
+        self._subscribers = defaultdict(set)
+        self._sent = {}
+        self._versions = None
+        self._data_token = None
+        self._alerts_version = None
+        self._last_alert_id = None
+        self._status_sent = {}
+        self.app = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """Aplicação usada pelo observador para acessar o banco de alertas"""
+        self.app = app
+
+    def subscribe(self, municipality):
+        subscription = Subscription(municipality)
+        with self._lock:
+            if sum(len(s) for s in self._subscribers.values()) >= self.max_streams:
+                raise StreamLimit(f'Limite de {self.max_streams} streams simultâneos atingido')
+            self._subscribers[municipality].add(subscription)
+            if municipality not in self._sent:
+                self._sent[municipality] = recent_values(municipality)
+        self._start_watcher()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.municipality)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.municipality]
+                    self._sent.pop(subscription.municipality, None)
+                    self._status_sent.pop(subscription.municipality, None)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def limit_response(self, error):
+        body = {'status': 'overloaded', 'error': str(error), 'retry_after': STREAM_RETRY_AFTER}
+        return body, 503, {'Retry-After': str(STREAM_RETRY_AFTER)}
+
+    def publish(self, municipality, event, data, event_id=None):
+        """Entrega um evento a todos os assinantes do município"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(municipality, ()))
+        if not subscribers:
+            return 0
+        message = format_event(event, data, event_id)
+        for subscription in subscribers:
+            if not subscription.put(message):
+                # Fila cheia: encerra a conexão; o EventSource reconecta e recebe um snapshot
+                self.unsubscribe(subscription)
+                subscription.queue.queue.clear()
+                subscription.put(_CLOSE)
+        return len(subscribers)
+
+    def snapshot(self, municipality):
+        """Evento inicial de uma assinatura: semanas recentes completas"""
+        first, columns = self._sent.get(municipality) or recent_values(municipality)
+        return format_event('snapshot', {
+            'municipality': municipality,
+            'weeks': _week_rows(first, columns)
+        })
+
+    def check(self):
+        """Publica as células alteradas e os alertas desde a última verificação"""
+        self.check_series()
+        if self.app is not None:
+            with self.app.app_context():
+                self.check_alerts()
+
+    def check_series(self):
+        """Publica as células alteradas desde a última verificação"""
+        case_store, climate_store = get_case_store(), get_climate_store()
+        versions = (case_store.version, case_store.end_index, climate_store.version, climate_store.end_index)
+        if versions == self._versions:
+            return
+        self._versions = versions
+
+        with self._lock:
+            municipalities = list(self._subscribers)
+        for municipality in municipalities:
+            first, columns = recent_values(municipality)
+            with self._lock:
+                if municipality not in self._subscribers:
+                    continue
+                previous = self._sent.get(municipality)
+                self._sent[municipality] = (first, columns)
+            if previous is None:
+                continue
+            changed = _changes(previous, first, columns)
+            if changed:
+                self.publish(municipality, 'cases', {
+                    'municipality': municipality,
+                    'weeks': _week_rows(first, columns, changed)
+                }, event_id='.'.join(str(v) for v in versions))
+
+    def check_alerts(self):
+        """Grava os alertas da versão atual das séries e publica os novos e os resumos
+
+        Roda em todos os workers: o alert_store ignora alertas já gravados
+        por outro, e cada um publica o que leu do banco aos seus assinantes.
+        """
+        token, _ = data_version()
+        if token != self._data_token:
+            sync_alerts()
+            self._data_token = token
+        version, _ = alerts_version()
+        if version == self._alerts_version:
+            return
+        self._alerts_version = version
+
+        with self._lock:
+            municipalities = list(self._subscribers)
+        newest = last_alert_id()
+        alerted = set()
+        # Na primeira verificação só marca a posição: o snapshot já levou o resumo
+        if self._last_alert_id is not None:
+            for alert in alerts_after(self._last_alert_id, newest, municipalities):
+                self.publish(alert.municipality, 'alert', alert.to_dict())
+                alerted.add(alert.municipality)
+        self._last_alert_id = newest
+
+        for municipality in municipalities:
+            status = current_status(municipality)
+            summary = {k: v for k, v in status.items() if k != 'updated_at'}
+            previous = self._status_sent.get(municipality)
+            self._status_sent[municipality] = summary
+            if municipality in alerted or (previous is not None and previous != summary):
+                self.publish(municipality, 'status', status)
+
+    def _start_watcher(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='event-stream-watcher', daemon=True)
+            self._thread.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            if not self.subscriber_count():
+                continue
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Erro ao verificar séries para o stream: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def _changes(previous, first, columns):
+    """Máscara {variavel: bool[semanas]} das células diferentes do último envio"""
+    prev_first, prev_columns = previous
+    changed = {}
+    for variable, values in columns.items():
+        old = np.full(len(values), np.nan)
+        shift = first - prev_first
+        before = prev_columns[variable]
+        overlap = max(0, min(len(values), len(before) - shift))
+        if shift >= 0 and overlap:
+            old[:overlap] = before[shift:shift + overlap]
+        mask = old != values
+        if mask.any():
+            changed[variable] = mask
+    if not changed:
+        return None
+    return {variable: changed.get(variable, np.zeros(len(columns[variable]), dtype=bool))
+            for variable in columns}
+
+
+broker = EventBroker()
@@ -0,0 +1,216 @@
+"""Atributos dos modelos por município, com cache em disco
+
+Os atributos de uma origem t (primeira semana prevista) usam só as semanas
+anteriores a t: defasagens e médias móveis dos casos de cada doença e
+defasagens do clima. A parte que depende do horizonte (h e sazonalidade da
+semana prevista) é barata e montada na hora.
+
+A matriz de atributos de cada município (origens × doenças × atributos)
+fica em FEATURES_DIR/<chave>.npy, com chave derivada da configuração dos
+atributos e do município. O metadado guarda um hash do conteúdo das séries
+usadas: se as semanas já cobertas não mudaram, só as origens novas são
+calculadas e acrescentadas; se o histórico foi revisto, a matriz é refeita.
+Os arquivos menos usados são removidos quando o cache passa de max_bytes.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from src.services.metrics import FEATURE_CACHE
+from src.services.weekly_store import DATA_DIR, DISEASES, get_case_store, get_climate_store
+
+SEASON = 52
+CASE_LAGS = 4
+CASE_ROLLING = (4, 12)
+CLIMATE_FEATURES = ('temperatura', 'umidade', 'precipitacao')
+# Média móvel da chuva (semanas), pelo atraso entre chuva e criadouros
+RAIN_ROLLING = 4
+# Semanas anteriores à origem necessárias para os atributos
+LOOKBACK = max(CASE_LAGS, *CASE_ROLLING, RAIN_ROLLING)
+
+# Muda quando o conjunto de atributos muda (invalida cache e modelos treinados)
+FEATURE_VERSION = 1
+FEATURE_NAMES = (
+    [f'lag{k}' for k in range(1, CASE_LAGS + 1)]
+    + [f'ma{w}' for w in CASE_ROLLING]
+    + list(CLIMATE_FEATURES)
+    + [f'precipitacao_ma{RAIN_ROLLING}', 'horizon', 'season_sin', 'season_cos']
+)
+ORIGIN_FEATURES = len(FEATURE_NAMES) - 3
+
+FEATURES_DIR = os.environ.get('ARBOVIROSES_FEATURES_DIR', os.path.join(DATA_DIR, 'features'))
+FEATURE_CACHE_BYTES = int(os.environ.get('ARBOVIROSES_FEATURE_CACHE_MB', 256)) * 1024 * 1024
+
+
+def origin_features(cases, climate):
+    """Atributos das origens cobertas por uma janela de semanas
+
+    `cases` (doenças × T) e `climate` (CLIMATE_FEATURES × T) começam na
+    mesma semana a. Retorna (T - LOOKBACK + 1, doenças, ORIGIN_FEATURES)
+    para as origens a + LOOKBACK ... a + T.
+    """
+    cases = np.asarray(cases, dtype=np.float64)
+    climate = np.asarray(climate, dtype=np.float64)
+    T = cases.shape[1]
+    rows = T - LOOKBACK + 1
+    if rows <= 0:
+        return np.zeros((0, cases.shape[0], ORIGIN_FEATURES))
+
+    # Somas acumuladas: médias móveis de todas as origens em O(T)
+    csum = np.concatenate([np.zeros((cases.shape[0], 1)), np.cumsum(cases, axis=1)], axis=1)
+    ends = np.arange(LOOKBACK, T + 1)  # coluna da origem (exclusiva)
+    columns = [cases[:, ends - k] for k in range(1, CASE_LAGS + 1)]
+    columns += [(csum[:, ends] - csum[:, ends - w]) / w for w in CASE_ROLLING]
+    per_disease = np.stack(columns, axis=-1).transpose(1, 0, 2)  # origens × doenças × atributos
+
+    rain = climate[CLIMATE_FEATURES.index('precipitacao')]
+    rsum = np.concatenate([[0.0], np.cumsum(rain)])
+    shared = np.column_stack([climate[:, ends - 1].T, (rsum[ends] - rsum[ends - RAIN_ROLLING]) / RAIN_ROLLING])
+    shared = np.broadcast_to(shared[:, None, :], (rows, cases.shape[0], shared.shape[1]))
+    return np.concatenate([per_disease, shared], axis=-1)
+
+
+def horizon_features(next_index, horizon):
+    """Colunas (horizonte × 3): h e codificação sazonal da semana prevista"""
+    steps = np.arange(1, horizon + 1)
+    angle = 2 * np.pi * ((next_index + steps - 1) % SEASON) / SEASON
+    return np.column_stack([steps, np.sin(angle), np.cos(angle)])
+
+
+def feature_rows(origin_row, next_index, horizon):
+    """Matriz (horizonte × atributos) de uma origem para previsão direta"""
+    return np.column_stack([np.tile(origin_row, (horizon, 1)), horizon_features(next_index, horizon)])
+
+
+def latest_features(municipality, next_index, horizon):
+    """Atributos (doenças × horizonte × atributos) para prever a partir de next_index"""
+    start = next_index - LOOKBACK
+    _, cases = get_case_store().read(municipality, start, next_index)
+    _, climate = get_climate_store().read(municipality, start, next_index, CLIMATE_FEATURES)
+    origin = origin_features([cases[d] for d in DISEASES], [climate[v] for v in CLIMATE_FEATURES])
+    if not len(origin):
+        raise ValueError('Histórico insuficiente para os atributos')
+    return np.stack([feature_rows(origin[-1, d], next_index, horizon) for d in range(len(DISEASES))])
+
+
+def _digest(array):
+    return hashlib.blake2b(np.ascontiguousarray(array).tobytes(), digest_size=16).hexdigest()
+
+
+class FeatureStore:
+    """Cache em disco das matrizes de atributos por município (LRU por tamanho)"""
+
+    def __init__(self, directory=FEATURES_DIR, max_bytes=FEATURE_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.appends = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        config = {'version': FEATURE_VERSION, 'names': FEATURE_NAMES, 'lookback': LOOKBACK}
+        self.config_hash = hashlib.sha1(json.dumps(config).encode()).hexdigest()[:12]
+
+    def _paths(self, municipality, start):
+        key = f'{municipality}-{start}-{self.config_hash}'
+        base = os.path.join(self.directory, key)
+        return base + '.npy', base + '.json'
+
+    def _inputs(self, municipality, start, end):
+        _, cases = get_case_store().read(municipality, start, end)
+        _, climate = get_climate_store().read(municipality, start, end, CLIMATE_FEATURES)
+        return (np.stack([np.asarray(cases[d], dtype=np.float64) for d in DISEASES]),
+                np.stack([np.asarray(climate[v], dtype=np.float64) for v in CLIMATE_FEATURES]))
+
+    def origin_matrix(self, municipality, end):
+        """Atributos das origens até `end` (inclusive) de um município
+
+        Retorna (primeira_origem, array origens × doenças × atributos).
+        """
+        start = get_case_store().start_index
+        cases, climate = self._inputs(municipality, start, end)
+        data_path, meta_path = self._paths(municipality, start)
+        meta = self._read_meta(meta_path)
+
+        if meta is not None and start <= meta['end'] <= end \
+                and meta['digest'] == _digest(np.concatenate([cases, climate])[:, :meta['end'] - start]):
+            if meta['end'] == end:
+                self.hits += 1
+                FEATURE_CACHE.inc(result='hit')
+                os.utime(data_path)
+                return start + LOOKBACK, np.load(data_path, mmap_mode='r')
+            # Mesmo histórico com semanas novas: só as origens novas
+            self.appends += 1
+            FEATURE_CACHE.inc(result='append')
+            i0 = meta['end'] + 1 - LOOKBACK - start
+            new = origin_features(cases[:, i0:], climate[:, i0:])
+            matrix = np.concatenate([np.load(data_path), new.astype(np.float32)])
+        else:
+            self.misses += 1
+            FEATURE_CACHE.inc(result='miss')
+            matrix = origin_features(cases, climate).astype(np.float32)
+
+        self._write(data_path, meta_path, matrix, {
+            'municipality': municipality,
+            'start': start,
+            'end': end,
+            'digest': _digest(np.concatenate([cases, climate])),
+            'features': FEATURE_NAMES[:ORIGIN_FEATURES]
+        })
+        return start + LOOKBACK, matrix
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, data_path, meta_path, matrix, meta):
+        os.makedirs(self.directory, exist_ok=True)
+        # Escrita atômica: vários processos de treinamento compartilham o cache
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(data_path + suffix, 'wb') as f:
+            np.save(f, matrix)
+        os.replace(data_path + suffix, data_path)
+        with open(meta_path + suffix, 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+        self.evict()
+
+    def evict(self):
+        """Remove as matrizes menos usadas até o cache caber em max_bytes"""
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.directory) if n.endswith('.npy')]
+            except FileNotFoundError:
+                return 0
+            entries = []
+            for name in names:
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                base = os.path.join(self.directory, name[:-4])
+                for path in (base + '.npy', base + '.json'):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                removed += 1
+            return removed
+
+    def stats(self):
+        return {'hits': self.hits, 'appends': self.appends, 'misses': self.misses}
+
+
+feature_store = FeatureStore()
@@ -0,0 +1,572 @@
+"""Pipeline de ingestão (SINAN, InfoDengue) para as séries semanais
+
+As etapas são geradores encadeados que processam um bloco de linhas por vez:
+
+    fetch → parse → clean → aggregate → write
+
+Só um bloco fica em memória, então cargas históricas grandes não leem o CSV
+inteiro. O offset em bytes da fonte é salvo em um checkpoint (a cada
+bloco no InfoDengue; no SINAN, a cada CHECKPOINT_INTERVAL segundos e no fim
+da execução); uma execução interrompida retoma do último checkpoint.
+Fontes podem ser arquivos locais ou URLs HTTP (com Range para retomar).
+
+As gravações são idempotentes: o InfoDengue já traz totais semanais, e as
+contagens do SINAN acumuladas de cada fonte ficam no checkpoint dela, junto
+com o offset. Cada célula recebe a soma dos totais de todas as fontes
+SINAN, então blocos regravados após uma queda repetem os mesmos valores e
+uma fonte não apaga a contagem de outra. Entre processos, só o que obtém o
+lock de ingestão roda o agendador; com o preload do gunicorn ele parte nos
+workers (start_in_worker), nunca no processo mestre.
+
+    python -m src.services.ingestion sinan notificacoes.csv
+    python -m src.services.ingestion infodengue:dengue http://localhost:8000/to.csv
+"""
+import os
+import csv
+import json
+import time
+import glob
+import argparse
+import threading
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from src.services import epiweeks
+from src.services.metrics import INGESTION_RUNS
+from src.services.municipalities import MUNICIPALITIES
+from src.services.weekly_store import DATA_DIR, DISEASES, get_case_store, get_climate_store
+
+CHUNK_LINES = 50000
+# Intervalo mínimo (s) entre checkpoints do SINAN, que regravam os totais da fonte
+CHECKPOINT_INTERVAL = 60
+
+CHECKPOINT_DIR = os.environ.get('ARBOVIROSES_CHECKPOINT_DIR', os.path.join(DATA_DIR, 'checkpoints'))
+
+# Códigos CID-10 do SINAN (ID_AGRAVO, sem ponto) por doença
+SINAN_DISEASES = {
+    'A90': 'dengue',
+    'A920': 'chikungunya',
+    'A928': 'zika',
+    'A95': 'febre_amarela'
+}
+
+# Variáveis climáticas do InfoDengue mapeadas para a série climática
+INFODENGUE_CLIMATE = {
+    'tempmed': 'temperatura',
+    'umidmed': 'umidade'
+}
+
+EPOCH64 = np.datetime64(epiweeks.EPOCH.isoformat(), 'D')
+
+
+class FileSource:
+    """Arquivo CSV local lido linha a linha a partir de um offset"""
+
+    def __init__(self, path):
+        self.uri = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+
+    def lines(self, offset=0):
+        with open(self.uri, 'rb') as f:
+            f.seek(offset)
+            yield from f
+
+
+class HttpSource:
+    """CSV servido por HTTP, retomado com o cabeçalho Range"""
+
+    def __init__(self, url, timeout=60):
+        self.uri = url
+        self.name = os.path.splitext(os.path.basename(url.split('?')[0]))[0] or 'http'
+        self.timeout = timeout
+
+    def lines(self, offset=0):
+        request = urllib.request.Request(self.uri)
+        if offset:
+            request.add_header('Range', f'bytes={offset}-')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if offset and response.status != 206:
+                # Servidor sem suporte a Range: descarta o trecho já processado
+                remaining = offset
+                while remaining:
+                    skipped = len(response.read(min(remaining, 1 << 20)))
+                    if not skipped:
+                        return
+                    remaining -= skipped
+            yield from response
+
+
+def open_source(uri):
+    if uri.startswith(('http://', 'https://')):
+        return HttpSource(uri)
+    return FileSource(uri)
+
+
+class Checkpoint:
+    """Progresso de uma fonte: offset em bytes, cabeçalho e contadores
+
+    Os totais acumulados por célula (SINAN) vão em um .npz numerado pela
+    geração; o .json aponta para a geração válida e é trocado por último,
+    então offset e totais mudam juntos.
+    """
+
+    def __init__(self, name, directory=None):
+        self.name = name
+        self.directory = directory or CHECKPOINT_DIR
+        self.path = os.path.join(self.directory, f'{name}.json')
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {'offset': 0, 'header': None, 'rows': 0, 'rejected': 0, 'updated_at': None}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _totals_path(self, generation):
+        return f'{self.path[:-len(".json")]}.totals.{generation}.npz'
+
+    def load_totals(self, state):
+        """Totais (chaves de célula, casos) gravados com o estado"""
+        generation = state.get('totals_generation')
+        if generation is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        with np.load(self._totals_path(generation)) as totals:
+            return totals['keys'], totals['cases']
+
+    def save(self, state, totals=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        previous = state.get('totals_generation')
+        if totals is not None:
+            generation = (previous or 0) + 1
+            path = self._totals_path(generation)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, keys=totals[0], cases=totals[1])
+            os.replace(tmp_path, path)
+            state['totals_generation'] = generation
+
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        if totals is not None and previous is not None:
+            os.remove(self._totals_path(previous))
+
+    def reset(self):
+        for path in [self.path] + glob.glob(self._totals_path('*')):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def siblings(self, prefix):
+        """Checkpoints das outras fontes do mesmo formato (`prefix`-*.json)"""
+        for path in sorted(glob.glob(os.path.join(self.directory, f'{prefix}-*.json'))):
+            name = os.path.basename(path)[:-len('.json')]
+            if name != self.name:
+                yield Checkpoint(name, self.directory)
+
+
+def _decode(line):
+    try:
+        return line.decode('utf-8')
+    except UnicodeDecodeError:
+        # Exportações do SINAN costumam vir em latin-1
+        return line.decode('latin-1')
+
+
+def fetch(source, state, chunk_lines=CHUNK_LINES):
+    """Blocos de linhas brutas e o offset da fonte ao fim de cada bloco"""
+    offset = state['offset']
+    chunk = []
+    for line in source.lines(offset):
+        offset += len(line)
+        if state['header'] is None:
+            state['header'] = next(csv.reader([_decode(line).lstrip('\ufeff')]))
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_lines:
+            yield chunk, offset
+            chunk = []
+    if chunk:
+        yield chunk, offset
+
+
+def parse(chunks, state):
+    """Converte cada bloco em colunas {nome: [valores]}"""
+    for lines, offset in chunks:
+        header = state['header']
+        rows = [row for row in csv.reader(_decode(line) for line in lines) if row]
+        columns = {name: [row[i] if i < len(row) else '' for row in rows] for i, name in enumerate(header)}
+        yield columns, len(rows), offset
+
+
+def _week_indices(dates):
+    """Índices de semana epidemiológica para datas YYYY-MM-DD, YYYYMMDD ou DD/MM/YYYY"""
+    normalized = []
+    for value in dates:
+        value = value.strip()
+        if len(value) == 8 and value.isdigit():
+            value = f'{value[:4]}-{value[4:6]}-{value[6:]}'
+        elif len(value) == 10 and value[2] == '/':
+            value = f'{value[6:]}-{value[3:5]}-{value[:2]}'
+        normalized.append(value[:10] or 'NaT')
+    try:
+        days = np.array(normalized, dtype='datetime64[D]')
+    except ValueError:
+        days = np.array([_parse_day(v) for v in normalized], dtype='datetime64[D]')
+    valid = ~np.isnat(days)
+    weeks = np.full(len(days), -1, dtype=np.int64)
+    weeks[valid] = (days[valid] - EPOCH64).astype(np.int64) // 7
+    return weeks
+
+
+def _parse_day(value):
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+def _floats(values):
+    """Converte valores textuais em float, com NaN para vazios ou inválidos"""
+    out = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            out[i] = float(value)
+        except ValueError:
+            pass
+    return out
+
+
+def _municipality_codes(store):
+    """Código IBGE de 6 dígitos (usado no SINAN) → índice na série"""
+    return {
+        info['ibge'][:6]: store.municipality_index(slug)
+        for slug, info in MUNICIPALITIES.items() if slug in store.municipalities
+    }
+
+
+def _merge_totals(*totals):
+    """Soma totais (chaves de célula ordenadas, casos) de várias origens"""
+    keys = np.concatenate([t[0] for t in totals])
+    merged, inverse = np.unique(keys, return_inverse=True)
+    cases = np.zeros(len(merged), dtype=np.int64)
+    np.add.at(cases, inverse, np.concatenate([t[1] for t in totals]))
+    return merged, cases
+
+
+def _lookup(totals, keys):
+    """Casos de `totals` em cada chave (0 onde não há)"""
+    if not len(totals[0]):
+        return np.zeros(len(keys), dtype=np.int64)
+    i = np.minimum(np.searchsorted(totals[0], keys), len(totals[0]) - 1)
+    return np.where(totals[0][i] == keys, totals[1][i], 0)
+
+
+def _first_filled(primary, fallback):
+    """Valor de `primary` em cada linha, ou o de `fallback` quando vazio"""
+    if primary is None:
+        return fallback
+    return [p if p.strip() else f for p, f in zip(primary, fallback)]
+
+
+class SinanFormat:
+    """Notificações individuais do SINAN, contadas por semana de início dos sintomas"""
+
+    name = 'sinan'
+    # Acumula contagens entre blocos (os totais vão no checkpoint)
+    cumulative = True
+
+    def clean(self, columns, store):
+        codes = _municipality_codes(store)
+        dates = _first_filled(columns.get('DT_SIN_PRI'), columns['DT_NOTIFIC'])
+        m = np.array([codes.get(c.strip()[:6], -1) for c in columns['ID_MN_RESI']], dtype=np.intp)
+        d = np.array([_disease_index(c) for c in columns['ID_AGRAVO']], dtype=np.intp)
+        w = _week_indices(dates)
+        valid = (m >= 0) & (d >= 0) & (w >= 0) & (w <= epiweeks.current_index())
+        return {'m': m[valid], 'd': d[valid], 'w': w[valid]}, int((~valid).sum())
+
+    def aggregate(self, batch):
+        """Conta notificações por (município, doença, semana)"""
+        cells = np.stack([batch['m'], batch['d'], batch['w']])
+        unique, counts = np.unique(cells, axis=1, return_counts=True)
+        return {'m': unique[0], 'd': unique[1], 'w': unique[2], 'cases': counts}
+
+    def accumulate(self, batch, totals, others=None):
+        """Soma o bloco aos totais da fonte
+
+        O bloco passa a levar o total das suas células: o desta fonte mais o
+        das outras fontes SINAN (`others`), que escrevem nas mesmas células.
+        """
+        keys = (batch['m'] * len(DISEASES) + batch['d']) * (1 << 32) + batch['w']
+        totals = _merge_totals(totals, (keys, batch['cases']))
+        cases = _lookup(totals, keys)
+        if others is not None:
+            cases = cases + _lookup(others, keys)
+        return dict(batch, cases=cases), totals
+
+    def write(self, batch, case_store, climate_store):
+        return case_store.write(batch['m'], batch['d'], batch['w'], batch['cases'])
+
+
+def _disease_index(code):
+    code = code.strip().upper().replace('.', '')
+    for prefix, disease in SINAN_DISEASES.items():
+        if code.startswith(prefix):
+            return DISEASES.index(disease)
+    return -1
+
+
+class InfoDengueFormat:
+    """Totais semanais do InfoDengue (casos e clima) de uma doença"""
+
+    name = 'infodengue'
+    cumulative = False
+
+    def __init__(self, disease='dengue'):
+        if disease not in DISEASES:
+            raise ValueError(f'Doença desconhecida: {disease}')
+        self.disease = disease
+
+    def clean(self, columns, store):
+        codes = _municipality_codes(store)
+        m = np.array([codes.get(c.strip()[:6], -1) for c in columns['municipio_geocodigo']], dtype=np.intp)
+        w = _week_indices(columns['data_iniSE'])
+        cases = _floats(columns['casos'])
+        climate = {
+            variable: _floats(columns[key])
+            for key, variable in INFODENGUE_CLIMATE.items() if key in columns
+        }
+        valid = (m >= 0) & (w >= 0) & (w <= epiweeks.current_index()) & ~np.isnan(cases)
+        batch = {'m': m[valid], 'w': w[valid], 'cases': cases[valid].astype(np.int64),
+                 'climate': {k: v[valid] for k, v in climate.items()}}
+        return batch, int((~valid).sum())
+
+    def aggregate(self, batch):
+        """Mantém a última linha de cada (município, semana) do bloco"""
+        key = batch['m'] * (1 << 32) + batch['w']
+        _, last = np.unique(key[::-1], return_index=True)
+        keep = len(key) - 1 - last
+        return {'m': batch['m'][keep], 'w': batch['w'][keep], 'cases': batch['cases'][keep],
+                'climate': {k: v[keep] for k, v in batch['climate'].items()}}
+
+    def write(self, batch, case_store, climate_store):
+        d = np.full(len(batch['m']), case_store.variable_index(self.disease))
+        written = case_store.write(batch['m'], d, batch['w'], batch['cases'])
+        for variable, values in batch['climate'].items():
+            ok = ~np.isnan(values)
+            v = np.full(int(ok.sum()), climate_store.variable_index(variable))
+            climate_store.write(batch['m'][ok], v, batch['w'][ok], values[ok])
+        return written
+
+
+def make_format(spec):
+    """'sinan' ou 'infodengue[:doença]'"""
+    name, _, option = spec.partition(':')
+    if name == 'sinan':
+        return SinanFormat()
+    if name == 'infodengue':
+        return InfoDengueFormat(option or 'dengue')
+    raise ValueError(f'Formato desconhecido: {spec}')
+
+
+def clean(parsed, fmt, store, state):
+    for columns, rows, offset in parsed:
+        batch, rejected = fmt.clean(columns, store)
+        state['rows'] += rows
+        state['rejected'] += rejected
+        yield batch, offset
+
+
+def aggregate(cleaned, fmt):
+    for batch, offset in cleaned:
+        yield fmt.aggregate(batch), offset
+
+
+class IngestionPipeline:
+    """Executa fetch → parse → clean → aggregate → write para uma fonte"""
+
+    def __init__(self, source, fmt, case_store=None, climate_store=None,
+                 checkpoint=None, chunk_lines=CHUNK_LINES):
+        self.source = source
+        self.format = fmt
+        self.case_store = case_store or get_case_store()
+        self.climate_store = climate_store or get_climate_store()
+        self.checkpoint = checkpoint or Checkpoint(f'{fmt.name}-{source.name}')
+        self.chunk_lines = chunk_lines
+        self.last_run = None
+        self.last_success = None
+
+    def run(self):
+        """Processa a fonte a partir do checkpoint; retorna o estado final"""
+        state = self.checkpoint.load()
+        totals = others = None
+        if self.format.cumulative:
+            totals = self.checkpoint.load_totals(state)
+            others = self.other_totals()
+        self.last_run = datetime.now()
+
+        chunks = fetch(self.source, state, self.chunk_lines)
+        parsed = parse(chunks, state)
+        cleaned = clean(parsed, self.format, self.case_store, state)
+        saved_at, pending = time.monotonic(), False
+        for batch, offset in aggregate(cleaned, self.format):
+            if totals is not None:
+                batch, totals = self.format.accumulate(batch, totals, others)
+            self.format.write(batch, self.case_store, self.climate_store)
+            state['offset'] = offset
+            state['updated_at'] = datetime.now().isoformat()
+            pending = True
+            # Os totais crescem com a fonte: no SINAN o checkpoint é periódico
+            if totals is None or time.monotonic() - saved_at >= CHECKPOINT_INTERVAL:
+                self.checkpoint.save(state, totals)
+                saved_at, pending = time.monotonic(), False
+        if pending:
+            self.checkpoint.save(state, totals)
+
+        self.last_success = datetime.now()
+        return state
+
+    def other_totals(self):
+        """Totais somados das outras fontes do mesmo formato"""
+        totals = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))]
+        for checkpoint in self.checkpoint.siblings(self.format.name):
+            totals.append(checkpoint.load_totals(checkpoint.load()))
+        return _merge_totals(*totals)
+
+
+LOCK_PATH = os.path.join(CHECKPOINT_DIR, 'ingestion.lock')
+
+
+def try_lock(path):
+    """Lock exclusivo, sem espera, de um arquivo; retorna o arquivo aberto ou None
+
+    O lock dura enquanto o arquivo estiver aberto (e some com o processo).
+    Sem fcntl (Windows), não há exclusão entre processos.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, 'a')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class IngestionScheduler:
+    """Roda os pipelines periodicamente em uma thread de fundo
+
+    Com `lock_path`, só roda enquanto detém o lock exclusivo do arquivo; os
+    demais processos tentam de novo a cada intervalo e assumem se o dono
+    do lock terminar.
+    """
+
+    def __init__(self, pipelines, interval=3600, lock_path=None):
+        self.pipelines = pipelines
+        self.interval = interval
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.pipelines:
+            self._thread = threading.Thread(target=self._loop, name='ingestion', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def acquire(self):
+        """Obtém (ou confirma) o lock de ingestão entre processos"""
+        if self.lock_path is None or self._lock_file is not None:
+            return True
+        self._lock_file = try_lock(self.lock_path)
+        return self._lock_file is not None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self.acquire():
+                self._stop.wait(self.interval)
+                continue
+            for pipeline in self.pipelines:
+                try:
+                    pipeline.run()
+                    INGESTION_RUNS.inc(source=pipeline.source.name, result='success')
+                except Exception as e:
+                    INGESTION_RUNS.inc(source=pipeline.source.name, result='error')
+                    print(f"Erro na ingestão de {pipeline.source.uri}: {e}")
+            self._stop.wait(self.interval)
+
+
+scheduler = None
+_scheduler_lock = threading.Lock()
+# Com o preload do gunicorn, a inicialização roda no mestre: o agendador só
+# parte no worker, por start_in_worker() (post_worker_init)
+_in_workers = os.environ.get('ARBOVIROSES_INGEST_IN_WORKERS') == '1'
+
+
+def start_from_env():
+    """Inicia a ingestão configurada em ARBOVIROSES_INGEST_SOURCES
+
+    Cada processo cria o agendador, mas só o que detém o lock de ingestão
+    roda os pipelines. Formato: 'formato=uri' separados por ';', ex.:
+    'sinan=/dados/sinan.csv;infodengue:zika=http://localhost:8000/zika.csv'
+    """
+    global scheduler
+    spec = os.environ.get('ARBOVIROSES_INGEST_SOURCES', '').strip()
+    with _scheduler_lock:
+        if scheduler is None and spec:
+            pipelines = []
+            for item in filter(None, (s.strip() for s in spec.split(';'))):
+                fmt, _, uri = item.partition('=')
+                pipelines.append(IngestionPipeline(open_source(uri), make_format(fmt)))
+            scheduler = IngestionScheduler(pipelines, int(os.environ.get('ARBOVIROSES_INGEST_INTERVAL', 3600)),
+                                           lock_path=LOCK_PATH)
+        if scheduler is not None and not _in_workers:
+            scheduler.start()
+    return scheduler
+
+
+def start_in_worker():
+    """Parte o agendador no worker do gunicorn, já depois do fork"""
+    global _in_workers
+    _in_workers = False
+    return start_from_env()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingestão de dados nas séries semanais')
+    parser.add_argument('format', help="'sinan' ou 'infodengue[:doença]'")
+    parser.add_argument('source', help='arquivo CSV local ou URL HTTP')
+    parser.add_argument('--chunk-lines', type=int, default=CHUNK_LINES)
+    parser.add_argument('--reset', action='store_true',
+                        help='descarta o checkpoint e sobrescreve os casos já ingeridos')
+    args = parser.parse_args()
+
+    lock = try_lock(LOCK_PATH)
+    if lock is None:
+        parser.exit(1, f'Ingestão em andamento em outro processo ({LOCK_PATH})\n')
+
+    pipeline = IngestionPipeline(open_source(args.source), make_format(args.format),
+                                 chunk_lines=args.chunk_lines)
+    if args.reset:
+        # Recomeça do zero: as contagens da fonte substituem as já gravadas
+        pipeline.checkpoint.reset()
+        pipeline.case_store.clear_observed()
+
+    started = time.perf_counter()
+    state = pipeline.run()
+    print(json.dumps({**state, 'seconds': round(time.perf_counter() - started, 2)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Ciclo de vida dos sistemas do backend
+
+A inicialização (modelos, coletores, séries) roda uma única vez, em uma
+thread de fundo disparada na criação da aplicação. As requisições apenas
+consultam o estado, sem bloquear enquanto os modelos carregam.
+"""
+import os
+import threading
+import weakref
+from datetime import datetime
+from functools import wraps
+
+STARTING = 'starting'
+WARMING = 'warming'
+READY = 'ready'
+DEGRADED = 'degraded'
+FAILED = 'failed'
+
+# Segundos sugeridos ao cliente enquanto o sistema aquece
+RETRY_AFTER = 5
+
+
+# Ciclos de vida ativos no processo (reiniciados no filho após um fork)
+_instances = weakref.WeakSet()
+
+
+class SystemLifecycle:
+    """Inicialização única, protegida por lock, executada em segundo plano
+
+    `initializer` deve retornar um dicionário {nome: componente}; componentes
+    None são reportados como indisponíveis (estado `degraded`).
+    """
+
+    def __init__(self, name, initializer):
+        self.name = name
+        self.initializer = initializer
+        self.state = STARTING
+        self.components = {}
+        self.error = None
+        self.started_at = None
+        self.ready_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        _instances.add(self)
+
+    @property
+    def is_ready(self):
+        return self.state in (READY, DEGRADED)
+
+    @property
+    def is_warming(self):
+        return self.state in (STARTING, WARMING)
+
+    def attach(self, app):
+        """Registra o ciclo de vida na aplicação e dispara a inicialização"""
+        app.extensions.setdefault('lifecycles', []).append(self)
+        self.start()
+
+    def start(self, background=True):
+        """Dispara a inicialização; chamadas repetidas não têm efeito"""
+        with self._lock:
+            if self._thread is not None or self._done.is_set():
+                return
+            self.state = WARMING
+            self.started_at = datetime.now()
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-init', daemon=True)
+            if background:
+                self._thread.start()
+        if not background:
+            self._run()
+
+    def _run(self):
+        try:
+            self.components = self.initializer() or {}
+            missing = [name for name, component in self.components.items() if component is None]
+            self.state = DEGRADED if missing else READY
+        except Exception as e:
+            print(f"Erro ao inicializar sistemas: {e}")
+            self.error = str(e)
+            self.state = FAILED
+        finally:
+            self.ready_at = datetime.now()
+            self._done.set()
+
+    def _after_fork(self):
+        """No processo filho, retoma uma inicialização interrompida pelo fork"""
+        self._lock = threading.Lock()
+        if not self._done.is_set() and self._thread is not None:
+            self._thread = None
+            self.start()
+
+    def wait(self, timeout=None):
+        """Aguarda o fim da inicialização (usado no pré-carregamento)
+
+        Também aguarda a thread terminar: com o gevent, um fork logo depois,
+        com a thread ainda saindo, quebra o hub do worker.
+        """
+        done = self._done.wait(timeout)
+        if done and self._thread is not None and self._thread.ident is not None:
+            self._thread.join(timeout)
+        return done
+
+    def get(self, name):
+        return self.components.get(name)
+
+    def status(self):
+        """Estados de liveness/readiness para o /health"""
+        return {
+            'liveness': 'alive',
+            'readiness': self.state,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'ready_at': self.ready_at.isoformat() if self.ready_at else None,
+            'error': self.error,
+            'services': {name: component is not None for name, component in self.components.items()}
+        }
+
+
+def _restart_after_fork():
+    for lifecycle in list(_instances):
+        lifecycle._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def warming_response(lifecycle):
+    """Corpo e cabeçalhos da resposta 503 enquanto o sistema aquece"""
+    body = {
+        'status': 'warming',
+        'message': 'Sistema em inicialização, tente novamente em instantes',
+        'readiness': lifecycle.state
+    }
+    return body, 503, {'Retry-After': str(RETRY_AFTER)}
+
+
+def requires_ready(lifecycle):
+    """Decorator das rotas de dados: 503 com Retry-After enquanto `lifecycle` aquece
+
+    `lifecycle` também pode ser uma função que o retorna, resolvida a cada
+    requisição (quando depende da aplicação atual). Vai logo abaixo de
+    @route, acima do cache e da coalescência.
+    """
+    resolve = lifecycle if callable(lifecycle) else lambda: lifecycle
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current = resolve()
+            if current.is_warming:
+                return warming_response(current)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
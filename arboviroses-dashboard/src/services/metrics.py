@@ -0,0 +1,288 @@
+"""Métricas da aplicação no formato texto do Prometheus
+
+Contadores, histogramas e gauges simples, seguros entre threads, sem
+dependência externa. Os valores são por processo: com vários workers do
+gunicorn, cada scrape do /metrics vê o worker que atendeu (o rótulo `pid`
+identifica qual).
+
+init_app() registra a latência de cada requisição por endpoint (e loga as
+mais lentas que ARBOVIROSES_SLOW_REQUEST_MS) e expõe o GET /metrics, que,
+como o profiler, exige o cabeçalho X-Admin-Token. Gauges calculados na
+hora da coleta (defasagem da ingestão, idade das séries) são registrados
+com `collector`.
+"""
+import os
+import time
+import threading
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+import numpy as np
+from flask import Response, g, jsonify, request
+
+from src.services.profiler import is_admin
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Limites dos histogramas (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INFERENCE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# Requisições acima disso (ms) são registradas no log
+SLOW_REQUEST_MS = float(os.environ.get('ARBOVIROSES_SLOW_REQUEST_MS', 1000))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f'{self.name}: rótulos esperados {self.label_names}')
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}_total{_labels(self.label_names, k)} {_number(v)}' for k, v in items]
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_labels(self.label_names, k)} {_number(v)}' for k, v in items]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            # Contagem por faixa; a forma cumulativa é montada na coleta
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _labels(self.label_names + ('le',), key + (_number(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_number(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, function):
+        """Função chamada antes de cada coleta (atualiza gauges derivados)"""
+        with self._lock:
+            self._collectors.append(function)
+        return function
+
+    def render(self):
+        for function in list(self._collectors):
+            try:
+                function()
+            except Exception as e:
+                print(f"Erro ao coletar métricas em {function.__name__}: {e}")
+        lines = []
+        for metric in list(self._metrics):
+            samples = metric.samples()
+            if samples:
+                lines += metric.header() + samples
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'arboviroses_request_duration_seconds', 'Latência das requisições HTTP',
+    ('endpoint', 'method', 'status')
+)
+RESPONSE_CACHE = registry.counter(
+    'arboviroses_response_cache', 'Consultas ao cache de respostas', ('endpoint', 'result')
+)
+PREDICTION_CACHE = registry.counter(
+    'arboviroses_prediction_cache', 'Consultas às previsões memorizadas', ('result',)
+)
+INFERENCE_LATENCY = registry.histogram(
+    'arboviroses_inference_duration_seconds', 'Tempo de inferência por previsão', ('model',),
+    INFERENCE_BUCKETS
+)
+FEATURE_CACHE = registry.counter(
+    'arboviroses_feature_cache', 'Consultas ao cache de atributos', ('result',)
+)
+COALESCED = registry.counter(
+    'arboviroses_coalesced_requests', 'Requisições que calcularam (leader) ou reaproveitaram (follower)',
+    ('endpoint', 'result')
+)
+ADMISSION = registry.counter(
+    'arboviroses_admission', 'Decisões do controle de admissão', ('endpoint', 'result')
+)
+INFLIGHT = registry.gauge('arboviroses_inflight_computations', 'Execuções admitidas em andamento')
+INGESTION_LAG = registry.gauge(
+    'arboviroses_ingestion_lag_seconds', 'Tempo desde a última ingestão bem-sucedida', ('source',)
+)
+INGESTION_RUNS = registry.counter(
+    'arboviroses_ingestion_runs', 'Execuções dos pipelines de ingestão', ('source', 'result')
+)
+DATA_AGE = registry.gauge(
+    'arboviroses_series_age_seconds', 'Tempo desde a última gravação da série', ('series',)
+)
+DATA_LAG_WEEKS = registry.gauge(
+    'arboviroses_series_lag_weeks', 'Semanas entre a semana corrente e a última com dados ingeridos',
+    ('series',)
+)
+PROCESS_INFO = registry.gauge('arboviroses_process', 'Processo que respondeu à coleta', ('pid',))
+
+
+@registry.collector
+def collect_ingestion():
+    """Defasagem dos pipelines e das séries, calculada na hora da coleta"""
+    # Import tardio: a ingestão também registra métricas neste módulo
+    from src.services import epiweeks, ingestion
+    from src.services.weekly_store import get_case_store, get_climate_store
+
+    scheduler = ingestion.scheduler
+    for pipeline in (scheduler.pipelines if scheduler is not None else ()):
+        if pipeline.last_success is not None:
+            lag = (datetime.now() - pipeline.last_success).total_seconds()
+            INGESTION_LAG.set(round(lag, 3), source=pipeline.source.name)
+
+    now = datetime.now(timezone.utc)
+    current = epiweeks.current_index()
+    for store in (get_case_store(), get_climate_store()):
+        if store.updated_at is not None:
+            DATA_AGE.set(round((now - store.updated_at).total_seconds(), 3), series=store.name)
+        weeks = np.flatnonzero(store.observed.any(axis=(0, 1)))
+        if len(weeks):
+            DATA_LAG_WEEKS.set(int(current - store.start_index - weeks[-1]), series=store.name)
+
+
+@registry.collector
+def collect_process():
+    PROCESS_INFO.set(1, pid=os.getpid())
+
+
+def metrics_response():
+    if not is_admin():
+        return jsonify({'error': 'Métricas restritas a administradores'}), 403
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
+def init_app(app):
+    """Mede a latência de todas as requisições e expõe GET /metrics"""
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        REQUEST_LATENCY.observe(elapsed, endpoint=request.endpoint or 'not_found',
+                                method=request.method, status=response.status_code)
+        if elapsed * 1000 >= SLOW_REQUEST_MS:
+            app.logger.warning('Requisição lenta: %s %s %.0f ms (status %d)', request.method,
+                               request.full_path, elapsed * 1000, response.status_code)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics_response)
+    return app
@@ -0,0 +1,166 @@
+"""Cache de modelos e de previsões
+
+Os modelos treinados são carregados uma única vez e ficam residentes em
+memória. As previsões são memorizadas por (município, semana de referência,
+horizonte) e descartadas quando chegam dados novos (casos ou clima, inclusive
+gravados por outro processo) ou outra versão de modelo.
+
+Os coeficientes por município gerados pelo treinamento offline
+(src.services.training) são abertos em memory-map a partir da versão
+apontada por MODELS_DIR/CURRENT; uma versão nova publicada é trocada em
+execução, sem reiniciar os workers.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.services.feature_store import FEATURE_VERSION, latest_features
+from src.services.metrics import INFERENCE_LATENCY, PREDICTION_CACHE
+from src.services.series_engine import seasonal_forecast, MAX_HORIZON, SEASON
+from src.services.weekly_store import DATA_DIR, get_climate_store
+
+MODELS_DIR = os.environ.get('ARBOVIROSES_MODELS_DIR', os.path.join(DATA_DIR, 'models'))
+CURRENT_FILE = 'CURRENT'
+# Intervalo mínimo (s) entre verificações do ponteiro CURRENT
+ARTIFACT_CHECK_INTERVAL = 30
+
+
+def predict_linear(coefficients, features):
+    """features @ coeficientes (o último coeficiente é o intercepto)"""
+    return features @ coefficients[:-1] + coefficients[-1]
+
+
+class TrainedModels:
+    """Versão publicada dos modelos, com os coeficientes em memory-map"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('feature_version') != FEATURE_VERSION:
+            raise ValueError(f"Versão {self.manifest.get('version')} usa outro conjunto de atributos")
+        self.version = self.manifest['version']
+        self.coefficients = np.load(os.path.join(path, 'coefficients.npy'), mmap_mode='r')
+        self._index = {m: i for i, m in enumerate(self.manifest['municipalities'])}
+
+    def has(self, municipality):
+        return municipality in self._index
+
+    def predict(self, municipality, features):
+        """Previsão (doenças × horizonte) a partir de latest_features"""
+        coefficients = np.asarray(self.coefficients[self._index[municipality]])
+        return np.maximum(0, np.einsum('dhf,df->dh', features, coefficients[:, :-1]) + coefficients[:, -1:])
+
+
+class ArtifactWatcher:
+    """Acompanha o ponteiro CURRENT e carrega a versão apontada"""
+
+    def __init__(self, models_dir=MODELS_DIR, check_interval=ARTIFACT_CHECK_INTERVAL):
+        self.models_dir = models_dir
+        self.check_interval = check_interval
+        self.models = None
+        self._checked_at = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Retorna True se uma versão nova foi carregada
+
+        O disco é consultado no máximo a cada check_interval segundos.
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            pointer = os.path.join(self.models_dir, CURRENT_FILE)
+            try:
+                mtime = os.stat(pointer).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if mtime == self._mtime:
+                return False
+            try:
+                with open(pointer) as f:
+                    version = f.read().strip()
+                self.models = TrainedModels(os.path.join(self.models_dir, version))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Erro ao carregar modelos treinados: {e}")
+                return False
+            self._mtime = mtime
+            return True
+
+
+class ModelCache:
+    """Inferência em lote sobre os modelos residentes, com memorização"""
+
+    def __init__(self, max_entries=1024, artifacts=None):
+        self.max_entries = max_entries
+        self.artifacts = artifacts or ArtifactWatcher()
+        self.model_version = 0
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._memo.clear()
+
+    def refresh_artifacts(self):
+        """Troca para a versão de coeficientes publicada mais recente, se houver"""
+        if self.artifacts.poll():
+            with self._lock:
+                self.model_version += 1
+                self._memo.clear()
+            print(f"Modelos treinados carregados: {self.artifacts.models.version}")
+
+    @property
+    def trained_version(self):
+        models = self.artifacts.models
+        return models.version if models is not None else None
+
+    def predict(self, engine, city, horizon=MAX_HORIZON):
+        """Previsão das quatro doenças para as próximas `horizon` semanas
+
+        Retorna (indice_primeira_semana_prevista, array doenças × horizonte).
+        """
+        horizon = max(1, min(int(horizon), MAX_HORIZON))
+        self.refresh_artifacts()
+        # Os atributos dos modelos treinados também leem o clima
+        store, climate = engine.case_store, get_climate_store()
+        store.refresh()
+        climate.refresh()
+        as_of = store.end_index - 1
+        key = (city, as_of, horizon, store.version, climate.version, self.model_version)
+
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                PREDICTION_CACHE.inc(result='hit')
+                return self._memo[key]
+
+        PREDICTION_CACHE.inc(result='miss')
+        first, history = engine.disease_cases(city, SEASON + 12)
+        result = (first + history.shape[1], self._infer(history, first + history.shape[1], horizon, city))
+
+        with self._lock:
+            self._memo[key] = result
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return result
+
+    def _infer(self, history, next_index, horizon, city=None):
+        # Coeficientes do município > base sazonal
+        trained = self.artifacts.models
+        if trained is not None and trained.has(city):
+            try:
+                with INFERENCE_LATENCY.time(model='trained'):
+                    return trained.predict(city, latest_features(city, next_index, horizon))
+            except Exception as e:
+                print(f"Erro na predição com os modelos treinados: {e}")
+
+        with INFERENCE_LATENCY.time(model='seasonal'):
+            return seasonal_forecast(history, horizon)
@@ -0,0 +1,67 @@
+"""Cadastro dos municípios monitorados"""
+import os
+import csv
+
+# Municípios atendidos pelo dashboard (população: estimativa IBGE)
+MUNICIPALITIES = {
+    'teofilo_otoni': {
+        'name': 'Teófilo Otoni',
+        'ibge': '3168606',
+        'population': 140000,
+        'lat': -17.8575,
+        'lng': -41.5053,
+        'micro': 'teofilo_otoni',
+        'macro': 'nordeste'
+    },
+    'diamantina': {
+        'name': 'Diamantina',
+        'ibge': '3121605',
+        'population': 47000,
+        'lat': -18.2413,
+        'lng': -43.6031,
+        'micro': 'diamantina',
+        'macro': 'jequitinhonha'
+    }
+}
+
+DEFAULT_MUNICIPALITY = 'teofilo_otoni'
+STATE = 'mg'
+# Micro/macrorregião de saúde de municípios do CSV sem essas colunas
+UNKNOWN_REGION = 'nao_informada'
+
+# Cadastro estendido opcional (ex.: os 853 municípios de MG), uma linha por município:
+# slug,name,ibge,population,lat,lng[,micro,macro] (regiões de saúde, opcionais)
+REGISTRY_PATH = os.environ.get(
+    'ARBOVIROSES_MUNICIPALITIES',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'municipios_mg.csv')
+)
+
+
+def load_registry(path=REGISTRY_PATH):
+    """Acrescenta ao cadastro os municípios listados no CSV, se existir"""
+    if not os.path.exists(path):
+        return
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            MUNICIPALITIES.setdefault(row['slug'], {
+                'name': row['name'],
+                'ibge': row['ibge'],
+                'population': int(row['population']),
+                'lat': float(row['lat']),
+                'lng': float(row['lng']),
+                'micro': row.get('micro') or UNKNOWN_REGION,
+                'macro': row.get('macro') or UNKNOWN_REGION
+            })
+
+
+load_registry()
+
+
+def municipality_slugs():
+    """Lista dos identificadores dos municípios, na ordem do cadastro"""
+    return list(MUNICIPALITIES)
+
+
+def get_municipality(slug):
+    """Retorna o cadastro do município ou None"""
+    return MUNICIPALITIES.get(slug)
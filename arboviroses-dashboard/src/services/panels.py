@@ -0,0 +1,311 @@
+"""Painéis do dashboard montados a partir de resultados compartilhados
+
+Um PanelContext calcula cada resultado intermediário (casos das últimas
+semanas, clima atual, nível de alerta, previsão) uma única vez por
+requisição, mesmo com os painéis rodando em paralelo. As rotas individuais
+e o /dashboard-bundle usam as mesmas funções de painel.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from src.services import epiweeks
+from src.services.alert_store import alerts_version, current_status, list_alerts
+from src.services.climate_correlation import correlation_payload
+from src.services.epidemic_channel import get_channel, kpi_payload
+from src.services.model_cache import ModelCache
+from src.services.municipalities import MUNICIPALITIES
+from src.services.risk_map import get_region_table
+from src.services.risk_scoring import get_risk_scores, sync_alerts
+from src.services.rollup import get_rollup
+from src.services.serialization import json_response, rows
+from src.services.series_engine import get_series_engine
+from src.services.weekly_store import (
+    CLIMATE_VARIABLES, DISEASES, data_version, get_case_store, get_climate_store, historical_records,
+    parse_history_args, week_dates
+)
+
+# Semanas previstas no painel principal
+DASHBOARD_HORIZON = 4
+
+RECOMMENDATIONS = {
+    'baixo': [
+        "⚡ Manter vigilância epidemiológica ativa",
+        "🏠 Orientar população sobre prevenção",
+        "📊 Atualizar dados semanalmente"
+    ],
+    'medio': [
+        "⚡ ALERTA MÉDIO: Manter vigilância ativa",
+        "🔍 Intensificar monitoramento epidemiológico",
+        "💧 Verificar e eliminar criadouros do mosquito"
+    ],
+    'alto': [
+        "🚨 ALERTA ALTO: Acionar plano de contingência",
+        "🔍 Intensificar monitoramento de casos suspeitos",
+        "💧 Mutirão de eliminação de criadouros",
+        "🏥 Preparar a rede de atendimento"
+    ]
+}
+
+# Desempenho de referência dos modelos (validação)
+MODEL_PERFORMANCE = {'dengue': 0.82, 'zika': 0.75, 'chikungunya': 0.73, 'febre_amarela': 0.68}
+PREDICTION_ACCURACY = 0.78
+
+# Modelos usados quando a rota não fornece os seus (só a base sazonal)
+default_model_cache = ModelCache()
+
+
+class PanelContext:
+    """Resultados intermediários de um município, calculados sob demanda uma vez"""
+
+    def __init__(self, municipality='teofilo_otoni', model_cache=None):
+        self.municipality = municipality
+        self.model_cache = model_cache or default_model_cache
+        self.timestamp = datetime.now()
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def shared(self, name, compute):
+        """Valor de `name`, calculado por `compute()` só na primeira chamada"""
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._values:
+                self._values[name] = compute()
+        return self._values[name]
+
+    @property
+    def recent_cases(self):
+        """Casos das últimas 52 semanas: (primeira_semana, array doenças × semanas)"""
+        def compute():
+            end = epiweeks.current_index() + 1
+            first, columns = get_case_store().read(self.municipality, end - 52, end)
+            return first, np.stack([np.asarray(columns[d], dtype=np.int64) for d in DISEASES])
+        return self.shared('recent_cases', compute)
+
+    @property
+    def current_cases(self):
+        """Vetor de casos da semana corrente por doença"""
+        return self.shared('current_cases', lambda: dict(
+            zip(DISEASES, self.recent_cases[1][:, -1].tolist())
+        ))
+
+    @property
+    def total_cases_week(self):
+        return sum(self.current_cases.values())
+
+    @property
+    def climate(self):
+        def compute():
+            week = epiweeks.current_index()
+            _, columns = get_climate_store().read(self.municipality, week, week + 1)
+            return {v: round(float(columns[v][-1]), 1) for v in CLIMATE_VARIABLES}
+        return self.shared('climate', compute)
+
+    @property
+    def risk(self):
+        """Classificação do município na avaliação em lote (canal endêmico)"""
+        return self.shared('risk', lambda: get_risk_scores().municipality(self.municipality))
+
+    @property
+    def kpis(self):
+        """Indicadores (MA4, variação semanal, Rt, tendência) do índice do canal endêmico"""
+        return self.shared('kpis', lambda: kpi_payload(self.municipality))
+
+    def forecast(self, horizon):
+        """Previsão por doença: (primeira_semana, array doenças × horizonte)"""
+        return self.shared(('forecast', horizon), lambda: self.model_cache.predict(
+            get_series_engine(), self.municipality, horizon
+        ))
+
+    @property
+    def alert_status(self):
+        return self.shared('alert_status', lambda: current_status(self.municipality))
+
+
+def dashboard_panel(ctx):
+    first, forecast = ctx.forecast(DASHBOARD_HORIZON)
+    values = np.rint(forecast).astype(int).tolist()
+    level = ctx.risk['overall_risk']
+    return {
+        'timestamp': ctx.timestamp.isoformat(),
+        'municipality': ctx.municipality,
+        'current_cases': ctx.current_cases,
+        'predictions': dict(zip(DISEASES, values)),
+        'climate': ctx.climate,
+        'alert_level': level,
+        'risk_by_disease': ctx.risk['diseases'],
+        'recommendations': RECOMMENDATIONS[level],
+        'total_cases_week': ctx.total_cases_week,
+        'trend': ctx.kpis['trend'],
+        'kpis': ctx.kpis
+    }
+
+
+def predictions_table(ctx, weeks=DASHBOARD_HORIZON):
+    """Previsão em colunas: (datas, {week, doença: array})"""
+    first, forecast = ctx.forecast(weeks)
+    values = np.rint(forecast).astype(np.int64)
+    columns = {'week': np.arange(1, forecast.shape[1] + 1)}
+    columns.update(zip(DISEASES, values))
+    return week_dates(first, forecast.shape[1]), columns
+
+
+def predictions_panel(ctx, weeks=DASHBOARD_HORIZON):
+    return rows(*predictions_table(ctx, weeks))
+
+
+def statistics_panel(ctx):
+    # Ano e mês epidemiológicos da semana corrente, lidos do cubo de agregados
+    _, totals = get_rollup().summary('municipality', ctx.municipality)
+    year_totals = totals['year']
+    registry = MUNICIPALITIES[ctx.municipality]
+    updated_at = get_case_store().updated_at
+    return {
+        'total_cases_year': int(year_totals.sum()),
+        'total_cases_month': int(totals['month'].sum()),
+        'most_affected_disease': DISEASES[int(np.argmax(year_totals))],
+        'prediction_accuracy': PREDICTION_ACCURACY,
+        'data_sources': 3,
+        'last_update': (updated_at or ctx.timestamp).isoformat(),
+        'coverage_area': f"{registry['name']} - MG",
+        'population_monitored': registry['population'],
+        'active_alerts': ctx.alert_status['recent_alerts_count'],
+        'model_performance': MODEL_PERFORMANCE
+    }
+
+
+def statistics_version():
+    """Versão para o cache do /statistics: séries e resumos de alertas (active_alerts)"""
+    token, modified = data_version()
+    alerts, alerts_modified = alerts_version()
+    modified = max(filter(None, (modified, alerts_modified)), default=None)
+    return f'{token}.a{alerts}', modified
+
+
+def historical_panel(ctx):
+    query = parse_history_args({'municipality': ctx.municipality})
+    return historical_records(ctx.municipality, query['start'], query['end'], query['diseases'])
+
+
+def climate_correlation_panel(ctx):
+    return correlation_payload(ctx.municipality)
+
+
+def risk_map_panel(ctx):
+    regions = get_region_table()
+    return regions.records(regions.select(ctx.municipality))
+
+
+def alerts_panel(ctx):
+    sync_alerts()
+    recent_alerts, next_cursor = list_alerts(municipality=ctx.municipality)
+    return {'recent_alerts': recent_alerts, 'system_status': ctx.alert_status, 'next_cursor': next_cursor}
+
+
+def series_panel(ctx):
+    """Série casos/temperatura do gráfico principal (mesmo formato do /api/data)"""
+    return get_series_engine().series(ctx.municipality)
+
+
+def forecast_panel(ctx, last_weeks=12):
+    """Previsão total (mesmo formato do /api/predict)"""
+    first, forecast = get_series_engine().forecast([ctx.municipality], last_weeks=last_weeks)
+    return {
+        'dates': week_dates(first, forecast.shape[1]),
+        'prediction_weeks': np.rint(forecast[0]).astype(int).tolist(),
+        'last_weeks': last_weeks
+    }
+
+
+def kpis_panel(ctx):
+    return ctx.kpis
+
+
+def channel_panel(ctx):
+    """Canal endêmico do total de casos (último ano e semanas de previsão)"""
+    return get_channel().corridor(get_case_store().municipality_index(ctx.municipality))
+
+
+PANELS = {
+    'dashboard': dashboard_panel,
+    'historical': historical_panel,
+    'predictions': predictions_panel,
+    'climate_correlation': climate_correlation_panel,
+    'risk_map': risk_map_panel,
+    'alerts': alerts_panel,
+    'statistics': statistics_panel,
+    'series': series_panel,
+    'forecast': forecast_panel,
+    'kpis': kpis_panel,
+    'channel': channel_panel
+}
+# Painéis do carregamento inicial quando ?panels= não é informado
+DEFAULT_PANELS = ('dashboard', 'historical', 'predictions', 'climate_correlation',
+                  'risk_map', 'alerts', 'statistics')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Criado no primeiro uso, já no processo do worker (depois do fork)
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(os.environ.get('ARBOVIROSES_PANEL_THREADS', len(PANELS)))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='panel')
+    return _executor
+
+
+def parse_panels(value):
+    if not value:
+        return DEFAULT_PANELS
+    names = tuple(p.strip() for p in value.split(',') if p.strip())
+    unknown = [p for p in names if p not in PANELS]
+    if unknown:
+        raise ValueError(f"Painel desconhecido: {', '.join(unknown)}")
+    return names
+
+
+def build_bundle(ctx, app, names=DEFAULT_PANELS):
+    """Calcula os painéis em paralelo
+
+    Retorna ({painel: dados}, {painel: duração em ms}). Um painel com falha
+    vira {'error': ...} sem derrubar os demais.
+    """
+    def run(name):
+        started = time.perf_counter()
+        with app.app_context():
+            try:
+                result = PANELS[name](ctx)
+            except Exception as e:
+                result = {'error': str(e)}
+        return result, (time.perf_counter() - started) * 1000
+
+    futures = {name: _get_executor().submit(run, name) for name in names}
+    payload, timings = {}, {}
+    for name, future in futures.items():
+        payload[name], timings[name] = future.result()
+    return payload, timings
+
+
+def server_timing(timings, total=None):
+    """Valor do cabeçalho Server-Timing"""
+    entries = [f'{name};dur={duration:.1f}' for name, duration in timings.items()]
+    if total is not None:
+        entries.append(f'total;dur={total:.1f}')
+    return ', '.join(entries)
+
+
+def bundle_response(payload, timings, total):
+    """Resposta JSON única, comprimida conforme o Accept-Encoding"""
+    return json_response(payload, headers={'Server-Timing': server_timing(timings, total)})
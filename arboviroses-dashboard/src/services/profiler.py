@@ -0,0 +1,148 @@
+"""Profiler por amostragem sob demanda (?profile=1)
+
+Restrito a administradores: o cabeçalho X-Admin-Token precisa coincidir
+com ARBOVIROSES_ADMIN_TOKEN (sem a variável, o profiler fica desligado).
+Durante a requisição, uma thread amostra a pilha da thread que a atende e
+das threads dos painéis a cada ARBOVIROSES_PROFILE_INTERVAL_MS; a resposta
+é trocada pelas pilhas no formato "collapsed" (`f1;f2;f3 contagem` por
+linha), aceito por flamegraph.pl e pelo speedscope.
+
+Com ?profile=1&min_ms=N a resposta normal é mantida se a requisição levar
+menos que N ms, para capturar só as requisições lentas.
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, jsonify, make_response, request
+
+ADMIN_HEADER = 'X-Admin-Token'
+SAMPLE_INTERVAL = float(os.environ.get('ARBOVIROSES_PROFILE_INTERVAL_MS', 2)) / 1000
+# Threads amostradas além da que atende a requisição (prefixo do nome)
+WORKER_THREAD_PREFIXES = ('panel',)
+MAX_DEPTH = 128
+# Funções no topo da pilha de uma thread auxiliar ociosa (esperando tarefa)
+IDLE_FRAMES = ('wait', '_worker')
+
+
+def is_admin():
+    token = os.environ.get('ARBOVIROSES_ADMIN_TOKEN')
+    supplied = request.headers.get(ADMIN_HEADER, '')
+    return bool(token) and hmac.compare_digest(token.encode(), supplied.encode())
+
+
+def frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if os.sep + 'src' + os.sep in filename:
+        filename = 'src' + filename.rsplit(os.sep + 'src', 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ',')
+
+
+def collapse(frame, root):
+    """Pilha de `frame` (da base para o topo) como 'root;f1;f2'"""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join([root] + labels[::-1])
+
+
+class StackSampler:
+    """Amostra periodicamente as pilhas de uma thread e das threads auxiliares"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL, prefixes=WORKER_THREAD_PREFIXES):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.prefixes = prefixes
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            self.duration = time.perf_counter() - self.started
+        return self
+
+    def _targets(self):
+        targets = {self.thread_id: 'request'}
+        for thread in threading.enumerate():
+            if thread.name.startswith(self.prefixes):
+                targets[thread.ident] = thread.name
+        return targets
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, name in self._targets().items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                # Threads do pool paradas na fila não contam como trabalho
+                if ident != self.thread_id and frame.f_code.co_name in IDLE_FRAMES:
+                    continue
+                self.stacks[collapse(frame, name)] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def init_app(app):
+    """Ativa o ?profile=1 (somente administradores) em todas as rotas"""
+
+    @app.before_request
+    def start_profiler():
+        if request.args.get('profile') != '1':
+            return None
+        if not is_admin():
+            return jsonify({'error': 'Profiler restrito a administradores'}), 403
+        try:
+            g.profile_min_ms = float(request.args.get('min_ms', 0))
+        except ValueError:
+            return jsonify({'error': "'min_ms' deve ser numérico"}), 400
+        g.profiler = StackSampler(threading.get_ident()).start()
+        return None
+
+    @app.after_request
+    def finish_profiler(response):
+        sampler = g.get('profiler')
+        if sampler is None:
+            return response
+        sampler.stop()
+        duration_ms = sampler.duration * 1000
+        if duration_ms < g.pop('profile_min_ms', 0):
+            response.headers['X-Profile-Skipped'] = f'{duration_ms:.1f}ms'
+            return response
+
+        app.logger.warning('Perfil de %s: %.1f ms, %d amostras', request.full_path, duration_ms,
+                           sampler.samples)
+        profiled = make_response(sampler.collapsed())
+        profiled.mimetype = 'text/plain'
+        profiled.headers['X-Profile-Duration-Ms'] = f'{duration_ms:.1f}'
+        profiled.headers['X-Profile-Samples'] = str(sampler.samples)
+        profiled.headers['X-Profile-Status'] = str(response.status_code)
+        profiled.headers['Cache-Control'] = 'no-store'
+        return profiled
+
+    @app.teardown_request
+    def stop_profiler(error=None):
+        # Roda mesmo quando o handler levanta exceção (o after_request não)
+        sampler = g.pop('profiler', None)
+        if sampler is not None:
+            sampler.stop()
+
+    return app
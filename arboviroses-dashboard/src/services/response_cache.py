@@ -0,0 +1,177 @@
+"""Cache de respostas HTTP com ETag/Last-Modified
+
+As respostas são guardadas por (endpoint, parâmetros, formato e compressão
+negociados, versão dos dados). O ETag forte deriva dessa mesma chave e traz
+a variante negociada, então um `If-None-Match` válido é respondido com 304
+antes de qualquer processamento, com o mesmo Vary da resposta completa.
+
+O backend padrão é um LRU com TTL em memória; defina
+ARBOVIROSES_CACHE_URL=redis://... para usar um Redis (ou compatível)
+local, compartilhado entre os workers.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+from src.services.metrics import RESPONSE_CACHE
+from src.services.serialization import cache_variant, vary_headers
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Tempo de vida no cache do servidor e max-age enviado ao cliente (segundos)
+DEFAULT_TTL = 300
+DEFAULT_MAX_AGE = 30
+
+
+class LRUCache:
+    """Cache em memória com política LRU e expiração por TTL"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """Backend Redis para compartilhar o cache entre processos"""
+
+    def __init__(self, url, prefix='arboviroses:'):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            return self.client.get(self.prefix + key)
+        except redis.RedisError as e:
+            print(f"Erro ao ler do cache: {e}")
+            return None
+
+    def set(self, key, value, ttl):
+        try:
+            self.client.setex(self.prefix + key, ttl, value)
+        except redis.RedisError as e:
+            print(f"Erro ao gravar no cache: {e}")
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+def create_backend(url=None):
+    """Escolhe o backend a partir de ARBOVIROSES_CACHE_URL"""
+    url = url or os.environ.get('ARBOVIROSES_CACHE_URL')
+    if url and redis is not None:
+        return RedisCache(url)
+    if url:
+        print("Pacote redis não instalado; usando cache em memória")
+    return LRUCache()
+
+
+backend = create_backend()
+
+
+def _encode(response):
+    meta = {
+        'status': response.status_code,
+        'mimetype': response.mimetype,
+        'content_encoding': response.content_encoding,
+        'vary': sorted(response.vary)
+    }
+    return json.dumps(meta).encode() + b'\n' + response.get_data()
+
+
+def _decode(value):
+    header, body = value.split(b'\n', 1)
+    meta = json.loads(header)
+    response = make_response(body, meta['status'])
+    response.mimetype = meta['mimetype']
+    response.content_encoding = meta.get('content_encoding')
+    response.vary.update(meta.get('vary', ()))
+    return response
+
+
+def _request_key(version, variant):
+    # O formato e a compressão negociados também diferenciam as respostas
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'{request.endpoint}|{request.view_args}|{args}|{variant}|{version}'
+
+
+def cached_response(version, ttl=DEFAULT_TTL, max_age=DEFAULT_MAX_AGE):
+    """Decorator de cache para views que retornam JSON
+
+    `version` é uma função sem argumentos que retorna (token, last_modified);
+    o token muda sempre que os dados subjacentes mudam.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            token, last_modified = version()
+            variant = cache_variant()
+            key = _request_key(token, variant)
+            etag = f'{hashlib.sha1(key.encode()).hexdigest()}-{variant}'
+
+            def finalize(response):
+                response.set_etag(etag)
+                response.vary.update(vary_headers())
+                if last_modified is not None:
+                    response.last_modified = last_modified
+                response.cache_control.public = True
+                response.cache_control.max_age = max_age
+                return response
+
+            if request.if_none_match.contains(etag):
+                RESPONSE_CACHE.inc(endpoint=request.endpoint, result='not_modified')
+                return finalize(make_response('', 304))
+            if (not request.if_none_match and last_modified is not None
+                    and request.if_modified_since
+                    and last_modified.replace(microsecond=0) <= request.if_modified_since):
+                RESPONSE_CACHE.inc(endpoint=request.endpoint, result='not_modified')
+                return finalize(make_response('', 304))
+
+            # Requisições com ?profile=1 medem o handler, não o cache
+            cached = backend.get(key) if request.args.get('profile') != '1' else None
+            if cached is not None:
+                RESPONSE_CACHE.inc(endpoint=request.endpoint, result='hit')
+                return finalize(_decode(cached))
+            RESPONSE_CACHE.inc(endpoint=request.endpoint, result='miss')
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            backend.set(key, _encode(response), ttl)
+            return finalize(response)
+        return wrapper
+    return decorator
@@ -0,0 +1,277 @@
+"""Regiões (bairros) do mapa de risco em formato colunar
+
+Casos e população ficam em arrays NumPy, então incidência por 100 mil
+habitantes e nível de risco saem de uma operação vetorizada. A busca por
+área usa um índice em grade e os tiles GeoJSON usam geometrias
+simplificadas conforme o zoom.
+
+Os casos das regiões vêm dos casos da semana corrente do município (todas
+as doenças), repartidos pela população com um risco relativo
+determinístico por região: a soma das regiões é sempre o total do painel.
+"""
+import os
+import json
+import math
+import threading
+import zlib
+
+import numpy as np
+
+from src.services import epiweeks
+from src.services.simulation import SIM_SEED, hash_normal
+from src.services.spatial_index import GridIndex, simplify, tile_bounds, tolerance_for_zoom
+from src.services.weekly_store import data_version, get_case_store
+
+# Bairros de Teófilo Otoni usados quando não há cadastro em regions.geojson
+BUILTIN_REGIONS = [
+    {'municipality': 'teofilo_otoni', 'region': 'Centro', 'lat': -17.8644, 'lng': -41.5056,
+     'cases': 45, 'population': 15000},
+    {'municipality': 'teofilo_otoni', 'region': 'Altino Barbosa', 'lat': -17.8700, 'lng': -41.5100,
+     'cases': 28, 'population': 12000},
+    {'municipality': 'teofilo_otoni', 'region': 'São Jacinto', 'lat': -17.8600, 'lng': -41.5000,
+     'cases': 12, 'population': 8000},
+    {'municipality': 'teofilo_otoni', 'region': 'Grão Pará', 'lat': -17.8750, 'lng': -41.5150,
+     'cases': 32, 'population': 10000},
+    {'municipality': 'teofilo_otoni', 'region': 'Vila Solidária', 'lat': -17.8580, 'lng': -41.4980,
+     'cases': 38, 'population': 9000}
+]
+
+# Cadastro opcional: FeatureCollection com propriedades municipality, region, population
+REGIONS_PATH = os.environ.get(
+    'ARBOVIROSES_REGIONS',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'regions.geojson')
+)
+
+# Limites de incidência semanal por 100 mil habitantes: baixo < 100 <= medio < 300 <= alto
+RISK_THRESHOLDS = (100, 300)
+RISK_LEVELS = np.array(['baixo', 'medio', 'alto'])
+
+# Desvio (escala log) do risco relativo entre regiões de um município
+REGION_RISK_SPREAD = 0.5
+
+# Faixa de zoom com geometrias pré-simplificadas
+MIN_ZOOM = 8
+MAX_ZOOM = 16
+
+
+def _rings(geometry):
+    """Anéis externos de um Polygon/MultiPolygon"""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates'][0]]
+    if geometry['type'] == 'MultiPolygon':
+        return [polygon[0] for polygon in geometry['coordinates']]
+    return []
+
+
+def load_regions(path=REGIONS_PATH):
+    """Lê as regiões do GeoJSON; sem arquivo, usa os bairros embutidos"""
+    if not os.path.exists(path):
+        return [dict(r, geometry=None) for r in BUILTIN_REGIONS]
+
+    with open(path, encoding='utf-8') as f:
+        collection = json.load(f)
+
+    regions = []
+    for feature in collection['features']:
+        props, geometry = feature['properties'], feature['geometry']
+        if geometry['type'] == 'Point':
+            lng, lat = geometry['coordinates']
+            geometry = None
+        else:
+            points = np.concatenate([np.asarray(r) for r in _rings(geometry)])
+            lng, lat = points.mean(axis=0)
+        regions.append({
+            'municipality': props['municipality'],
+            'region': props['region'],
+            'lat': float(lat),
+            'lng': float(lng),
+            'cases': int(props.get('cases', 0)),
+            'population': int(props['population']),
+            'geometry': geometry
+        })
+    return regions
+
+
+class RegionTable:
+    """Tabela colunar de regiões com índice espacial"""
+
+    def __init__(self, regions):
+        self.names = [r['region'] for r in regions]
+        self.municipalities = np.array([r['municipality'] for r in regions])
+        self.lat = np.array([r['lat'] for r in regions], dtype=np.float64)
+        self.lng = np.array([r['lng'] for r in regions], dtype=np.float64)
+        self.population = np.array([r['population'] for r in regions], dtype=np.int64)
+        self.cases = np.array([r['cases'] for r in regions], dtype=np.int64)
+        self.geometries = [r['geometry'] for r in regions]
+        self.version = 0
+        self.synced_token = None
+        self._simplified = {}
+        self._lock = threading.Lock()
+
+        bounds = []
+        for i, geometry in enumerate(self.geometries):
+            if geometry is None:
+                bounds.append((self.lng[i], self.lat[i], self.lng[i], self.lat[i]))
+            else:
+                points = np.concatenate([np.asarray(r) for r in _rings(geometry)])
+                bounds.append((*points.min(axis=0), *points.max(axis=0)))
+        self.index = GridIndex(bounds)
+
+    def __len__(self):
+        return len(self.names)
+
+    def update_cases(self, cases):
+        """Substitui a coluna de casos (mesma ordem das regiões)"""
+        with self._lock:
+            self.cases = np.asarray(cases, dtype=np.int64)
+            self.version += 1
+
+    def incidence(self):
+        """Incidência por 100 mil habitantes de todas as regiões"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.population > 0, self.cases * 1e5 / self.population, 0.0)
+
+    def risk_levels(self, incidence=None):
+        incidence = self.incidence() if incidence is None else incidence
+        return RISK_LEVELS[np.digitize(incidence, RISK_THRESHOLDS)]
+
+    def select(self, municipality=None, bbox=None):
+        """Índices das regiões de um município e/ou dentro de um bbox"""
+        idx = np.arange(len(self)) if bbox is None else self.index.query(*bbox)
+        if municipality is not None:
+            idx = idx[self.municipalities[idx] == municipality]
+        return idx
+
+    def records(self, idx):
+        """Linhas no formato do /risk-map"""
+        incidence = self.incidence()[idx]
+        levels = self.risk_levels(incidence)
+        return [
+            {
+                'region': self.names[i],
+                'municipality': str(self.municipalities[i]),
+                'lat': float(self.lat[i]),
+                'lng': float(self.lng[i]),
+                'risk_level': str(level),
+                'cases': int(self.cases[i]),
+                'population': int(self.population[i]),
+                'incidence': round(float(inc), 1)
+            }
+            for i, inc, level in zip(idx, incidence, levels)
+        ]
+
+    def _geometry(self, i, zoom):
+        geometry = self.geometries[i]
+        if geometry is None:
+            return {'type': 'Point', 'coordinates': [float(self.lng[i]), float(self.lat[i])]}
+        if zoom is None:
+            return geometry
+
+        zoom = max(MIN_ZOOM, min(zoom, MAX_ZOOM))
+        simplified = self._simplified.setdefault(zoom, {})
+        if i not in simplified:
+            tolerance = tolerance_for_zoom(zoom)
+            polygons = [[simplify(ring, tolerance).tolist()] for ring in _rings(geometry)]
+            simplified[i] = (
+                {'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1
+                else {'type': 'MultiPolygon', 'coordinates': polygons}
+            )
+        return simplified[i]
+
+    def features(self, idx, zoom=None):
+        """FeatureCollection GeoJSON das regiões, simplificada para o zoom"""
+        return {
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature', 'geometry': self._geometry(i, zoom), 'properties': record}
+                for i, record in zip(idx, self.records(idx))
+            ]
+        }
+
+    def tile(self, z, x, y):
+        """FeatureCollection com as regiões visíveis no tile XYZ"""
+        return self.features(self.select(bbox=tile_bounds(z, x, y)), zoom=z)
+
+
+def allocate_cases(total, weights):
+    """Reparte `total` casos proporcionalmente aos pesos (maiores restos)"""
+    weights = np.asarray(weights, dtype=np.float64)
+    if total <= 0 or weights.sum() <= 0:
+        return np.zeros(len(weights), dtype=np.int64)
+    quota = total * weights / weights.sum()
+    cases = np.floor(quota).astype(np.int64)
+    remainder = int(total - cases.sum())
+    # Desempate estável pela ordem das regiões
+    cases[np.argsort(-(quota - cases), kind='stable')[:remainder]] += 1
+    return cases
+
+
+def relative_risk(names, week, seed=SIM_SEED):
+    """Risco relativo log-normal por região, determinístico por semana"""
+    keys = np.array([zlib.crc32(f'{seed}:{name}'.encode()) for name in names], dtype=np.uint64)
+    spread = REGION_RISK_SPREAD
+    return np.exp(spread * hash_normal(keys, week, 200) - spread ** 2 / 2)
+
+
+def sync_region_cases(table):
+    """Atualiza os casos das regiões a partir da série de casos, se ela mudou"""
+    store = get_case_store()
+    token, _ = data_version()
+    if table.synced_token == token:
+        return table
+    with _sync_lock:
+        if table.synced_token == token:
+            return table
+        week = epiweeks.current_index()
+        cases = table.cases.copy()
+        for municipality in np.unique(table.municipalities):
+            if municipality not in store.municipalities:
+                continue
+            _, columns = store.read(str(municipality), week, week + 1)
+            total = sum(int(columns[d][-1]) for d in store.variables)
+            idx = np.flatnonzero(table.municipalities == municipality)
+            weights = table.population[idx] * relative_risk([table.names[i] for i in idx], week)
+            cases[idx] = allocate_cases(total, weights)
+        if not np.array_equal(cases, table.cases):
+            table.update_cases(cases)
+        table.synced_token = token
+    return table
+
+
+_regions = None
+_regions_lock = threading.Lock()
+_sync_lock = threading.Lock()
+
+
+def get_region_table():
+    """Tabela de regiões com os casos da semana corrente"""
+    global _regions
+    if _regions is None:
+        with _regions_lock:
+            if _regions is None:
+                _regions = RegionTable(load_regions())
+    return sync_region_cases(_regions)
+
+
+def risk_map_version():
+    """Versão para o cache: séries e coluna de casos das regiões"""
+    token, modified = data_version()
+    return f'{token}.r{get_region_table().version}', modified
+
+
+def parse_bbox(value):
+    """Converte 'minLng,minLat,maxLng,maxLat' em tupla de floats
+
+    Valores não finitos são rejeitados; os limites são cortados em
+    longitude [-180, 180] e latitude [-90, 90].
+    """
+    try:
+        bbox = tuple(float(v) for v in value.split(','))
+    except ValueError:
+        bbox = ()
+    if (len(bbox) != 4 or not all(math.isfinite(v) for v in bbox)
+            or bbox[0] > bbox[2] or bbox[1] > bbox[3]):
+        raise ValueError("bbox deve ser 'minLng,minLat,maxLng,maxLat'")
+    min_lng, max_lng = (min(max(v, -180.0), 180.0) for v in (bbox[0], bbox[2]))
+    min_lat, max_lat = (min(max(v, -90.0), 90.0) for v in (bbox[1], bbox[3]))
+    return min_lng, min_lat, max_lng, max_lat
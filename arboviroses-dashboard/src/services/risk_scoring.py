@@ -0,0 +1,173 @@
+"""Classificação de risco em lote (municípios × doenças × semanas)
+
+Para cada semana avaliada, o canal endêmico é formado pelos quartis da
+incidência por 100 mil habitantes nas mesmas semanas epidemiológicas
+(±2 semanas) das temporadas anteriores. Tudo sai de uma única passagem
+NumPy sobre a série de casos:
+
+- incidência <= mediana: baixo
+- mediana < incidência <= 3º quartil: medio (zona de alerta)
+- incidência > 3º quartil: alto (zona epidêmica)
+
+Os resultados ficam em memória (consultados pelo dashboard) e os alertas
+medio/alto são gravados em lote no alert_store.
+"""
+import threading
+from datetime import datetime, time
+
+import numpy as np
+
+from src.models.alert import RISK_NAMES
+from src.services import epiweeks
+from src.services.alert_store import record_alerts
+from src.services.epidemic_channel import (
+    CORRIDOR_HALF_WIDTH, CORRIDOR_YEARS, SEASON, corridor_quartiles, corridor_years, get_channel
+)
+from src.services.municipalities import MUNICIPALITIES
+from src.services.weekly_store import DISEASES, get_case_store, week_dates
+
+# Semanas recentes classificadas a cada avaliação
+SCORED_WEEKS = 4
+
+
+class RiskScores:
+    """Resultado de uma avaliação: arrays municípios × doenças × semanas"""
+
+    def __init__(self, municipalities, first_week, cases, incidence, thresholds, levels, version):
+        self.municipalities = municipalities
+        self.first_week = first_week
+        self.cases = cases
+        self.incidence = incidence
+        self.thresholds = thresholds  # (quartil 1, mediana, quartil 3) × M × D × W
+        self.levels = levels
+        self.version = version
+        self._index = {m: i for i, m in enumerate(municipalities)}
+
+    @property
+    def overall(self):
+        """Nível por município na semana mais recente (maior entre as doenças)"""
+        return self.levels[:, :, -1].max(axis=1)
+
+    def municipality(self, slug, week=-1):
+        """Classificação de um município: {overall_risk, diseases: {...}}"""
+        m = self._index[slug]
+        diseases = {
+            disease: {
+                'cases': int(self.cases[m, d, week]),
+                'incidence': round(float(self.incidence[m, d, week]), 2),
+                'risk_level': RISK_NAMES[int(self.levels[m, d, week])],
+                'epidemic_threshold': round(float(self.thresholds[2, m, d, week]), 2)
+            }
+            for d, disease in enumerate(DISEASES)
+        }
+        return {
+            'municipality': slug,
+            'week': week_dates(self.first_week + week % self.levels.shape[2], 1)[0],
+            'overall_risk': RISK_NAMES[int(self.levels[m, :, week].max())],
+            'alert_level': int(self.levels[m, :, week].max()),
+            'diseases': diseases
+        }
+
+    def alerts(self):
+        """Alertas (medio/alto) da semana mais recente, prontos para o alert_store"""
+        week = self.first_week + self.levels.shape[2] - 1
+        timestamp = datetime.combine(epiweeks.index_date(week), time())
+        alerts = []
+        for m in np.flatnonzero(self.overall > 0):
+            slug = self.municipalities[m]
+            scored = self.municipality(slug)
+            alerts.append({
+                'id': f'alert_{slug}_{timestamp.strftime("%Y%m%d")}_{scored["overall_risk"]}',
+                'municipality': slug,
+                'timestamp': timestamp,
+                'risk_level': scored['overall_risk'],
+                'alert_level': scored['alert_level'],
+                'diseases': {d: v for d, v in scored['diseases'].items() if v['risk_level'] != 'baixo'}
+            })
+        return alerts
+
+
+def score(cases, population, first_week, years=CORRIDOR_YEARS, corridor=None):
+    """Classifica as últimas semanas de `cases` (municípios × doenças × semanas)
+
+    `first_week` é o índice da primeira coluna de `cases`. As semanas
+    classificadas são as que têm `years` temporadas anteriores disponíveis,
+    limitadas às SCORED_WEEKS finais. `corridor` são os quartis já calculados
+    (em casos) dessas semanas, se houver. Retorna (primeira_semana_classificada,
+    casos, incidência, quartis, níveis).
+    """
+    cases = np.asarray(cases)
+    total = cases.shape[2]
+    years = corridor_years(total, years)
+    history = SEASON * years + CORRIDOR_HALF_WIDTH
+    scored = max(1, min(SCORED_WEEKS, total - history))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_100k = np.where(population > 0, 1e5 / population, 0.0)[:, None, None]
+
+    weeks = np.arange(total - scored, total)
+    if corridor is None:
+        corridor = corridor_quartiles(cases, weeks, years)
+    thresholds = corridor * per_100k
+
+    current = cases[:, :, weeks]
+    incidence = current * per_100k
+    levels = (incidence > thresholds[1]).astype(np.int8)
+    levels[(incidence > thresholds[2]) & (current > 0)] = 2
+    return first_week + weeks[0], current, incidence, thresholds, levels
+
+
+def score_store(store=None, years=CORRIDOR_YEARS):
+    """Avalia todos os municípios da série de casos até a semana corrente"""
+    store = store or get_case_store()
+    end = min(store.end_index, epiweeks.current_index() + 1)
+    start = max(store.start_index, end - SEASON * years - CORRIDOR_HALF_WIDTH - SCORED_WEEKS)
+    data = store.data[:, :, start - store.start_index:end - store.start_index]
+    population = np.array(
+        [MUNICIPALITIES.get(m, {}).get('population', 0) for m in store.municipalities], dtype=np.float64
+    )
+    # Quartis das semanas avaliadas vêm do índice do canal endêmico
+    scored = max(1, min(SCORED_WEEKS, data.shape[2] - SEASON * corridor_years(data.shape[2], years)
+                        - CORRIDOR_HALF_WIDTH))
+    try:
+        corridor = get_channel().thresholds(end - scored, scored)
+    except ValueError:
+        corridor = None
+    first, cases, incidence, thresholds, levels = score(data, population, start, years, corridor)
+    return RiskScores(store.municipalities, first, cases, incidence, thresholds, levels,
+                      (store.version, end))
+
+
+_scores = None
+_persisted_version = None
+_scores_lock = threading.Lock()
+
+
+def get_risk_scores():
+    """Classificação atual, recalculada só quando a série de casos muda"""
+    global _scores
+    store = get_case_store()
+    version = (store.version, min(store.end_index, epiweeks.current_index() + 1))
+    if _scores is None or _scores.version != version:
+        with _scores_lock:
+            if _scores is None or _scores.version != version:
+                _scores = score_store(store)
+    return _scores
+
+
+def sync_alerts():
+    """Grava em lote os alertas da classificação atual (uma vez por versão)
+
+    Precisa de contexto de aplicação (banco). Alertas já gravados por outro
+    worker são ignorados pelo alert_store.
+    """
+    global _persisted_version
+    scores = get_risk_scores()
+    if _persisted_version == scores.version:
+        return 0
+    with _scores_lock:
+        if _persisted_version == scores.version:
+            return 0
+        inserted = record_alerts(scores.alerts())
+        _persisted_version = scores.version
+    return inserted
@@ -0,0 +1,252 @@
+"""Cubo de agregados de casos (tempo × geografia × doença)
+
+Níveis de tempo: semana → mês → ano epidemiológico (a semana entra no mês
+e no ano da sua quarta-feira). Níveis geográficos: município →
+microrregião de saúde → macrorregião → estado. Cada combinação de níveis
+é um array (regiões, doenças, períodos) com os totais já somados, então
+o /statistics e as consultas de drill-down são leituras de uma célula.
+
+O cubo acompanha a série de casos: semanas novas são somadas ao final e
+cada gravação da ingestão chega como deltas (valor novo - anterior) das
+células alteradas. Se a série mudou por fora (outro processo), o cubo é
+reconstruído a partir dela.
+"""
+import threading
+
+import numpy as np
+
+from src.services import epiweeks
+from src.services.municipalities import MUNICIPALITIES, STATE
+from src.services.weekly_store import DISEASES, get_case_store
+
+LEVELS = ('municipality', 'micro', 'macro', 'state')
+GRAINS = ('week', 'month', 'year')
+# Períodos alocados a mais quando um array precisa crescer
+HEADROOM = {'week': 52, 'month': 12, 'year': 1}
+
+
+class UnknownRegion(Exception):
+    """Região inexistente no nível geográfico pedido"""
+
+
+def week_periods(weeks):
+    """Mês (meses desde 1970) e ano epidemiológico de cada índice de semana"""
+    epoch = np.datetime64(epiweeks.EPOCH.isoformat(), 'D')
+    wednesday = epoch + (np.asarray(weeks) * 7 + 3).astype('timedelta64[D]')
+    months = wednesday.astype('datetime64[M]').astype(np.int64)
+    return {'week': np.asarray(weeks, dtype=np.int64), 'month': months, 'year': months // 12 + 1970}
+
+
+def month_label(month):
+    return f'{month // 12 + 1970}-{month % 12 + 1:02d}'
+
+
+class Geography:
+    """Regiões de cada nível e o mapeamento município → região"""
+
+    def __init__(self, municipalities):
+        self.members = {}
+        self.regions = {}
+        self.index = {}
+        for level in LEVELS:
+            keys = [self.region_of(m, level) for m in municipalities]
+            names = list(dict.fromkeys(keys))
+            self.regions[level] = names
+            self.index[level] = {name: i for i, name in enumerate(names)}
+            self.members[level] = np.array([self.index[level][k] for k in keys], dtype=np.intp)
+
+        population = np.array([MUNICIPALITIES.get(m, {}).get('population', 0) for m in municipalities],
+                              dtype=np.int64)
+        self.population = {
+            level: np.bincount(self.members[level], population, len(self.regions[level])).astype(np.int64)
+            for level in LEVELS
+        }
+        # Regiões filhas de cada região (para o drill-down)
+        self.children = {}
+        for parent, child in zip(LEVELS[1:], LEVELS):
+            pairs = dict.fromkeys(zip(self.members[parent].tolist(), self.members[child].tolist()))
+            children = [[] for _ in self.regions[parent]]
+            for p, c in pairs:
+                children[p].append(c)
+            self.children[parent] = (child, children)
+
+    @staticmethod
+    def region_of(municipality, level):
+        if level == 'municipality':
+            return municipality
+        if level == 'state':
+            return STATE
+        return MUNICIPALITIES.get(municipality, {}).get(level) or 'nao_informada'
+
+    def region_index(self, level, region):
+        if level not in self.index:
+            raise ValueError(f"'level' deve ser um de: {', '.join(LEVELS)}")
+        try:
+            return self.index[level][region]
+        except KeyError:
+            raise UnknownRegion(f'Região desconhecida: {level}={region}')
+
+
+class RollupCube:
+    """Totais de casos por (nível geográfico, grão de tempo), mantidos incrementalmente"""
+
+    def __init__(self):
+        self.geography = None
+        self.totals = {}
+        self.first = {}
+        self.start_index = None
+        self.end_index = None
+        self.history = None
+        self._lock = threading.Lock()
+
+    def build(self, store, end):
+        """Reconstrói o cubo a partir da série (M, D, T) até a semana `end`"""
+        self.geography = Geography(store.municipalities)
+        self.start_index = store.start_index
+        first = week_periods([store.start_index])
+        self.first = {grain: int(first[grain][0]) for grain in GRAINS}
+        self.totals = {
+            (level, grain): np.zeros((len(self.geography.regions[level]), len(DISEASES), 0), dtype=np.int64)
+            for level in LEVELS for grain in GRAINS
+        }
+        self.end_index = store.start_index
+        self.history = store.history_version
+        self._extend(store, end)
+
+    def _ensure(self, grain, periods):
+        for level in LEVELS:
+            array = self.totals[level, grain]
+            if array.shape[2] < periods:
+                pad = periods - array.shape[2] + HEADROOM[grain]
+                self.totals[level, grain] = np.concatenate(
+                    [array, np.zeros(array.shape[:2] + (pad,), dtype=np.int64)], axis=2)
+
+    def _add(self, m, d, weeks, values):
+        """Soma `values` às células (município, doença, semana) em todos os níveis"""
+        periods = week_periods(weeks)
+        for grain in GRAINS:
+            offsets = periods[grain] - self.first[grain]
+            if len(offsets):
+                self._ensure(grain, int(offsets.max()) + 1)
+            for level in LEVELS:
+                np.add.at(self.totals[level, grain], (self.geography.members[level][m], d, offsets), values)
+
+    def _extend(self, store, end):
+        """Acrescenta as semanas [end_index, end) da série"""
+        if end <= self.end_index:
+            return
+        block = np.asarray(store.data[:, :, self.end_index - store.start_index:end - store.start_index],
+                           dtype=np.int64)
+        weeks = np.arange(self.end_index, end)
+        periods = week_periods(weeks)
+        for grain in GRAINS:
+            offsets = periods[grain] - self.first[grain]
+            self._ensure(grain, int(offsets[-1]) + 1)
+            # Semanas consecutivas: soma por período com reduceat
+            starts = np.flatnonzero(np.r_[True, offsets[1:] != offsets[:-1]])
+            sums = np.add.reduceat(block, starts, axis=2)
+            for level in LEVELS:
+                grouped = np.zeros((len(self.geography.regions[level]),) + sums.shape[1:], dtype=np.int64)
+                np.add.at(grouped, self.geography.members[level], sums)
+                self.totals[level, grain][:, :, offsets[starts]] += grouped
+        self.end_index = end
+
+    def on_write(self, store, m, d, weeks, delta):
+        """Gravação da ingestão: aplica os deltas das células já somadas"""
+        with self._lock:
+            if self.history is None or store.history_version != self.history + 1:
+                # Perdeu alguma gravação: a próxima sincronização reconstrói
+                self.history = None
+                return
+            summed = weeks < self.end_index
+            self._add(m[summed], d[summed], weeks[summed], np.asarray(delta[summed], dtype=np.int64))
+            self._extend(store, store.end_index)
+            self.history = store.history_version
+
+    def sync(self, store, end=None):
+        with self._lock:
+            end = store.end_index if end is None else min(end, store.end_index)
+            if (self.history != store.history_version or self.end_index is None
+                    or end < self.end_index or self.start_index != store.start_index):
+                self.build(store, end)
+            else:
+                self._extend(store, end)
+
+    def value(self, level, region, grain, period):
+        """Casos por doença de uma região em um período (índice de semana, mês ou ano)"""
+        r = self.geography.region_index(level, region)
+        offset = period - self.first[grain]
+        array = self.totals[level, grain]
+        if not 0 <= offset < array.shape[2]:
+            return np.zeros(len(DISEASES), dtype=np.int64)
+        return array[r, :, offset]
+
+    def summary(self, level, region, week=None):
+        """Totais da semana, do mês e do ano epidemiológico que contêm `week`"""
+        week = epiweeks.current_index() if week is None else week
+        periods = {grain: int(p[0]) for grain, p in week_periods([week]).items()}
+        totals = {grain: self.value(level, region, grain, periods[grain]) for grain in GRAINS}
+        return periods, totals
+
+
+_cube = RollupCube()
+_cube_lock = threading.Lock()
+_listening = set()
+
+
+def get_rollup():
+    """Cubo acompanhando a série de casos até a semana corrente"""
+    store = get_case_store()
+    with _cube_lock:
+        if id(store) not in _listening:
+            store.add_listener(_cube.on_write)
+            _listening.add(id(store))
+    _cube.sync(store, epiweeks.current_index() + 1)
+    return _cube
+
+
+def region_summary(level, region, week=None):
+    """Totais de uma região (qualquer nível) para o /statistics?level=&region="""
+    cube = get_rollup()
+    periods, totals = cube.summary(level, region, week)
+    geography = cube.geography
+    r = geography.region_index(level, region)
+    year = totals['year']
+    payload = {
+        'level': level,
+        'region': region,
+        'epi_year': periods['year'],
+        'month': month_label(periods['month']),
+        'total_cases_year': int(year.sum()),
+        'total_cases_month': int(totals['month'].sum()),
+        'total_cases_week': int(totals['week'].sum()),
+        'most_affected_disease': DISEASES[int(np.argmax(year))],
+        'cases_by_disease': {d: int(v) for d, v in zip(DISEASES, year)},
+        'population_monitored': int(geography.population[level][r])
+    }
+    if level in geography.children:
+        child_level, children = geography.children[level]
+        array = cube.totals[child_level, 'year']
+        offset = periods['year'] - cube.first['year']
+        payload['children'] = [
+            {
+                'level': child_level,
+                'region': geography.regions[child_level][c],
+                'total_cases_year': int(array[c, :, offset].sum()) if 0 <= offset < array.shape[2] else 0
+            }
+            for c in children[r]
+        ]
+    return payload
+
+
+def parse_statistics_args(args):
+    """Valida ?level=&region= (sem `level`, o município de ?municipality=)"""
+    level = args.get('level')
+    if level is None:
+        return None
+    if level not in LEVELS:
+        raise ValueError(f"'level' deve ser um de: {', '.join(LEVELS)}")
+    region = args.get('region') or (STATE if level == 'state' else None)
+    if region is None:
+        raise ValueError("'region' é obrigatório para esse nível")
+    return {'level': level, 'region': region}
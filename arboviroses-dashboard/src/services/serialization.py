@@ -0,0 +1,181 @@
+"""Serialização das séries semanais com negociação de formato e compressão
+
+Formatos (via ?format= ou cabeçalho Accept):
+
+- json: linhas [{date, dengue, ...}] (padrão, compatível com o frontend)
+- columnar: {dates: [...], dengue: [...], ...} montado direto dos arrays
+- arrow: Apache Arrow IPC stream (requer pyarrow)
+- parquet: Apache Parquet (requer pyarrow)
+
+O JSON usa orjson quando disponível. A compressão segue o Accept-Encoding
+(brotli se o pacote estiver instalado, senão gzip).
+"""
+import gzip
+import io
+import json
+
+import numpy as np
+from flask import make_response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIMETYPES = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.arboviroses.columnar+json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+# Respostas menores que isso não compensam a compressão (bytes)
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class NotAcceptable(ValueError):
+    """Formato pedido não suportado (ou dependência opcional ausente)"""
+
+
+def available_formats():
+    formats = ['json', 'columnar']
+    if pa is not None:
+        formats += ['arrow', 'parquet']
+    return formats
+
+
+def negotiate_format(default='json'):
+    """Formato da resposta: ?format= tem precedência sobre o Accept"""
+    requested = request.args.get('format')
+    if requested:
+        if requested not in MIMETYPES:
+            raise NotAcceptable(f"Formato desconhecido: {requested} (use {', '.join(MIMETYPES)})")
+        if requested not in available_formats():
+            raise NotAcceptable(f'Formato {requested} requer o pacote pyarrow')
+        return requested
+
+    offered = {MIMETYPES[f]: f for f in available_formats()}
+    best = request.accept_mimetypes.best_match([MIMETYPES[default], *offered])
+    return offered.get(best, default)
+
+
+def negotiate_encoding():
+    """Codificação de conteúdo aceita pelo cliente: 'br', 'gzip' ou None"""
+    encodings = request.accept_encodings
+    if brotli is not None and encodings['br']:
+        return 'br'
+    if encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def cache_variant():
+    """Parte da chave de cache que depende da negociação"""
+    try:
+        fmt = negotiate_format()
+    except NotAcceptable:
+        fmt = 'invalid'
+    return f'{fmt}.{negotiate_encoding() or "identity"}'
+
+
+def vary_headers():
+    """Cabeçalhos consultados pela negociação (para o Vary da resposta)"""
+    headers = ['Accept-Encoding']
+    if not request.args.get('format'):
+        headers.append('Accept')
+    return headers
+
+
+def _default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Tipo não serializável: {type(value).__name__}')
+
+
+def dumps(payload):
+    """JSON compacto em bytes (orjson quando disponível)"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def compress_response(response):
+    """Comprime o corpo conforme o Accept-Encoding do cliente"""
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    body = response.get_data()
+    if encoding is None or len(body) < COMPRESS_MIN_SIZE or response.content_encoding:
+        return response
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    response.set_data(body)
+    response.content_encoding = encoding
+    return response
+
+
+def json_response(payload, status=200, headers=None):
+    """Resposta JSON serializada com o codificador rápido e comprimida"""
+    response = make_response(dumps(payload), status, headers or {})
+    response.mimetype = MIMETYPES['json']
+    return compress_response(response)
+
+
+def rows(dates, columns):
+    """Colunas → linhas [{date, coluna: valor}] (formato json)"""
+    lists = {name: np.asarray(values).tolist() for name, values in columns.items()}
+    return [
+        {'date': date, **{name: values[i] for name, values in lists.items()}}
+        for i, date in enumerate(dates)
+    ]
+
+
+def _arrow_table(dates, columns):
+    arrays = {'date': pa.array(np.asarray(dates, dtype='datetime64[D]'))}
+    arrays.update({name: pa.array(np.asarray(values)) for name, values in columns.items()})
+    return pa.table(arrays)
+
+
+def encode_table(dates, columns, fmt):
+    """Serializa uma tabela (datas + colunas NumPy) no formato pedido"""
+    if fmt == 'columnar':
+        return dumps({'dates': dates, **{name: np.asarray(v) for name, v in columns.items()}})
+    if fmt == 'json':
+        return dumps(rows(dates, columns))
+
+    table = _arrow_table(dates, columns)
+    sink = io.BytesIO()
+    if fmt == 'arrow':
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink, compression='zstd')
+    return sink.getvalue()
+
+
+def table_response(dates, columns, fmt=None):
+    """Resposta de uma série semanal no formato negociado"""
+    fmt = fmt or negotiate_format()
+    response = make_response(encode_table(dates, columns, fmt))
+    response.mimetype = MIMETYPES[fmt]
+    response.vary.update(vary_headers())
+    if fmt == 'parquet':
+        # Parquet já é comprimido internamente
+        return response
+    return compress_response(response)
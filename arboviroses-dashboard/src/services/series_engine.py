@@ -0,0 +1,119 @@
+"""Motor de séries por município
+
+Responde consultas e previsões para vários municípios de uma só vez,
+operando sobre as séries colunares com indexação vetorizada do NumPy.
+"""
+import threading
+
+import numpy as np
+
+from src.services import epiweeks
+from src.services.weekly_store import get_case_store, get_climate_store, week_dates
+
+# Semanas de uma temporada (para a previsão sazonal)
+SEASON = 52
+MAX_HORIZON = 12
+
+
+class SeriesEngine:
+    """Consultas e previsões em lote sobre as séries de casos e clima"""
+
+    def __init__(self, case_store, climate_store):
+        self.case_store = case_store
+        self.climate_store = climate_store
+
+    def city_indices(self, cities):
+        """Converte identificadores de municípios em índices das séries"""
+        return np.array([self.case_store.municipality_index(c) for c in cities], dtype=np.intp)
+
+    def _window(self, store, weeks, end=None):
+        end = store.end_index if end is None else min(end, store.end_index)
+        start = max(store.start_index, end - weeks)
+        return start - store.start_index, end - store.start_index, start
+
+    def total_cases(self, cities, weeks, end=None):
+        """Casos totais (soma das doenças) das últimas `weeks` semanas
+
+        Retorna (primeiro_indice, array municípios × semanas).
+        """
+        i0, i1, first = self._window(self.case_store, weeks, end)
+        block = self.case_store.data[self.city_indices(cities), :, i0:i1]
+        return first, block.sum(axis=1, dtype=np.int64)
+
+    def temperature(self, cities, first, count):
+        """Temperatura média semanal alinhada à janela de casos"""
+        store = self.climate_store
+        i0 = first - store.start_index
+        v = store.variable_index('temperatura')
+        block = np.asarray(store.data[self.city_indices(cities), v, i0:i0 + count], dtype=np.float64)
+        if block.shape[1] < count:
+            pad = np.full((len(cities), count - block.shape[1]), np.nan)
+            block = np.concatenate([block, pad], axis=1)
+        return block
+
+    def series(self, city, weeks=104):
+        """Linhas {date, cases, temp} de um município"""
+        first, cases = self.total_cases([city], weeks)
+        temp = np.round(self.temperature([city], first, cases.shape[1]), 1)
+        dates = week_dates(first, cases.shape[1])
+        return [
+            {'date': d, 'cases': int(c), 'temp': None if np.isnan(t) else float(t)}
+            for d, c, t in zip(dates, cases[0], temp[0])
+        ]
+
+    def disease_cases(self, city, weeks, end=None):
+        """Casos por doença das últimas `weeks` semanas (doenças × semanas)"""
+        i0, i1, first = self._window(self.case_store, weeks, end)
+        m = self.case_store.municipality_index(city)
+        return first, np.asarray(self.case_store.data[m, :, i0:i1], dtype=np.float64)
+
+    def forecast(self, cities, horizon=MAX_HORIZON, last_weeks=12):
+        """Previsão dos casos totais de vários municípios em uma passada
+
+        Retorna (indice_primeira_semana_prevista, array municípios × horizonte).
+        """
+        last_weeks = max(1, min(int(last_weeks), SEASON))
+        first, y = self.total_cases(cities, SEASON + last_weeks)
+        return first + y.shape[1], seasonal_forecast(y, horizon, last_weeks)
+
+
+def seasonal_forecast(y, horizon=MAX_HORIZON, last_weeks=12):
+    """Previsão sazonal com ajuste de nível, vetorizada por linha
+
+    Para cada linha de `y` (séries × semanas), repete a mesma janela da
+    temporada anterior multiplicada pela razão entre as últimas `last_weeks`
+    semanas e o mesmo período um ano antes.
+    """
+    horizon = max(1, min(int(horizon), MAX_HORIZON))
+    last_weeks = max(1, min(int(last_weeks), SEASON))
+    y = np.asarray(y, dtype=np.float64)[:, -(SEASON + last_weeks):]
+
+    if y.shape[1] < SEASON + last_weeks:
+        # Histórico curto: mantém o nível recente
+        level = y[:, -last_weeks:].mean(axis=1, keepdims=True)
+        return np.repeat(level, horizon, axis=1)
+
+    recent = y[:, -last_weeks:].mean(axis=1)
+    previous = y[:, :last_weeks].mean(axis=1)
+    ratio = np.clip((recent + 1) / (previous + 1), 0.25, 4.0)
+
+    # Mesmas semanas da temporada anterior: y[t - SEASON + h]
+    same_weeks = y[:, last_weeks:last_weeks + horizon]
+    return np.maximum(0, same_weeks * ratio[:, None])
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_series_engine():
+    """Retorna o motor compartilhado, com as séries cobrindo a semana corrente"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SeriesEngine(get_case_store(), get_climate_store())
+    current = epiweeks.current_index()
+    _engine.case_store.ensure_until(current)
+    _engine.climate_store.ensure_until(current)
+    return _engine
@@ -0,0 +1,229 @@
+"""Simulação determinística das séries de demonstração (clima e casos)
+
+Enquanto não há dados ingeridos, as séries semanais são completadas por
+este gerador. O clima é sazonal com ruído determinístico; os casos saem de
+um modelo SEIR semanal por (município, doença), vetorizado sobre todos os
+municípios, em que a transmissão é modulada pelo clima (temperatura e
+chuva acumulada com defasagem) e por um ruído log-normal. Há importação
+constante de infecções e perda de imunidade, o que mantém as doenças
+endêmicas com surtos sazonais.
+
+Todo o ruído vem de um hash (splitmix64) de (semente, município, semana,
+doença): a mesma semana tem sempre o mesmo valor, seja gerada de uma vez ou
+semana a semana, em qualquer processo. ARBOVIROSES_SIM_SEED troca o cenário.
+"""
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from src.services import epiweeks
+
+SIM_SEED = int(os.environ.get('ARBOVIROSES_SIM_SEED', 0))
+# Semanas simuladas antes do início das séries (o SEIR chega ao regime endêmico)
+BURN_IN = 260
+
+# Clima simulado: (média, amplitude, semana de pico, ruído) por variável
+CLIMATE_PATTERN = {
+    'temperatura': (23.5, 3.5, 5, 1.2),
+    'umidade': (72, 10, 3, 4),
+    'precipitacao': (18, 22, 2, 6),
+    'vento': (12, 3, 30, 2)
+}
+
+# Parâmetros semanais do SEIR por doença:
+# (R0 médio, latência, período infeccioso, imunidade (semanas),
+#  importação por 100 mil/semana, fração notificada, desvio do ruído)
+SEIR_PARAMS = {
+    'dengue': (1.45, 1.5, 1.0, 156, 0.6, 0.15, 0.25),
+    'zika': (1.35, 1.5, 1.0, 260, 0.4, 0.15, 0.25),
+    'chikungunya': (1.4, 1.0, 1.0, 520, 0.25, 0.14, 0.3),
+    'febre_amarela': (0.6, 1.0, 1.0, 10000, 0.5, 0.7, 0.3)
+}
+
+# Forçamento climático: temperatura ótima (°C) e largura, defasagens (semanas)
+THERMAL_OPTIMUM = 28.0
+THERMAL_WIDTH = 7.0
+TEMPERATURE_LAG = 2
+RAIN_LAG = 3
+RAIN_WINDOW = 4
+RAIN_HALF_SATURATION = 15.0
+LOOKBACK = RAIN_LAG + RAIN_WINDOW
+
+
+def hash_uniform(*keys):
+    """Ruído uniforme em [0, 1) determinístico a partir de chaves inteiras (splitmix64)"""
+    x = np.uint64(0x9E3779B97F4A7C15)
+    with np.errstate(over='ignore'):
+        for key in keys:
+            x = (x ^ np.asarray(key).astype(np.uint64)) * np.uint64(0xBF58476D1CE4E5B9)
+            x ^= x >> np.uint64(31)
+            x *= np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(29)
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def hash_normal(*keys):
+    """Ruído normal padrão determinístico (Box-Muller sobre dois hash_uniform)"""
+    u1 = hash_uniform(*keys, 1)
+    u2 = hash_uniform(*keys, 2)
+    return np.sqrt(-2 * np.log1p(-u1)) * np.cos(2 * np.pi * u2)
+
+
+def week_of_year(weeks):
+    """Semana do ano (1-53) para um array de índices de semana"""
+    epoch = np.datetime64(epiweeks.EPOCH.isoformat(), 'D')
+    wednesday = epoch + (np.asarray(weeks) * 7 + 3).astype('timedelta64[D]')
+    day_of_year = (wednesday - wednesday.astype('datetime64[Y]')).astype(np.int64)
+    return day_of_year // 7 + 1
+
+
+def municipality_seeds(municipalities, seed=SIM_SEED):
+    return np.array([zlib.crc32(f'{seed}:{m}'.encode()) for m in municipalities], dtype=np.uint64)
+
+
+def climate(municipalities, variables, first_index, count, seed=SIM_SEED):
+    """Clima semanal (municípios × variáveis × semanas): verão quente e chuvoso"""
+    weeks = np.arange(first_index, first_index + count)
+    woy = week_of_year(weeks)
+    seeds = municipality_seeds(municipalities, seed)
+    out = np.empty((len(municipalities), len(variables), count))
+    for v, variable in enumerate(variables):
+        mean, amplitude, peak, noise = CLIMATE_PATTERN[variable]
+        seasonal = mean + amplitude * np.cos(2 * np.pi * (woy - peak) / 52)
+        # Chave fixa por variável: o mesmo clima com qualquer subconjunto de variáveis
+        u = hash_uniform(seeds[:, None], weeks[None, :], 100 + list(CLIMATE_PATTERN).index(variable))
+        out[:, v, :] = np.maximum(0, seasonal[None, :] + noise * (2 * u - 1))
+    return out
+
+
+def climate_forcing(temperature, rain):
+    """Fator de transmissão (municípios × semanas) a partir do clima
+
+    `temperature` e `rain` cobrem LOOKBACK semanas antes da primeira semana
+    do resultado.
+    """
+    T = temperature.shape[1] - LOOKBACK
+    t = np.arange(LOOKBACK, LOOKBACK + T)
+    thermal = np.exp(-((temperature[:, t - TEMPERATURE_LAG] - THERMAL_OPTIMUM) / THERMAL_WIDTH) ** 2)
+    csum = np.concatenate([np.zeros((rain.shape[0], 1)), np.cumsum(rain, axis=1)], axis=1)
+    accumulated = (csum[:, t - RAIN_LAG + 1] - csum[:, t - RAIN_LAG + 1 - RAIN_WINDOW]) / RAIN_WINDOW
+    wet = accumulated / (accumulated + RAIN_HALF_SATURATION)
+    return thermal * wet / FORCING_MEAN
+
+
+def _reference_forcing():
+    # Média anual do forçamento no clima sem ruído: R0 é o valor médio do ano
+    weeks = np.arange(-LOOKBACK, 52 * 4)
+    woy = week_of_year(weeks)
+
+    def pattern(variable):
+        mean, amplitude, peak, _ = CLIMATE_PATTERN[variable]
+        return (mean + amplitude * np.cos(2 * np.pi * (woy - peak) / 52))[None, :]
+
+    t = np.arange(LOOKBACK, len(weeks))
+    temperature, rain = pattern('temperatura'), np.maximum(0, pattern('precipitacao'))
+    thermal = np.exp(-((temperature[:, t - TEMPERATURE_LAG] - THERMAL_OPTIMUM) / THERMAL_WIDTH) ** 2)
+    csum = np.concatenate([[[0.0]], np.cumsum(rain, axis=1)], axis=1)
+    accumulated = (csum[:, t - RAIN_LAG + 1] - csum[:, t - RAIN_LAG + 1 - RAIN_WINDOW]) / RAIN_WINDOW
+    return float((thermal * accumulated / (accumulated + RAIN_HALF_SATURATION)).mean())
+
+
+FORCING_MEAN = _reference_forcing()
+
+
+class EpidemicSimulation:
+    """SEIR semanal vetorizado (municípios × doenças), estendido sob demanda
+
+    O estado é mantido entre chamadas: acrescentar semanas continua a
+    simulação de onde parou, com o mesmo resultado de uma execução única.
+    """
+
+    def __init__(self, municipalities, populations, diseases, start_index, seed=SIM_SEED):
+        self.municipalities = list(municipalities)
+        self.diseases = tuple(diseases)
+        self.seed = seed
+        self.start_index = start_index
+        self.end_index = start_index
+        self._seeds = municipality_seeds(self.municipalities, seed)
+        N = np.maximum(np.asarray(populations, dtype=np.float64), 1.0)[:, None]
+        self.population = np.repeat(N, len(self.diseases), axis=1)
+
+        params = np.array([SEIR_PARAMS[d] for d in self.diseases], dtype=np.float64).T
+        r0, latent, infectious, immunity, importation, reporting, noise = params
+        self.r0 = r0
+        self.sigma = 1 - np.exp(-1 / latent)
+        self.gamma = 1 - np.exp(-1 / infectious)
+        self.omega = 1 - np.exp(-1 / immunity)
+        self.importation = importation * self.population / 1e5
+        self.reporting = reporting
+        self.noise = noise
+
+        # Condição inicial: perto do equilíbrio endêmico (o burn-in ajusta o resto)
+        s0 = np.clip(1 / np.maximum(r0, 1e-6), 0, 1)
+        self.S = self.population * s0
+        self.E = np.zeros_like(self.S)
+        self.I = np.zeros_like(self.S)
+        self.R = self.population - self.S
+        self._reported = []
+        self._lock = threading.Lock()
+
+    def _forcing(self, first, count):
+        cl = climate(self.municipalities, ('temperatura', 'precipitacao'), first - LOOKBACK,
+                     count + LOOKBACK, self.seed)
+        return climate_forcing(cl[:, 0], cl[:, 1])
+
+    def run_until(self, end_index):
+        """Simula até a semana `end_index` (exclusiva)"""
+        with self._lock:
+            if end_index <= self.end_index:
+                return
+            first, count = self.end_index, end_index - self.end_index
+            forcing = self._forcing(first, count)
+            weeks = np.arange(first, end_index)
+            d_keys = np.arange(len(self.diseases))[None, :]
+            seeds = self._seeds[:, None]
+            beta0 = self.r0 * self.gamma
+
+            for k, week in enumerate(weeks):
+                z = hash_normal(seeds, week, d_keys)
+                beta = beta0 * forcing[:, k:k + 1] * np.exp(self.noise * z - self.noise ** 2 / 2)
+                infections = np.minimum(self.S, beta * self.S * self.I / self.population
+                                        + self.importation * hash_uniform(seeds, week, d_keys, 3) * 2)
+                onsets = self.sigma * self.E
+                recoveries = self.gamma * self.I
+                waning = self.omega * self.R
+                self.S += waning - infections
+                self.E += infections - onsets
+                self.I += onsets - recoveries
+                self.R += recoveries - waning
+
+                # Arredondamento estocástico determinístico dos casos notificados
+                expected = self.reporting * onsets
+                self._reported.append(np.floor(expected + hash_uniform(seeds, week, d_keys, 4)))
+            self.end_index = end_index
+
+    def cases(self, first_index, count):
+        """Casos notificados (municípios × doenças × semanas) de [first, first + count)"""
+        self.run_until(first_index + count)
+        i0 = first_index - self.start_index
+        if i0 < 0:
+            raise ValueError('Semana anterior ao início da simulação')
+        return np.stack(self._reported[i0:i0 + count], axis=-1)
+
+
+_simulations = {}
+_simulations_lock = threading.Lock()
+
+
+def get_simulation(municipalities, populations, diseases):
+    """Simulação compartilhada para um conjunto de municípios e doenças"""
+    key = (tuple(municipalities), tuple(diseases), SIM_SEED)
+    with _simulations_lock:
+        simulation = _simulations.get(key)
+        if simulation is None:
+            simulation = _simulations[key] = EpidemicSimulation(
+                municipalities, populations, diseases, -BURN_IN
+            )
+    return simulation
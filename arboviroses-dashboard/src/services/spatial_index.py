@@ -0,0 +1,92 @@
+"""Índice espacial em grade e utilitários de tiles (XYZ / Web Mercator)"""
+import math
+from collections import defaultdict
+
+import numpy as np
+
+
+class GridIndex:
+    """Índice em grade regular sobre os retângulos envolventes das regiões
+
+    Cada região é inserida em todas as células que seu retângulo cobre; uma
+    consulta por bbox visita só as células sobrepostas e filtra os
+    candidatos de forma vetorizada.
+    """
+
+    def __init__(self, bounds, cell_size=0.01):
+        self.cell_size = cell_size
+        self.bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)  # minx, miny, maxx, maxy
+        self._cells = defaultdict(list)
+        for i, (minx, miny, maxx, maxy) in enumerate(self.bounds):
+            for cell in self._cover(minx, miny, maxx, maxy):
+                self._cells[cell].append(i)
+        self._cells = {cell: np.array(ids, dtype=np.intp) for cell, ids in self._cells.items()}
+
+    def _cell_range(self, minx, miny, maxx, maxy):
+        c = self.cell_size
+        return math.floor(minx / c), math.floor(miny / c), math.floor(maxx / c), math.floor(maxy / c)
+
+    def _cover(self, minx, miny, maxx, maxy):
+        x0, y0, x1, y1 = self._cell_range(minx, miny, maxx, maxy)
+        return ((x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+
+    def query(self, minx, miny, maxx, maxy):
+        """Índices das regiões cujo retângulo intersecta o bbox"""
+        x0, y0, x1, y1 = self._cell_range(minx, miny, maxx, maxy)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            # bbox cobre mais células do que as ocupadas: percorre só as ocupadas
+            found = [ids for (cx, cy), ids in self._cells.items() if x0 <= cx <= x1 and y0 <= cy <= y1]
+        else:
+            found = [self._cells[c] for c in self._cover(minx, miny, maxx, maxy) if c in self._cells]
+        if not found:
+            return np.array([], dtype=np.intp)
+
+        candidates = np.unique(np.concatenate(found))
+        b = self.bounds[candidates]
+        hit = (b[:, 0] <= maxx) & (b[:, 2] >= minx) & (b[:, 1] <= maxy) & (b[:, 3] >= miny)
+        return candidates[hit]
+
+
+def tile_bounds(z, x, y):
+    """Retângulo (minLng, minLat, maxLng, maxLat) do tile XYZ"""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def tolerance_for_zoom(z, tile_size=256):
+    """Tolerância de simplificação (graus) equivalente a ~1 pixel no zoom z"""
+    return 360 / (tile_size * 2 ** z)
+
+
+def simplify(points, tolerance):
+    """Douglas-Peucker sobre um anel (N × 2), preservando as extremidades"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) <= 4 or tolerance <= 0:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        segment = points[last] - points[first]
+        inner = points[first + 1:last] - points[first]
+        norm = np.hypot(*segment)
+        if norm == 0:
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            dist = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    simplified = points[keep]
+    # Um anel precisa de pelo menos 4 pontos (o último repete o primeiro)
+    return simplified if len(simplified) >= 4 else points
@@ -0,0 +1,208 @@
+"""Arquivos estáticos: manifesto em memória, nomes com hash e pré-compressão
+
+O diretório estático é percorrido uma vez, na criação da aplicação. Cada
+arquivo ganha um nome com o hash do conteúdo (dashboard.3f9a1c0b2e4d.js),
+servido com Cache-Control immutable, e variantes gzip/brotli geradas em
+BUILD_DIR (variantes .gz/.br já presentes ao lado do original têm
+preferência). A variante sai conforme o Accept-Encoding, por send_file:
+sob o gunicorn o arquivo vai por wsgi.file_wrapper (sendfile), sem passar
+pelo Python.
+
+O index.html, com as referências trocadas pelos nomes com hash, fica em
+memória com suas variantes e também atende o fallback da SPA, sem acesso
+ao disco por requisição.
+"""
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BUILD_DIR = os.environ.get(
+    'ARBOVIROSES_STATIC_BUILD_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'static')
+)
+
+INDEX = 'index.html'
+# Ordem de preferência das codificações
+ENCODINGS = ('br', 'gzip')
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+# Arquivos menores que isso não compensam a compressão (bytes)
+MIN_COMPRESS_SIZE = 512
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+REFERENCE = re.compile(r'(\b(?:src|href)=")([^"#?:]+)(")')
+
+
+def compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def fingerprint(name, digest):
+    """'js/app.js' -> 'js/app.<hash>.js'"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest}{ext}'
+
+
+class Asset:
+    """Arquivo estático com suas variantes comprimidas (codificação -> caminho)"""
+
+    def __init__(self, name, path, data):
+        self.name = name
+        self.path = path
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.fingerprinted = fingerprint(name, self.digest)
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.variants = {}
+
+    @property
+    def compressible(self):
+        return self.mimetype.startswith(COMPRESSIBLE)
+
+
+class StaticManifest:
+    """Manifesto dos arquivos estáticos, montado uma vez na inicialização"""
+
+    def __init__(self, directory, build_dir=BUILD_DIR):
+        self.directory = directory
+        self.build_dir = build_dir
+        self.assets = {}
+        self.urls = {}
+        self.index = None
+        self.scan()
+
+    def scan(self):
+        assets, urls = {}, {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for filename in sorted(files):
+                if filename.startswith('.') or filename.endswith(tuple(SUFFIXES.values())):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+                asset = Asset(name, path, data)
+                if name != INDEX:
+                    self._build_variants(asset, data)
+                assets[name] = assets[asset.fingerprinted] = asset
+                urls[name] = asset.fingerprinted
+
+        self.assets, self.urls = assets, urls
+        index = assets.get(INDEX)
+        self.index = self._build_index(index.path) if index is not None else None
+        return self
+
+    def _build_variants(self, asset, data):
+        if not asset.compressible or len(data) < MIN_COMPRESS_SIZE:
+            return
+        for encoding in ENCODINGS:
+            sibling = asset.path + SUFFIXES[encoding]
+            if os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(asset.path):
+                asset.variants[encoding] = sibling
+                continue
+            # O nome com hash identifica o conteúdo: variantes já geradas são reaproveitadas
+            built = os.path.join(self.build_dir, asset.fingerprinted + SUFFIXES[encoding])
+            if not os.path.exists(built):
+                compressed = compress(data, encoding)
+                if compressed is None or len(compressed) >= len(data):
+                    continue
+                os.makedirs(os.path.dirname(built), exist_ok=True)
+                tmp = f'{built}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(compressed)
+                os.replace(tmp, built)
+            asset.variants[encoding] = built
+
+    def _build_index(self, path):
+        """index.html em memória, apontando para os nomes com hash"""
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        html = REFERENCE.sub(
+            lambda m: m.group(1) + self.urls.get(m.group(2).lstrip('/'), m.group(2)) + m.group(3), html
+        )
+        body = html.encode('utf-8')
+        variants = {None: body}
+        for encoding in ENCODINGS:
+            compressed = compress(body, encoding)
+            if compressed is not None and len(compressed) < len(body):
+                variants[encoding] = compressed
+        return hashlib.sha256(body).hexdigest()[:12], variants
+
+    def url(self, name):
+        """Nome com hash de um arquivo (para templates e referências)"""
+        return self.urls.get(name, name)
+
+    def serve(self, path):
+        asset = self.assets.get(path)
+        if asset is None or path == INDEX:
+            return self.serve_index()
+
+        encoding = choose_encoding(asset.variants)
+        response = send_file(
+            asset.variants.get(encoding, asset.path), mimetype=asset.mimetype,
+            etag=f'{asset.digest}-{encoding or "identity"}', conditional=True
+        )
+        # O nome do arquivo da variante (.gz/.br) não interessa ao cliente
+        response.headers.pop('Content-Disposition', None)
+        response.headers['Cache-Control'] = IMMUTABLE if path == asset.fingerprinted else REVALIDATE
+        return _encoded(response, encoding, asset.variants)
+
+    def serve_index(self):
+        if self.index is None:
+            return 'index.html not found', 404
+        digest, variants = self.index
+        encoding = choose_encoding(variants)
+        response = Response(variants[encoding], mimetype='text/html')
+        response.set_etag(f'{digest}-{encoding or "identity"}')
+        response.headers['Cache-Control'] = REVALIDATE
+        return _encoded(response, encoding, variants).make_conditional(request)
+
+
+def choose_encoding(variants):
+    """Melhor codificação disponível aceita pelo cliente (None = sem compressão)"""
+    accepted = request.accept_encodings
+    for encoding in ENCODINGS:
+        if encoding in variants and accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def _encoded(response, encoding, variants):
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    if any(e in variants for e in ENCODINGS):
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    """Troca o catch-all da SPA pelo servidor do manifesto"""
+    if app.static_folder is None:
+        return None
+    manifest = StaticManifest(app.static_folder)
+    app.extensions['static_manifest'] = manifest
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        if app.debug:
+            # Em desenvolvimento, reflete as edições sem reiniciar
+            manifest.scan()
+        return manifest.serve(path)
+
+    return manifest
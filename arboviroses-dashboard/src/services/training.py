@@ -0,0 +1,215 @@
+"""Treinamento offline dos modelos de previsão por (município, doença)
+
+Cada par recebe uma regressão ridge de previsão direta sobre os mesmos
+atributos usados na inferência (src.services.feature_store: defasagens e
+médias móveis dos casos, clima e sazonalidade). Os pares são distribuídos
+em um pool de processos; os workers leem a série de casos por memory-map e
+os atributos do cache em disco, então só índices e coeficientes trafegam
+entre processos.
+
+Cada execução grava uma versão nova em MODELS_DIR/<versão>/ (coeficientes
+em .npy, abertos com mmap pelos workers web) e só então troca o ponteiro
+CURRENT, de forma atômica. O ModelCache percebe a troca e recarrega sem
+reiniciar o servidor.
+
+    python -m src.services.training --processes 4
+    python -m src.services.training --scaling 1 2 4
+"""
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+
+from src.services import epiweeks
+from src.services.feature_store import FEATURE_NAMES, FEATURE_VERSION, LOOKBACK, SEASON, feature_store
+from src.services.model_cache import CURRENT_FILE, MODELS_DIR, predict_linear
+from src.services.series_engine import MAX_HORIZON
+from src.services.weekly_store import DISEASES, get_case_store
+
+# Semanas de histórico usadas no ajuste e semanas finais reservadas para validação
+TRAIN_WEEKS = 260
+HOLDOUT_WEEKS = 12
+RIDGE_ALPHA = 1.0
+# Pares (município, doença) por tarefa enviada ao pool
+CHUNK_SIZE = 64
+# Versões antigas mantidas no disco (rollback)
+KEEP_VERSIONS = 3
+
+
+def design_matrix(origins, y, first_origin, horizon=MAX_HORIZON):
+    """Amostras de previsão direta de uma doença: (X, alvo, semana do alvo)
+
+    `origins` são os atributos (origens × atributos) das origens
+    first_origin, first_origin + 1, ... e `y` a série de casos alinhada a
+    first_origin. Para cada origem t e horizonte h, o alvo é a semana t + h - 1.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    offsets = np.arange(len(origins))
+    blocks, targets, weeks = [], [], []
+    for h in range(1, horizon + 1):
+        i = offsets[offsets + h - 1 < len(y)]
+        angle = 2 * np.pi * ((first_origin + i + h - 1) % SEASON) / SEASON
+        blocks.append(np.column_stack([origins[i], np.full(len(i), h), np.sin(angle), np.cos(angle)]))
+        targets.append(y[i + h - 1])
+        weeks.append(first_origin + i + h - 1)
+    return np.concatenate(blocks), np.concatenate(targets), np.concatenate(weeks)
+
+
+def fit_ridge(X, y, alpha=RIDGE_ALPHA):
+    """Coeficientes (atributos..., intercepto) da regressão ridge"""
+    X1 = np.column_stack([X, np.ones(len(X))])
+    penalty = alpha * np.eye(X1.shape[1])
+    penalty[-1, -1] = 0  # intercepto sem penalização
+    return np.linalg.solve(X1.T @ X1 + penalty, X1.T @ y)
+
+
+def fit_pair(origins, y, first_origin):
+    """Ajusta um par e retorna (coeficientes, MAE na validação)
+
+    A validação usa as últimas HOLDOUT_WEEKS semanas como alvo, com o
+    modelo ajustado só nas semanas anteriores.
+    """
+    X, target, week = design_matrix(origins, y, first_origin)
+    train = week < first_origin + len(y) - HOLDOUT_WEEKS
+    coefficients = fit_ridge(X[train], target[train])
+    holdout = ~train
+    mae = float(np.abs(np.maximum(0, predict_linear(coefficients, X[holdout])) - target[holdout]).mean()) \
+        if holdout.any() else float('nan')
+    # Modelo final com todas as semanas
+    return fit_ridge(X, target), mae
+
+
+def _fit_chunk(task):
+    """Executado no worker: ajusta uma lista de pares (m, d)"""
+    pairs, start, end = task
+    store = get_case_store()
+    results = []
+    matrices = {}
+    for m, d in pairs:
+        if m not in matrices:
+            # Atributos do município vêm do cache (só as semanas novas são calculadas)
+            first, matrix = feature_store.origin_matrix(store.municipalities[m], end)
+            matrices = {m: matrix[start - first:end - first]}
+        y = store.data[m, d, start - store.start_index:end - store.start_index]
+        coefficients, mae = fit_pair(np.asarray(matrices[m][:, d], dtype=np.float64), y, start)
+        results.append((m, d, coefficients, mae))
+    return results
+
+
+def train(processes=None, chunk_size=CHUNK_SIZE, train_weeks=TRAIN_WEEKS):
+    """Treina todos os pares em paralelo; retorna (coeficientes, mae, info)"""
+    store = get_case_store()
+    end = min(store.end_index, epiweeks.current_index() + 1)
+    # Origens com todos os atributos disponíveis
+    start = max(store.start_index + LOOKBACK, end - train_weeks)
+    M, D = len(store.municipalities), len(DISEASES)
+    pairs = [(m, d) for m in range(M) for d in range(D)]
+    tasks = [(pairs[i:i + chunk_size], start, end) for i in range(0, len(pairs), chunk_size)]
+
+    n_features = len(FEATURE_NAMES) + 1
+    coefficients = np.zeros((M, D, n_features))
+    mae = np.full((M, D), np.nan)
+
+    started = time.perf_counter()
+    if processes == 1:
+        chunks = map(_fit_chunk, tasks)
+        pool = None
+    else:
+        # fork: os workers herdam o memory-map da série já aberto
+        pool = get_context('fork').Pool(processes)
+        chunks = pool.imap_unordered(_fit_chunk, tasks)
+    try:
+        for results in chunks:
+            for m, d, coef, error in results:
+                coefficients[m, d] = coef
+                mae[m, d] = error
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    info = {
+        'municipalities': store.municipalities,
+        'diseases': list(DISEASES),
+        'train_start': epiweeks.index_date(start).isoformat(),
+        'train_end': epiweeks.index_date(end - 1).isoformat(),
+        'data_version': store.version,
+        'pairs': len(pairs),
+        'processes': processes or os.cpu_count(),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+    return coefficients, mae, info
+
+
+def publish(coefficients, mae, info, models_dir=MODELS_DIR):
+    """Grava uma versão nova e aponta CURRENT para ela (troca atômica)"""
+    version = datetime.now().strftime('%Y%m%dT%H%M%S') + f"-d{info['data_version']}"
+    path = os.path.join(models_dir, version)
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'coefficients.npy'), coefficients)
+    np.save(os.path.join(path, 'mae.npy'), mae)
+    manifest = {
+        **info,
+        'version': version,
+        'trained_at': datetime.now().isoformat(),
+        'model': 'ridge',
+        'features': FEATURE_NAMES,
+        'feature_version': FEATURE_VERSION,
+        'alpha': RIDGE_ALPHA,
+        'mae': {d: float(np.nanmean(mae[:, i])) for i, d in enumerate(info['diseases'])}
+    }
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    tmp = os.path.join(models_dir, CURRENT_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(models_dir, CURRENT_FILE))
+    _prune(models_dir, version)
+    return manifest
+
+
+def _prune(models_dir, current):
+    versions = sorted(v for v in os.listdir(models_dir)
+                      if os.path.isdir(os.path.join(models_dir, v)))
+    for version in versions[:-KEEP_VERSIONS]:
+        if version == current:
+            continue
+        path = os.path.join(models_dir, version)
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+        os.rmdir(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Treinamento dos modelos por município e doença')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                        help='processos no pool (padrão: núcleos disponíveis)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--train-weeks', type=int, default=TRAIN_WEEKS)
+    parser.add_argument('--scaling', type=int, nargs='+', metavar='N',
+                        help='só mede o tempo com N processos (ex.: 1 2 4), sem publicar')
+    args = parser.parse_args()
+
+    if args.scaling:
+        report = []
+        for processes in args.scaling:
+            _, _, info = train(processes, args.chunk_size, args.train_weeks)
+            report.append({'processes': processes, 'seconds': info['seconds']})
+        base = report[0]['seconds']
+        for row in report:
+            row['speedup'] = round(base / row['seconds'], 2) if row['seconds'] else None
+        print(json.dumps({'pairs': info['pairs'], 'cpus': os.cpu_count(), 'runs': report}, indent=2))
+        return
+
+    coefficients, mae, info = train(args.processes, args.chunk_size, args.train_weeks)
+    manifest = publish(coefficients, mae, info)
+    print(json.dumps({k: manifest[k] for k in ('version', 'pairs', 'processes', 'seconds', 'mae')}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,414 @@
+"""Armazenamento colunar de séries semanais (município × variável × semana)
+
+Cada série fica em um arquivo .npy de forma (municípios, variáveis, semanas),
+aberto como memory-map, mais um .json com os metadados. As consultas leem
+fatias contíguas do array, sem regenerar o histórico a cada requisição.
+
+Gravações de vários processos (workers, ingestão) são serializadas por um
+lock de arquivo (fcntl) por série; cada arquivo é trocado atomicamente a
+partir de um temporário exclusivo do processo.
+"""
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from src.services import epiweeks
+from src.services.municipalities import MUNICIPALITIES, municipality_slugs
+from src.services.simulation import climate, get_simulation
+
+DISEASES = ('dengue', 'zika', 'chikungunya', 'febre_amarela')
+CLIMATE_VARIABLES = ('temperatura', 'umidade', 'precipitacao', 'vento')
+
+DATA_DIR = os.environ.get(
+    'ARBOVIROSES_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'series')
+)
+
+# Janela padrão das consultas históricas (52 semanas)
+DEFAULT_WINDOW = 52
+
+
+class WeeklyStore:
+    """Série temporal colunar indexada por (município, variável, semana epidemiológica)"""
+
+    def __init__(self, name, variables, municipalities, dtype='int32', data_dir=None, filler=None):
+        self.name = name
+        self.variables = tuple(variables)
+        self.municipalities = list(municipalities)
+        self.dtype = np.dtype(dtype)
+        self.data_dir = data_dir or DATA_DIR
+        self.filler = filler
+        self._municipality_index = {m: i for i, m in enumerate(self.municipalities)}
+        self._variable_index = {v: i for i, v in enumerate(self.variables)}
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._writers = 0
+        self._load()
+
+    @property
+    def data_path(self):
+        return os.path.join(self.data_dir, f'{self.name}.npy')
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.data_dir, f'{self.name}.json')
+
+    @property
+    def observed_path(self):
+        return os.path.join(self.data_dir, f'{self.name}.observed.npy')
+
+    @property
+    def lock_path(self):
+        return os.path.join(self.data_dir, f'{self.name}.lock')
+
+    @property
+    def start_index(self):
+        return self._start
+
+    @property
+    def end_index(self):
+        """Índice exclusivo da última semana armazenada"""
+        return self._start + self._data.shape[2]
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def observed(self):
+        """Máscara das células com dados ingeridos (False = gerados pelo filler)"""
+        return self._observed
+
+    def _load(self):
+        self._start = 0
+        self.version = 0
+        self.history_version = 0
+        self.updated_at = None
+        self._meta_mtime = None
+        self._data = np.zeros((len(self.municipalities), len(self.variables), 0), dtype=self.dtype)
+        self._observed = np.zeros(self._data.shape, dtype=bool)
+
+        if not (os.path.exists(self.data_path) and os.path.exists(self.meta_path)):
+            return
+
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+
+        if (tuple(meta.get('variables', ())) != self.variables
+                or meta.get('municipalities') != self.municipalities
+                or meta.get('dtype') != self.dtype.str):
+            # Layout diferente do esperado: a série será reconstruída
+            return
+
+        self._data = np.load(self.data_path, mmap_mode='r')
+        self._start = meta['start']
+        self.version = meta.get('version', 0)
+        self.history_version = meta.get('history_version', 0)
+        self._meta_mtime = os.stat(self.meta_path).st_mtime_ns
+        self.updated_at = datetime.fromtimestamp(self._meta_mtime / 1e9, timezone.utc)
+
+        self._observed = np.zeros(self._data.shape, dtype=bool)
+        if os.path.exists(self.observed_path):
+            observed = np.load(self.observed_path)
+            if observed.shape == self._data.shape:
+                self._observed = observed
+
+    @contextmanager
+    def _writing(self):
+        """Exclusão entre threads e processos durante uma gravação
+
+        Com o lock obtido, a série é recarregada se outro processo gravou
+        antes, para não sobrescrever a gravação dele.
+        """
+        with self._lock:
+            # Reentrante: write() chama ensure_until() com o lock já obtido
+            outermost = not self._writers
+            lock_file = None
+            if outermost and fcntl is not None:
+                os.makedirs(self.data_dir, exist_ok=True)
+                lock_file = open(self.lock_path, 'a')
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._writers += 1
+            try:
+                if outermost:
+                    self.refresh()
+                yield
+            finally:
+                self._writers -= 1
+                if lock_file is not None:
+                    # Fechar o arquivo libera o flock
+                    lock_file.close()
+
+    def refresh(self):
+        """Recarrega a série se outro processo (ex.: ingestão) a alterou"""
+        try:
+            mtime = os.stat(self.meta_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._meta_mtime:
+            with self._lock:
+                self._load()
+
+    def municipality_index(self, municipality):
+        try:
+            return self._municipality_index[municipality]
+        except KeyError:
+            raise KeyError(f'Município desconhecido: {municipality}')
+
+    def variable_index(self, variable):
+        try:
+            return self._variable_index[variable]
+        except KeyError:
+            raise KeyError(f'Variável desconhecida: {variable}')
+
+    def add_listener(self, listener):
+        """Registra `listener(store, m, v, w, delta)`, chamado após cada write()
+
+        `delta` é a diferença entre o valor gravado e o anterior de cada célula.
+        Alterações feitas por outro processo não são notificadas: quem depende
+        delas compara `history_version`.
+        """
+        self._listeners.append(listener)
+
+    def ensure_until(self, index):
+        """Garante que a série cobre a semana `index`, completando com o filler"""
+        if index < self.end_index:
+            return
+        with self._writing():
+            if index < self.end_index or self.filler is None:
+                return
+            first = self.end_index
+            extra = np.asarray(self.filler(self, first, index + 1 - first), dtype=self.dtype)
+            self._data = np.concatenate([np.asarray(self._data), extra], axis=2)
+            self._observed = np.concatenate([self._observed, np.zeros(extra.shape, dtype=bool)], axis=2)
+            self._flush()
+
+    def write(self, municipalities, variables, weeks, values, add=False):
+        """Grava valores nas células (município, variável, semana) indicadas
+
+        Os argumentos são arrays de índices paralelos, sem células repetidas.
+        Com `add`, soma aos valores já ingeridos; células ainda não observadas
+        (geradas pelo filler) são sobrescritas. Semanas anteriores ao início
+        da série são descartadas. Retorna o número de células gravadas.
+        """
+        m, v, w = (np.asarray(a, dtype=np.intp) for a in (municipalities, variables, weeks))
+        values = np.asarray(values)
+        keep = w >= self._start
+        m, v, w, values = m[keep], v[keep], w[keep], values[keep]
+        if not len(w):
+            return 0
+
+        with self._writing():
+            self.ensure_until(int(w.max()))
+            if not os.path.exists(self.data_path):
+                self._flush()
+            cols = w - self._start
+
+            # Escrita no próprio arquivo: leitores com memory-map veem a alteração
+            data = np.load(self.data_path, mmap_mode='r+')
+            before = np.array(data[m, v, cols])
+            if add:
+                values = values + np.where(self._observed[m, v, cols], before, 0)
+            data[m, v, cols] = values
+            wide = np.float64 if self.dtype.kind == 'f' else np.int64
+            delta = np.asarray(data[m, v, cols], dtype=wide) - before.astype(wide)
+            data.flush()
+            del data
+
+            self._observed[m, v, cols] = True
+            self.history_version += 1
+            self.version += 1
+            self.updated_at = datetime.now(timezone.utc)
+            self._save_observed()
+            self._write_meta()
+            self._data = np.load(self.data_path, mmap_mode='r')
+            for listener in self._listeners:
+                try:
+                    listener(self, m, v, w, delta)
+                except Exception as e:
+                    print(f"Erro ao notificar gravação em {self.name}: {e}")
+        return len(w)
+
+    def read(self, municipality, start=None, end=None, variables=None):
+        """Lê a fatia [start, end) de um município
+
+        Retorna (primeiro_indice, {variavel: array}), sem copiar os dados.
+        """
+        m = self.municipality_index(municipality)
+        i0 = max(self._start if start is None else start, self._start)
+        i1 = min(self.end_index if end is None else end, self.end_index)
+        i1 = max(i0, i1)
+        columns = {}
+        for variable in (variables or self.variables):
+            v = self.variable_index(variable)
+            columns[variable] = self._data[m, v, i0 - self._start:i1 - self._start]
+        return i0, columns
+
+    def clear_observed(self):
+        """Marca todas as células como não observadas (a próxima ingestão sobrescreve)"""
+        with self._writing():
+            self._observed[:] = False
+            if os.path.exists(self.observed_path):
+                os.remove(self.observed_path)
+
+    def _flush(self):
+        """Grava a série de forma atômica e reabre como memory-map"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.version += 1
+        self.updated_at = datetime.now(timezone.utc)
+
+        data = np.ascontiguousarray(self._data)
+        _replace(self.data_path, lambda f: np.save(f, data))
+
+        self._save_observed()
+        self._write_meta()
+        self._data = np.load(self.data_path, mmap_mode='r')
+
+    def _save_observed(self):
+        if not self._observed.any():
+            return
+        _replace(self.observed_path, lambda f: np.save(f, self._observed))
+
+    def _write_meta(self):
+        meta = {
+            'variables': list(self.variables),
+            'municipalities': self.municipalities,
+            'dtype': self.dtype.str,
+            'start': self._start,
+            'version': self.version,
+            'history_version': self.history_version
+        }
+        _replace(self.meta_path, lambda f: f.write(json.dumps(meta).encode()))
+        self._meta_mtime = os.stat(self.meta_path).st_mtime_ns
+
+
+def _replace(path, write):
+    """Grava `path` por um temporário exclusivo no mesmo diretório e os.replace"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def week_dates(first_index, count):
+    """Datas (YYYY-MM-DD) de início de `count` semanas a partir de `first_index`"""
+    epoch = np.datetime64(epiweeks.EPOCH.isoformat(), 'D')
+    days = epoch + (np.arange(first_index, first_index + count) * 7).astype('timedelta64[D]')
+    return np.datetime_as_string(days).tolist()
+
+
+def simulated_cases(store, first_index, count):
+    """Casos da simulação SEIR (municípios × doenças × semanas)"""
+    populations = [MUNICIPALITIES.get(m, {}).get('population', 140000) for m in store.municipalities]
+    simulation = get_simulation(store.municipalities, populations, store.variables)
+    return simulation.cases(first_index, count)
+
+
+def simulated_climate(store, first_index, count):
+    """Clima simulado, o mesmo que modula a transmissão na simulação"""
+    return climate(store.municipalities, store.variables, first_index, count)
+
+
+_case_store = None
+_case_store_lock = threading.Lock()
+
+
+def get_case_store():
+    """Retorna a série de casos compartilhada, cobrindo até a semana corrente"""
+    global _case_store
+    if _case_store is None:
+        with _case_store_lock:
+            if _case_store is None:
+                _case_store = WeeklyStore('cases', DISEASES, municipality_slugs(), filler=simulated_cases)
+    _case_store.refresh()
+    _case_store.ensure_until(epiweeks.current_index())
+    return _case_store
+
+
+_climate_store = None
+_climate_store_lock = threading.Lock()
+
+
+def get_climate_store():
+    """Retorna a série climática compartilhada, cobrindo até a semana corrente"""
+    global _climate_store
+    if _climate_store is None:
+        with _climate_store_lock:
+            if _climate_store is None:
+                _climate_store = WeeklyStore('climate', CLIMATE_VARIABLES, municipality_slugs(),
+                                             dtype='float32', filler=simulated_climate)
+    _climate_store.refresh()
+    _climate_store.ensure_until(epiweeks.current_index())
+    return _climate_store
+
+
+def data_version():
+    """Versão das séries carregadas: (token, última modificação)
+
+    O token inclui a semana corrente, de modo que muda ao virar a semana
+    epidemiológica mesmo sem novas gravações. Cada série confere o mtime
+    dos metadados, para refletir gravações de outros processos.
+    """
+    stores = [s for s in (_case_store, _climate_store) if s is not None]
+    for store in stores:
+        store.refresh()
+    token = '.'.join(f'{s.name}{s.version}:{s.end_index}' for s in stores)
+    modified = max((s.updated_at for s in stores if s.updated_at), default=None)
+    return f'{epiweeks.current_index()}.{token}', modified
+
+
+def parse_history_args(args):
+    """Valida os filtros ?from=&to=&disease=&municipality= das consultas históricas"""
+    municipality = args.get('municipality', 'teofilo_otoni')
+    if municipality not in MUNICIPALITIES:
+        raise ValueError(f'Município desconhecido: {municipality}')
+
+    try:
+        end = epiweeks.week_index(args['to']) + 1 if args.get('to') else epiweeks.current_index() + 1
+        start = epiweeks.week_index(args['from']) if args.get('from') else end - DEFAULT_WINDOW
+    except ValueError:
+        raise ValueError('Datas devem estar no formato YYYY-MM-DD')
+    if start >= end:
+        raise ValueError("'from' deve ser anterior a 'to'")
+
+    diseases = DISEASES
+    if args.get('disease'):
+        diseases = tuple(d.strip() for d in args['disease'].split(',') if d.strip())
+        unknown = [d for d in diseases if d not in DISEASES]
+        if unknown:
+            raise ValueError(f"Doença desconhecida: {', '.join(unknown)}")
+
+    return {'municipality': municipality, 'start': start, 'end': end, 'diseases': diseases}
+
+
+def historical_table(municipality, start, end, diseases=DISEASES):
+    """Fatia da série de casos em colunas: (datas, {doença: array})"""
+    store = get_case_store()
+    first, columns = store.read(municipality, start, end, diseases)
+    count = len(next(iter(columns.values()))) if columns else 0
+    return week_dates(first, count), {d: columns[d] for d in diseases}
+
+
+def historical_records(municipality, start, end, diseases=DISEASES):
+    """Monta as linhas {date, doença...} a partir de uma fatia da série de casos"""
+    dates, columns = historical_table(municipality, start, end, diseases)
+    values = {d: columns[d].tolist() for d in diseases}
+    return [
+        {'date': date, **{d: values[d][i] for d in diseases}}
+        for i, date in enumerate(dates)
+    ]
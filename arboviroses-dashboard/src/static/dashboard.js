@@ -158,6 +158,7 @@ export default function Dashboard() {
   const [city, setCity] = useState('teofilo_otoni');
   const [data, setData] = useState([]);
   const [pred, setPred] = useState([]);
+  const [serverKpis, setServerKpis] = useState(null);
   const [loading, setLoading] = useState(false);
 
   // Busca dados sempre que a cidade muda
@@ -165,53 +166,46 @@ export default function Dashboard() {
     (async () => {
       setLoading(true);
       try {
-        const r = await axios.get(`${API_BASE}/data/${city}`);
-        const rows = (r.data?.data || []).map(d => ({
+        // Série e previsão em uma única requisição, calculadas em paralelo no servidor
+        const r = await axios.get(`${API_BASE}/arboviroses/dashboard-bundle`, {
+          params: { municipality: city, panels: 'series,forecast,kpis' }
+        });
+        const rows = (Array.isArray(r.data?.series) ? r.data.series : []).map(d => ({
           date: d.date,
           cases: Number(d.cases ?? 0),
           temp: d.temp == null ? null : Number(d.temp)
         }));
         setData(rows);
 
-        const p = await axios.post(`${API_BASE}/predict`, { city, last_weeks: 12 });
-        setPred(Array.isArray(p.data?.prediction_weeks) ? p.data.prediction_weeks.map(Number) : []);
+        const p = r.data?.forecast;
+        setPred(Array.isArray(p?.prediction_weeks) ? p.prediction_weeks.map(Number) : []);
+        setServerKpis(r.data?.kpis && !r.data.kpis.error ? r.data.kpis : null);
       } catch (e) {
         console.error('Erro ao buscar dados:', e);
-        setData([]); setPred([]);
+        setData([]); setPred([]); setServerKpis(null);
       } finally {
         setLoading(false);
       }
     })();
   }, [city]);
 
-  // Métricas
+  // Métricas: calculadas no servidor (índice do canal endêmico)
   const kpis = useMemo(() => {
-    if (!data.length) {
+    if (!serverKpis) {
       return {
         last: '—', change: '—', changeTrend: null,
         ma4: '—', trendLabel: 'sem dados'
       };
     }
-    const last = data[data.length - 1].cases ?? 0;
-    const prev = data[data.length - 2]?.cases ?? 0;
-    const change = prev === 0 ? (last > 0 ? 100 : 0) : ((last - prev) / prev) * 100;
-
-    const last4 = data.slice(-4).map(d => d.cases ?? 0);
-    const ma4 = last4.length ? Math.round(last4.reduce((a,b)=>a+b,0) / last4.length) : 0;
-
-    const changeTrend = change > 0 ? 'up' : change < 0 ? 'down' : null;
-    const trendLabel = change > 5 ? 'alta'
-                       : change < -5 ? 'queda'
-                       : 'estável';
-
+    const { last, change_pct: change, ma4, trend } = serverKpis;
     return {
       last: String(last),
-      change: `${change > 0 ? '+' : ''}${change.toFixed(1)}%`,
-      changeTrend,
-      ma4: String(ma4),
-      trendLabel
+      change: `${change > 0 ? '+' : ''}${Number(change).toFixed(1)}%`,
+      changeTrend: change > 0 ? 'up' : change < 0 ? 'down' : null,
+      ma4: String(Math.round(ma4)),
+      trendLabel: { increasing: 'alta', decreasing: 'queda', stable: 'estável' }[trend] || trend
     };
-  }, [data]);
+  }, [serverKpis]);
 
   const dataWithFuture = useMemo(() => addFutureWeeks(data, 12, pred), [data, pred]);
 
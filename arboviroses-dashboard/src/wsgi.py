@@ -0,0 +1,13 @@
+"""Ponto de entrada WSGI de produção
+
+    gunicorn -c gunicorn.conf.py src.wsgi:app
+
+ARBOVIROSES_ENGINE=simple|full escolhe o motor do /api/arboviroses (src.services.engines).
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import create_app
+
+app = create_app()
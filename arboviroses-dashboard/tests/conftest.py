@@ -0,0 +1,57 @@
+"""Fixtures dos testes: séries, checkpoints e estáticos em diretórios temporários
+
+Os diretórios de dados são lidos na importação de `src`, então as variáveis
+de ambiente são definidas aqui, antes de qualquer import da aplicação.
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+sys.path.insert(0, ROOT)
+_data_dir = tempfile.mkdtemp(prefix='arboviroses-tests-')
+os.environ['ARBOVIROSES_DATA_DIR'] = _data_dir
+os.environ['ARBOVIROSES_STATIC_BUILD_DIR'] = os.path.join(_data_dir, 'static')
+os.environ['ARBOVIROSES_MUNICIPALITIES'] = os.path.join(_data_dir, 'sem_cadastro.csv')
+os.environ.pop('ARBOVIROSES_INGEST_SOURCES', None)
+
+from src.services.municipalities import municipality_slugs  # noqa: E402
+from src.services.weekly_store import CLIMATE_VARIABLES, DISEASES, WeeklyStore  # noqa: E402
+
+
+def zeros(store, first, count):
+    return np.zeros((len(store.municipalities), len(store.variables), count))
+
+
+@pytest.fixture
+def case_store(tmp_path):
+    return WeeklyStore('cases', DISEASES, municipality_slugs(), data_dir=str(tmp_path), filler=zeros)
+
+
+@pytest.fixture
+def climate_store(tmp_path):
+    return WeeklyStore('climate', CLIMATE_VARIABLES, municipality_slugs(), dtype='float32',
+                       data_dir=str(tmp_path), filler=zeros)
+
+
+@pytest.fixture
+def fixture_path():
+    return lambda name: os.path.join(FIXTURES, name)
+
+
+@pytest.fixture(scope='session')
+def api_app():
+    """Aplicação completa (motor padrão), com sistemas pré-carregados"""
+    from src.main import create_app, preload
+    uri = f"sqlite:///{os.path.join(_data_dir, 'app.db')}"
+    return preload(create_app({'SQLALCHEMY_DATABASE_URI': uri, 'TESTING': True}))
+
+
+@pytest.fixture
+def client(api_app):
+    return api_app.test_client()
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from src.models.user import db
+from src.services.alert_store import (
+    current_status, decode_cursor, list_alerts, parse_alert_args, record_alerts
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'alerts.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def alerts(count, municipality='teofilo_otoni', start=None):
+    start = start or datetime.now() - timedelta(days=1)
+    return [{'id': f'{municipality}-{i}', 'municipality': municipality, 'risk_level': 'medio',
+             'timestamp': start + timedelta(minutes=i)} for i in range(count)]
+
+
+def test_cursor_pages_cover_history_once(app):
+    record_alerts(alerts(7))
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_alerts(municipality='teofilo_otoni', cursor=cursor, limit=3)
+        seen += [a['id'] for a in page]
+        if cursor is None:
+            break
+
+    assert seen == [f'teofilo_otoni-{i}' for i in reversed(range(7))]
+    # Ids repetidos são ignorados
+    assert record_alerts(alerts(7)) == 0
+
+
+def test_cursor_is_stable_for_equal_timestamps(app):
+    same_time = datetime.now() - timedelta(hours=1)
+    record_alerts([dict(a, timestamp=same_time) for a in alerts(4)])
+    first, cursor = list_alerts(limit=2)
+    second, _ = list_alerts(cursor=cursor, limit=2)
+    assert {a['id'] for a in first}.isdisjoint(a['id'] for a in second)
+    assert len(first + second) == 4
+
+
+def test_invalid_cursor_and_unknown_municipality_are_rejected(app):
+    with pytest.raises(ValueError):
+        decode_cursor('não-é-cursor')
+    with pytest.raises(ValueError):
+        parse_alert_args({'municipality': 'atlantida'})
+    assert parse_alert_args({})['municipality'] is None
+
+
+def test_status_of_one_or_all_municipalities(app):
+    record_alerts(alerts(2) + alerts(3, 'diamantina'))
+
+    assert current_status('diamantina')['recent_alerts_count'] == 3
+    overall = current_status()
+    assert overall['municipality'] is None
+    assert overall['recent_alerts_count'] == 5
+    assert overall['highest_recent_risk'] == 'medio'
+    assert len(list_alerts(**parse_alert_args({}))[0]) == 5
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from src.models.user import db
+from src.services import event_stream
+from src.services.alert_store import record_alerts
+from src.services.event_stream import EventBroker, StreamLimit
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'alerts.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def broker(app, monkeypatch):
+    tokens = iter(['v1', 'v1', 'v2'])
+    syncs = []
+    monkeypatch.setattr(event_stream, 'data_version', lambda: (next(tokens), None))
+    monkeypatch.setattr(event_stream, 'sync_alerts', lambda: syncs.append(1))
+    broker = EventBroker(poll_interval=3600)
+    broker.init_app(app)
+    broker.syncs = syncs
+    yield broker
+    broker.stop()
+
+
+def pending(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+def test_alerts_from_any_process_reach_subscribers(app, broker):
+    subscription = broker.subscribe('teofilo_otoni')
+    other = broker.subscribe('diamantina')
+    with app.app_context():
+        broker.check_alerts()
+        assert pending(subscription) == []
+
+        # Gravado por outro worker: chega pelo banco, não por este processo
+        record_alerts([{'id': 'a1', 'municipality': 'teofilo_otoni', 'risk_level': 'alto',
+                        'timestamp': datetime.now()}])
+        broker.check_alerts()
+
+    events = [m.split('\n')[0] for m in pending(subscription)]
+    assert events == ['event: alert', 'event: status']
+    assert pending(other) == []
+
+
+def test_data_change_records_alerts_once_per_version(app, broker):
+    broker.subscribe('teofilo_otoni')
+    with app.app_context():
+        for _ in range(3):
+            broker.check_alerts()
+    assert len(broker.syncs) == 2
+
+
+def test_stream_limit(app):
+    broker = EventBroker(poll_interval=3600, max_streams=1)
+    broker.subscribe('teofilo_otoni')
+    with pytest.raises(StreamLimit):
+        broker.subscribe('diamantina')
+    broker.stop()
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from src.services.climate_correlation import CORRELATED_VARIABLES, LaggedCorrelation
+from src.services.epidemic_channel import EpidemicChannel
+from src.services.municipalities import municipality_slugs
+from src.services.rollup import RollupCube
+from src.services.weekly_store import CLIMATE_VARIABLES, DISEASES, WeeklyStore
+
+WEEKS = 330
+
+
+def random_filler(seed):
+    def filler(store, first, count):
+        rng = np.random.default_rng(seed + first)
+        shape = (len(store.municipalities), len(store.variables), count)
+        return rng.poisson(20, shape) if store.dtype.kind == 'i' else rng.normal(25, 3, shape)
+    return filler
+
+
+@pytest.fixture
+def stores(tmp_path):
+    cases = WeeklyStore('cases', DISEASES, municipality_slugs(), data_dir=str(tmp_path), filler=random_filler(1))
+    climate = WeeklyStore('climate', CLIMATE_VARIABLES, municipality_slugs(), dtype='float32',
+                          data_dir=str(tmp_path), filler=random_filler(2))
+    cases.ensure_until(WEEKS - 1)
+    climate.ensure_until(WEEKS - 1)
+    return cases, climate
+
+
+def test_correlation_deltas_match_rebuild(stores):
+    cases, climate = stores
+    incremental = LaggedCorrelation()
+    incremental.sync(cases, climate)
+    cases.add_listener(incremental.on_cases)
+    climate.add_listener(incremental.on_climate)
+
+    # Semanas na janela, na borda das defasagens e anteriores a ela
+    cases.write([0, 1, 0], [0, 2, 3], [WEEKS - 1, WEEKS - 50, 10], [500, 0, 7])
+    temperature = climate.variable_index('temperatura')
+    wind = climate.variable_index('vento')
+    climate.write([1, 0, 0], [temperature, temperature, wind], [WEEKS - 3, WEEKS - 110, WEEKS - 2],
+                  [40.0, 10.0, 99.0])
+
+    assert incremental.history == (cases.history_version, climate.history_version)
+    fresh = LaggedCorrelation()
+    fresh.sync(cases, climate)
+    np.testing.assert_allclose(incremental.coefficients(), fresh.coefficients(), atol=1e-9)
+    assert len(CORRELATED_VARIABLES) == incremental.coefficients().shape[2]
+
+
+def test_correlation_rebuilds_after_missed_write(stores):
+    cases, climate = stores
+    correlation = LaggedCorrelation()
+    correlation.sync(cases, climate)
+    cases.write([0], [0], [WEEKS - 1], [500])
+
+    cases.add_listener(correlation.on_cases)
+    cases.write([0], [0], [WEEKS - 2], [300])
+    assert correlation.history is None
+
+    correlation.sync(cases, climate)
+    fresh = LaggedCorrelation()
+    fresh.sync(cases, climate)
+    np.testing.assert_allclose(correlation.coefficients(), fresh.coefficients(), atol=1e-9)
+
+
+def test_channel_deltas_match_rebuild(stores):
+    cases, _ = stores
+    incremental = EpidemicChannel()
+    incremental.sync(cases)
+    cases.add_listener(incremental.on_write)
+
+    # Semana corrente (estatísticas), do ano anterior (quartis) e anterior a tudo
+    cases.write([0, 1, 1], [0, 0, 3], [WEEKS - 1, WEEKS - 52, 3], [400, 0, 90])
+    cases.write([0], [1], [0], [1000])
+
+    assert incremental.history == cases.history_version
+    fresh = EpidemicChannel()
+    fresh.sync(cases)
+    np.testing.assert_allclose(incremental.quartiles, fresh.quartiles)
+    np.testing.assert_allclose(incremental.ma4, fresh.ma4)
+    np.testing.assert_allclose(incremental.rt, fresh.rt)
+    assert incremental.kpis(0) == fresh.kpis(0)
+
+
+def assert_same_totals(cube, fresh):
+    assert cube.totals.keys() == fresh.totals.keys()
+    for key, array in fresh.totals.items():
+        # A folga alocada ao crescer muda com a ordem das gravações; fica zerada
+        grown = cube.totals[key]
+        periods = min(array.shape[2], grown.shape[2])
+        np.testing.assert_array_equal(grown[:, :, :periods], array[:, :, :periods], err_msg=str(key))
+        assert not grown[:, :, periods:].any() and not array[:, :, periods:].any(), key
+
+
+def test_rollup_deltas_match_rebuild(stores):
+    cases, _ = stores
+    cube = RollupCube()
+    cube.sync(cases, WEEKS - 10)
+    cases.add_listener(cube.on_write)
+
+    # Semana já somada, semana ainda não somada e semana nova no fim da série
+    cases.write([0, 1, 1], [0, 2, 1], [WEEKS - 20, WEEKS - 5, 3], [900, 0, 40])
+    cases.write([1], [0], [WEEKS + 6], [25])
+
+    assert cube.history == cases.history_version
+    assert cube.end_index == cases.end_index
+    fresh = RollupCube()
+    fresh.build(cases, cases.end_index)
+    assert_same_totals(cube, fresh)
+    state = fresh.geography.regions['state'][0]
+    for grain, totals in cube.summary('state', state, WEEKS - 20)[1].items():
+        assert totals.tolist() == fresh.summary('state', state, WEEKS - 20)[1][grain].tolist()
+
+
+def test_rollup_rebuilds_after_missed_write(stores):
+    cases, _ = stores
+    cube = RollupCube()
+    cube.sync(cases)
+    cases.write([0], [0], [WEEKS - 1], [500])
+
+    cases.add_listener(cube.on_write)
+    cases.write([0], [0], [WEEKS - 2], [300])
+    assert cube.history is None
+
+    cube.sync(cases)
+    fresh = RollupCube()
+    fresh.build(cases, cases.end_index)
+    assert_same_totals(cube, fresh)
@@ -0,0 +1,167 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from src.services import epiweeks, ingestion
+from src.services.ingestion import (
+    Checkpoint, FileSource, IngestionPipeline, InfoDengueFormat, SinanFormat, try_lock
+)
+
+W1 = epiweeks.week_index('2024-01-08')
+TEOFILO, DIAMANTINA = 0, 1
+DENGUE, ZIKA, CHIKUNGUNYA = 0, 1, 2
+
+
+def pipeline(path, fmt, case_store, climate_store, tmp_path, chunk_lines=2):
+    return IngestionPipeline(FileSource(path), fmt, case_store, climate_store,
+                             checkpoint=Checkpoint(fmt.name, str(tmp_path / 'checkpoints')),
+                             chunk_lines=chunk_lines)
+
+
+def cell(store, m, v, w):
+    return store.data[m, v, w - store.start_index].item()
+
+
+def test_sinan_counts_notifications(case_store, climate_store, tmp_path, fixture_path):
+    state = pipeline(fixture_path('sinan.csv'), SinanFormat(), case_store, climate_store, tmp_path).run()
+
+    assert state['rows'] == 10
+    assert state['rejected'] == 3
+    # Uma das três notificações da SE usa DT_NOTIFIC (DT_SIN_PRI vazio na linha)
+    assert cell(case_store, TEOFILO, DENGUE, W1) == 3
+    assert cell(case_store, TEOFILO, CHIKUNGUNYA, W1 + 1) == 1
+    assert cell(case_store, DIAMANTINA, DENGUE, W1 + 1) == 1
+    assert cell(case_store, DIAMANTINA, ZIKA, W1 + 1) == 1
+    assert cell(case_store, TEOFILO, DENGUE, W1 + 2) == 1
+    assert case_store.observed.sum() == 5
+
+
+def test_sinan_date_fallback_is_per_row(case_store):
+    columns = {
+        'ID_AGRAVO': ['A90', 'A90'],
+        'DT_NOTIFIC': ['2024-01-12', '2024-01-19'],
+        'DT_SIN_PRI': ['', '2024-01-08'],
+        'ID_MN_RESI': ['316860', '316860']
+    }
+    batch, rejected = SinanFormat().clean(columns, case_store)
+
+    assert rejected == 0
+    assert batch['w'].tolist() == [W1, W1]
+
+
+def test_infodengue_keeps_last_row_and_climate(case_store, climate_store, tmp_path, fixture_path):
+    fmt = InfoDengueFormat('dengue')
+    state = pipeline(fixture_path('infodengue.csv'), fmt, case_store, climate_store, tmp_path, 10).run()
+
+    assert state['rejected'] == 2
+    assert cell(case_store, TEOFILO, DENGUE, W1) == 10
+    assert cell(case_store, TEOFILO, DENGUE, W1 + 1) == 15
+    assert cell(case_store, DIAMANTINA, DENGUE, W1 + 1) == 4
+    temperature = climate_store.variable_index('temperatura')
+    humidity = climate_store.variable_index('umidade')
+    assert cell(climate_store, TEOFILO, temperature, W1 + 1) == pytest.approx(26.5)
+    assert cell(climate_store, TEOFILO, humidity, W1) == pytest.approx(70.1, abs=1e-4)
+
+
+def test_checkpoint_resumes_from_offset(case_store, climate_store, tmp_path, fixture_path):
+    source = tmp_path / 'sinan.csv'
+    shutil.copy(fixture_path('sinan.csv'), source)
+    pipeline(str(source), SinanFormat(), case_store, climate_store, tmp_path).run()
+
+    with open(source, 'a') as f:
+        f.write('A90,2024-01-12,2024-01-09,316860\n')
+    state = pipeline(str(source), SinanFormat(), case_store, climate_store, tmp_path).run()
+
+    assert state['rows'] == 11
+    assert cell(case_store, TEOFILO, DENGUE, W1) == 4
+    # Nada novo na fonte: os valores não mudam
+    pipeline(str(source), SinanFormat(), case_store, climate_store, tmp_path).run()
+    assert cell(case_store, TEOFILO, DENGUE, W1) == 4
+
+
+def test_sinan_replay_after_crash_does_not_double_count(case_store, climate_store, tmp_path,
+                                                        fixture_path, monkeypatch):
+    monkeypatch.setattr(ingestion, 'CHECKPOINT_INTERVAL', 0)
+    crashing = pipeline(fixture_path('sinan.csv'), SinanFormat(), case_store, climate_store, tmp_path)
+    saves = []
+
+    def save(state, totals=None):
+        # Queda entre a gravação do segundo bloco e o seu checkpoint
+        if len(saves) == 1:
+            raise RuntimeError('queda')
+        saves.append(state['offset'])
+        Checkpoint.save(crashing.checkpoint, state, totals)
+
+    monkeypatch.setattr(crashing.checkpoint, 'save', save)
+    with pytest.raises(RuntimeError):
+        crashing.run()
+
+    pipeline(fixture_path('sinan.csv'), SinanFormat(), case_store, climate_store, tmp_path).run()
+    assert cell(case_store, TEOFILO, DENGUE, W1) == 3
+    assert case_store.data.sum() == 7
+
+
+def test_sinan_checkpoint_is_flushed_once_per_run(case_store, climate_store, tmp_path, fixture_path,
+                                                  monkeypatch):
+    sinan = pipeline(fixture_path('sinan.csv'), SinanFormat(), case_store, climate_store, tmp_path)
+    saves = []
+    monkeypatch.setattr(sinan.checkpoint, 'save', lambda state, totals=None: saves.append(state['offset']))
+    sinan.run()
+    assert len(saves) == 1
+
+
+def test_sinan_sources_add_up_in_shared_cells(case_store, climate_store, tmp_path, fixture_path):
+    def run(path):
+        fmt = SinanFormat()
+        return IngestionPipeline(FileSource(str(path)), fmt, case_store, climate_store,
+                                 checkpoint=Checkpoint(f'sinan-{path.stem}', str(tmp_path / 'checkpoints')),
+                                 chunk_lines=2).run()
+
+    first, second = tmp_path / 'regional.csv', tmp_path / 'municipal.csv'
+    shutil.copy(fixture_path('sinan.csv'), first)
+    second.write_text('ID_AGRAVO,DT_NOTIFIC,DT_SIN_PRI,ID_MN_RESI\nA90,2024-01-12,2024-01-09,316860\n')
+    run(first)
+    run(second)
+    assert cell(case_store, TEOFILO, DENGUE, W1) == 4
+    # Rodar a primeira fonte de novo não apaga a contagem da segunda
+    with open(first, 'a') as f:
+        f.write('A90,2024-01-12,2024-01-10,316860\n')
+    run(first)
+    assert cell(case_store, TEOFILO, DENGUE, W1) == 5
+
+
+def test_checkpoint_keeps_only_current_totals(tmp_path):
+    checkpoint = Checkpoint('sinan', str(tmp_path))
+    state = checkpoint.load()
+    for cases in ([1], [2]):
+        checkpoint.save(state, (np.array([7]), np.array(cases)))
+
+    reloaded = checkpoint.load()
+    assert checkpoint.load_totals(reloaded)[1].tolist() == [2]
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+    checkpoint.reset()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_ingestion_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / 'ingestion.lock')
+    owner = try_lock(path)
+    assert owner is not None
+    assert try_lock(path) is None
+    owner.close()
+    assert try_lock(path) is not None
+
+
+def test_scheduler_waits_for_the_worker(monkeypatch, tmp_path, fixture_path):
+    monkeypatch.setenv('ARBOVIROSES_INGEST_SOURCES', f"sinan={fixture_path('sinan.csv')}")
+    monkeypatch.setattr(ingestion, 'scheduler', None)
+    monkeypatch.setattr(ingestion, '_in_workers', True)
+    monkeypatch.setattr(ingestion, 'LOCK_PATH', str(tmp_path / 'ingestion.lock'))
+    monkeypatch.setattr(ingestion.IngestionScheduler, '_loop', lambda self: None)
+
+    # No mestre (preload): o agendador é criado, mas a thread não parte
+    scheduler = ingestion.start_from_env()
+    assert scheduler._thread is None
+    assert ingestion.start_in_worker() is scheduler
+    assert scheduler._thread is not None
@@ -0,0 +1,49 @@
+import pytest
+
+from src.main import create_app, preload
+from src.services.engines import ENGINES
+from src.services.lifecycle import WARMING
+
+SAMPLE_ARGS = {'weeks': 4, 'z': 8, 'x': 100, 'y': 100}
+
+
+@pytest.fixture(scope='module', params=sorted(ENGINES))
+def engine_app(request, tmp_path_factory):
+    uri = f"sqlite:///{tmp_path_factory.mktemp(request.param) / 'app.db'}"
+    app = preload(create_app({'SQLALCHEMY_DATABASE_URI': uri, 'ARBOVIROSES_ENGINE': request.param}))
+    return app, app.extensions['arboviroses_engine']
+
+
+def data_urls(app):
+    """URLs das rotas de dados do motor (todas menos /health)"""
+    for rule in app.url_map.iter_rules():
+        if rule.rule.startswith('/api/arboviroses') and '/health' not in rule.rule:
+            url = rule.rule
+            for name, value in SAMPLE_ARGS.items():
+                url = url.replace(f'<int:{name}>', str(value))
+            yield url
+
+
+def test_every_data_route_waits_for_warm_up(engine_app, monkeypatch):
+    app, engine = engine_app
+    monkeypatch.setattr(engine.lifecycle, 'state', WARMING)
+    client = app.test_client()
+
+    urls = list(data_urls(app))
+    assert len(urls) >= 10
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == 503, url
+        assert response.headers['Retry-After']
+    assert client.get('/api/arboviroses/health/live').status_code == 200
+
+
+def test_health_reports_the_services_the_engine_starts(engine_app):
+    app, engine = engine_app
+    health = app.test_client().get('/api/arboviroses/health')
+
+    assert health.status_code == 200
+    body = health.get_json()
+    assert body['status'] == 'healthy'
+    assert body['services'] == {name: True for name in engine.lifecycle.components}
+    assert {'case_store', 'climate_store', 'rollup'} <= set(body['services'])
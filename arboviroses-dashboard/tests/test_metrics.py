@@ -0,0 +1,19 @@
+from src.services.metrics import CONTENT_TYPE
+
+TOKEN = 'segredo'
+
+
+def test_metrics_require_admin_token(client, monkeypatch):
+    monkeypatch.setenv('ARBOVIROSES_ADMIN_TOKEN', TOKEN)
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'X-Admin-Token': 'errado'}).status_code == 403
+    response = client.get('/metrics', headers={'X-Admin-Token': TOKEN})
+    assert response.status_code == 200
+    assert response.content_type == CONTENT_TYPE
+    assert b'arboviroses_' in response.data
+
+
+def test_metrics_closed_without_configured_token(client, monkeypatch):
+    monkeypatch.delenv('ARBOVIROSES_ADMIN_TOKEN', raising=False)
+    assert client.get('/metrics', headers={'X-Admin-Token': ''}).status_code == 403
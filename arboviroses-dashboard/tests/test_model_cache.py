@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.services import weekly_store
+from src.services.model_cache import ModelCache
+from src.services.municipalities import municipality_slugs
+from src.services.weekly_store import CLIMATE_VARIABLES, DISEASES, WeeklyStore
+
+from conftest import zeros
+
+
+def counting_engine(case_store):
+    calls = []
+
+    def disease_cases(city, weeks):
+        calls.append(city)
+        return case_store.end_index - weeks, np.ones((len(DISEASES), weeks))
+
+    return SimpleNamespace(case_store=case_store, disease_cases=disease_cases), calls
+
+
+def test_memo_follows_case_and_climate_writes_from_other_processes(case_store, climate_store,
+                                                                   tmp_path, monkeypatch):
+    monkeypatch.setattr(weekly_store, '_climate_store', climate_store)
+    case_store.ensure_until(100)
+    engine, calls = counting_engine(case_store)
+    cache = ModelCache()
+
+    cache.predict(engine, 'teofilo_otoni', 4)
+    cache.predict(engine, 'teofilo_otoni', 4)
+    assert len(calls) == 1
+
+    # Outras instâncias sobre os mesmos arquivos fazem o papel da ingestão
+    climate = WeeklyStore('climate', CLIMATE_VARIABLES, municipality_slugs(), dtype='float32',
+                          data_dir=str(tmp_path), filler=zeros)
+    climate.write([0], [0], [50], [31.5])
+    cache.predict(engine, 'teofilo_otoni', 4)
+    assert len(calls) == 2
+
+    cases = WeeklyStore('cases', DISEASES, municipality_slugs(), data_dir=str(tmp_path), filler=zeros)
+    cases.write([0], [0], [50], [7])
+    cache.predict(engine, 'teofilo_otoni', 4)
+    assert len(calls) == 3
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from src.services import profiler
+
+TOKEN = 'segredo'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('ARBOVIROSES_ADMIN_TOKEN', TOKEN)
+    app = Flask(__name__)
+    # Exceções propagadas (como em debug): o after_request não roda
+    app.testing = True
+    profiler.init_app(app)
+
+    @app.route('/ok')
+    def ok():
+        return 'ok'
+
+    @app.route('/boom')
+    def boom():
+        raise RuntimeError('falha')
+
+    return app.test_client()
+
+
+def samplers():
+    return [t for t in threading.enumerate() if t.name == 'profiler']
+
+
+def test_profile_returns_collapsed_stacks(client):
+    response = client.get('/ok?profile=1', headers={'X-Admin-Token': TOKEN})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert response.headers['X-Profile-Status'] == '200'
+    assert not samplers()
+
+
+def test_profile_requires_admin(client):
+    assert client.get('/ok?profile=1').status_code == 403
+
+
+def test_failing_request_stops_the_sampler(client):
+    with pytest.raises(RuntimeError):
+        client.get('/boom?profile=1', headers={'X-Admin-Token': TOKEN})
+    assert not samplers()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from flask import Flask
+
+from src.services import response_cache
+from src.services.response_cache import LRUCache, cached_response
+from src.services.serialization import MIMETYPES, table_response
+
+COLUMNAR = MIMETYPES['columnar']
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(response_cache, 'backend', LRUCache())
+    version = {'token': '1'}
+    calls = []
+    app = Flask(__name__)
+
+    @app.route('/series')
+    @cached_response(lambda: (version['token'], None))
+    def series():
+        calls.append(1)
+        return table_response(['2024-01-07', '2024-01-14'], {'dengue': np.array([3, 4])})
+
+    client = app.test_client()
+    client.version = version
+    client.calls = calls
+    return client
+
+
+def test_etag_and_key_depend_on_negotiated_format(client):
+    as_json = client.get('/series')
+    columnar = client.get('/series', headers={'Accept': COLUMNAR})
+
+    assert as_json.mimetype == 'application/json'
+    assert columnar.mimetype == COLUMNAR
+    assert as_json.headers['ETag'] != columnar.headers['ETag']
+    assert 'columnar' in columnar.headers['ETag']
+    # Cada formato tem sua entrada: o acerto devolve o formato pedido
+    again = client.get('/series', headers={'Accept': COLUMNAR})
+    assert again.mimetype == COLUMNAR
+    assert again.get_json() == {'dates': ['2024-01-07', '2024-01-14'], 'dengue': [3, 4]}
+    assert len(client.calls) == 2
+
+
+def test_vary_accept_only_when_header_negotiates(client):
+    negotiated = client.get('/series', headers={'Accept': COLUMNAR})
+    explicit = client.get('/series?format=columnar')
+
+    assert {'Accept', 'Accept-Encoding'} <= set(negotiated.vary)
+    assert 'Accept' not in explicit.vary
+    assert 'Accept-Encoding' in explicit.vary
+
+
+def test_not_modified_keeps_vary_and_follows_version(client):
+    etag = client.get('/series', headers={'Accept': COLUMNAR}).headers['ETag']
+
+    cached = client.get('/series', headers={'Accept': COLUMNAR, 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert 'Accept' in cached.vary
+    # Outro formato não casa com o ETag da variante columnar
+    assert client.get('/series', headers={'If-None-Match': etag}).status_code == 200
+
+    client.version['token'] = '2'
+    assert client.get('/series', headers={'Accept': COLUMNAR, 'If-None-Match': etag}).status_code == 200
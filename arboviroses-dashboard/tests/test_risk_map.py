@@ -0,0 +1,14 @@
+import pytest
+
+from src.services.risk_map import parse_bbox
+
+
+def test_parse_bbox_clamps_to_valid_ranges():
+    assert parse_bbox('-200,-95.5,-41,10') == (-180.0, -90.0, -41.0, 10.0)
+    assert parse_bbox('-41.6,-17.9,-41.4,-17.8') == (-41.6, -17.9, -41.4, -17.8)
+
+
+@pytest.mark.parametrize('value', ['nan,0,1,1', '0,0,inf,1', '-inf,-inf,0,0', '1,1,0,0', '1,2,3', 'a,b,c,d'])
+def test_parse_bbox_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_bbox(value)
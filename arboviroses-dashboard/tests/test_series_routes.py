@@ -0,0 +1,48 @@
+import pytest
+
+from src.services.series_engine import MAX_HORIZON
+
+
+@pytest.mark.parametrize('body', [
+    {'cities': [['teofilo_otoni']]},
+    {'cities': [{'slug': 'teofilo_otoni'}]},
+    {'cities': [1, 2]},
+    {'city': 42},
+    {'cities': []}
+])
+def test_predict_rejects_non_string_cities(client, body):
+    response = client.post('/api/predict', json=body)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('body', [['teofilo_otoni'], 'teofilo_otoni', 42])
+def test_predict_rejects_non_object_body(client, body):
+    response = client.post('/api/predict', json=body)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('weeks, status', [(0, 400), (-3, 400), ('x', 400), (1, 200)])
+def test_city_data_weeks_is_validated(client, weeks, status):
+    response = client.get(f'/api/data/teofilo_otoni?weeks={weeks}')
+    assert response.status_code == status
+
+
+@pytest.mark.parametrize('weeks', [0, -1, MAX_HORIZON + 1])
+def test_predict_rejects_horizon_out_of_range(client, weeks):
+    response = client.post('/api/predict', json={'city': 'teofilo_otoni', 'weeks': weeks})
+    assert response.status_code == 400
+
+
+def test_predict_batch(client):
+    response = client.post('/api/predict', json={'cities': ['teofilo_otoni', 'diamantina'], 'weeks': 3})
+    assert response.status_code == 200
+    predictions = response.get_json()['predictions']
+    assert [len(p['prediction_weeks']) for p in predictions.values()] == [3, 3]
+
+
+@pytest.mark.parametrize('weeks, status', [(0, 400), (MAX_HORIZON + 1, 400), (1, 200), (MAX_HORIZON, 200)])
+def test_predictions_horizon_is_validated(client, weeks, status):
+    response = client.get(f'/api/arboviroses/predictions/{weeks}')
+    assert response.status_code == status
+    if status == 200:
+        assert len(response.get_json()) == weeks
@@ -0,0 +1,83 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from src.services import static_assets
+from src.services.static_assets import IMMUTABLE, REVALIDATE, StaticManifest
+
+SCRIPT = b'console.log("arboviroses");\n' * 64
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'js').mkdir(parents=True)
+    (static / 'js' / 'app.js').write_bytes(SCRIPT)
+    (static / 'logo.png').write_bytes(b'\x89PNG' * 300)
+    (static / 'index.html').write_text('<script src="/js/app.js"></script><img src="logo.png">')
+    return StaticManifest(str(static), build_dir=str(tmp_path / 'build'))
+
+
+@pytest.fixture
+def client(manifest):
+    app = Flask(__name__)
+    app.add_url_rule('/', 'index', manifest.serve_index)
+    app.add_url_rule('/<path:path>', 'asset', manifest.serve)
+    return app.test_client()
+
+
+def test_fingerprints_and_rewrites_index(manifest, client):
+    url = manifest.url('js/app.js')
+    assert url != 'js/app.js'
+    assert url.startswith('js/app.') and url.endswith('.js')
+
+    html = client.get('/').get_data(as_text=True)
+    assert f'src="{url}"' in html
+    assert f'src="{manifest.url("logo.png")}"' in html
+
+
+def test_fingerprinted_asset_is_immutable_and_gzipped(manifest, client):
+    url = '/' + manifest.url('js/app.js')
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.get_data()) == SCRIPT
+
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data() == SCRIPT
+    assert plain.headers['ETag'] != response.headers['ETag']
+
+
+def test_original_name_revalidates_and_binary_is_not_compressed(manifest, client):
+    assert client.get('/js/app.js').headers['Cache-Control'] == REVALIDATE
+
+    image = client.get('/' + manifest.url('logo.png'), headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in image.headers
+    assert 'Accept-Encoding' not in image.vary
+
+
+def test_conditional_requests_return_304(manifest, client):
+    url = '/' + manifest.url('js/app.js')
+    etag = client.get(url, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    cached = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert cached.status_code == 304
+
+    index_etag = client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    assert client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': index_etag}).status_code == 304
+    # Caminhos desconhecidos caem no fallback da SPA
+    assert client.get('/painel/teofilo_otoni').mimetype == 'text/html'
+
+
+def test_variants_are_reused_across_scans(manifest, tmp_path, monkeypatch):
+    calls = []
+    original = static_assets.compress
+    monkeypatch.setattr(static_assets, 'compress',
+                        lambda data, encoding: calls.append(encoding) or original(data, encoding))
+    StaticManifest(manifest.directory, build_dir=str(tmp_path / 'build'))
+    # O .gz do app.js já existe: só o index.html, em memória, é comprimido de novo
+    assert calls.count('gzip') == 1
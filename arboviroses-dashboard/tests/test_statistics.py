@@ -0,0 +1,34 @@
+import pytest
+
+from src.services import response_cache
+from src.services.response_cache import LRUCache
+from src.services.rollup import RollupCube, UnknownRegion
+
+
+def test_unknown_region_is_not_found(client):
+    response = client.get('/api/arboviroses/statistics?level=micro&region=inexistente')
+    assert response.status_code == 404
+    assert 'inexistente' in response.get_json()['error']
+
+
+def test_state_drill_down(client):
+    response = client.get('/api/arboviroses/statistics?level=state')
+    assert response.status_code == 200
+    assert response.get_json()['level'] == 'state'
+
+
+def test_internal_key_error_is_a_server_error(client, monkeypatch):
+    def broken(self, level, region, week=None):
+        raise KeyError('year')
+
+    monkeypatch.setattr(RollupCube, 'summary', broken)
+    monkeypatch.setattr(response_cache, 'backend', LRUCache())
+    response = client.get('/api/arboviroses/statistics?level=state')
+    assert response.status_code == 500
+
+
+def test_region_index_raises_unknown_region(case_store):
+    cube = RollupCube()
+    cube.build(case_store, case_store.end_index)
+    with pytest.raises(UnknownRegion, match='macro=inexistente'):
+        cube.geography.region_index('macro', 'inexistente')
@@ -0,0 +1,39 @@
+from src.routes import user
+
+
+def pages(client, url):
+    seen = []
+    while url:
+        page = client.get(url)
+        assert isinstance(page.get_json(), list)
+        seen += [u['username'] for u in page.get_json()]
+        cursor = page.headers.get('X-Next-Cursor')
+        url = page.headers['Link'].split(';')[0].strip('<>') if cursor else None
+    return seen
+
+
+def test_users_list_body_and_cursor_header(client):
+    users = [{'username': f'user{i}', 'email': f'user{i}@example.org'} for i in range(5)]
+    assert client.post('/api/users/bulk', json=users).get_json() == {'inserted': 5, 'skipped': 0}
+
+    everyone = client.get('/api/users')
+    assert isinstance(everyone.get_json(), list)
+    assert 'X-Next-Cursor' not in everyone.headers
+    assert pages(client, '/api/users?limit=2') == [u['username'] for u in everyone.get_json()]
+
+
+def test_users_default_page_is_bounded(client, monkeypatch):
+    users = [{'username': f'bounded{i}', 'email': f'bounded{i}@example.org'} for i in range(4)]
+    client.post('/api/users/bulk', json=users)
+    monkeypatch.setattr(user, 'MAX_PAGE', 3)
+
+    first = client.get('/api/users')
+    assert len(first.get_json()) == 3
+    assert first.headers['X-Next-Cursor']
+    # Um limit acima do máximo também é limitado
+    assert len(client.get('/api/users?limit=50').get_json()) == 3
+    assert pages(client, '/api/users')[-4:] == [u['username'] for u in users]
+
+
+def test_users_rejects_invalid_cursor(client):
+    assert client.get('/api/users?cursor=abc').status_code == 400
@@ -0,0 +1,43 @@
+import multiprocessing
+
+from src.services import weekly_store
+from src.services.weekly_store import DISEASES, WeeklyStore, data_version
+from src.services.municipalities import municipality_slugs
+
+from conftest import zeros
+
+
+def test_data_version_sees_writes_from_other_processes(case_store, tmp_path, monkeypatch):
+    case_store.ensure_until(10)
+    monkeypatch.setattr(weekly_store, '_case_store', case_store)
+    monkeypatch.setattr(weekly_store, '_climate_store', None)
+    before, _ = data_version()
+
+    # Outra instância sobre os mesmos arquivos faz o papel de outro processo
+    other = WeeklyStore('cases', DISEASES, municipality_slugs(), data_dir=str(tmp_path), filler=zeros)
+    other.write([0], [0], [5], [42])
+
+    after, _ = data_version()
+    assert after != before
+    assert case_store.data[0, 0, 5 - case_store.start_index] == 42
+
+
+def _add_ones(data_dir, times):
+    store = WeeklyStore('cases', DISEASES, municipality_slugs(), data_dir=data_dir, filler=zeros)
+    for _ in range(times):
+        store.write([0], [0], [5], [1], add=True)
+
+
+def test_concurrent_writers_do_not_lose_updates(case_store, tmp_path):
+    case_store.write([0], [0], [5], [0])
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_add_ones, args=(str(tmp_path), 20)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    case_store.refresh()
+    assert case_store.data[0, 0, 5 - case_store.start_index] == 80
+    assert case_store.history_version == 81
+    assert not list(tmp_path.glob('*.tmp'))